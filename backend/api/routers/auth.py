@@ -2,7 +2,6 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
-import sys
 from db.database import get_db
 from models.user import User
 from api.schemas.auth import UserRegister, UserLogin, TokenResponse, RefreshTokenRequest, UserResponse, UserUpdate, UserSettingsUpdate, UserSettingsResponse, ForgotPasswordRequest, ResetPasswordRequest
@@ -19,7 +18,7 @@ from utils.security import (
     verify_email_token,
     validate_password_strength
 )
-from utils.email_service import send_verification_email
+from utils.email_service import enqueue_verification_email
 
 router = APIRouter()
 
@@ -69,14 +68,9 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(new_user)
         
-        # Send verification email
-        try:
-            await send_verification_email(user_data.email, verification_token)
-            print(f"[REGISTRATION] Verification email sent successfully to: {user_data.email}", file=sys.stderr, flush=True)
-        except Exception as e:
-            # Error already logged in email_service with full details
-            print(f"[REGISTRATION WARNING] User registered but verification email failed. User ID: {new_user.id}, Email: {user_data.email}", file=sys.stderr, flush=True)
-            # Continue anyway - user can request resend
+        # Queue the verification email - delivery (and failure logging) happens off the request path;
+        # if it fails the user can request a resend
+        enqueue_verification_email(user_data.email, verification_token)
         
         return {
             "id": str(new_user.id),
@@ -433,14 +427,9 @@ async def forgot_password(
     user.email_verification_token = reset_token
     db.commit()
     
-    # Send reset email
-    try:
-        from utils.email_service import send_password_reset_email
-        await send_password_reset_email(user.email, reset_token)
-        print(f"[PASSWORD RESET] Password reset email sent successfully to: {user.email}", file=sys.stderr, flush=True)
-    except Exception as e:
-        # Error already logged in email_service with full details
-        print(f"[PASSWORD RESET WARNING] Password reset token created but email failed. Email: {user.email}", file=sys.stderr, flush=True)
+    # Queue the reset email (delivery and failure logging happen off the request path)
+    from utils.email_service import enqueue_password_reset_email
+    enqueue_password_reset_email(user.email, reset_token)
     
     return {"message": "If the email exists, a password reset link has been sent"}
 
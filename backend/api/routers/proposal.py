@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import insert, and_, or_, desc, func, case, select, lambda_stmt
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import flag_modified
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
-from utils.timezone import now_utc_from_ist, now_ist
-import sys
+from io import BytesIO
+from urllib.parse import quote
+from utils.timezone import now_utc_from_ist, now_ist, format_ist
+import asyncio
+import logging
 from db.database import get_db
 from models.user import User
 from models.project import Project
 from models.proposal import Proposal
 from models.insights import Insights
+from models.case_study import CaseStudy
+from models.proposal_stats import ProposalStats
 from api.schemas.proposal import (
     ProposalCreate,
     ProposalUpdate,
@@ -26,12 +34,164 @@ from models.notification import Notification
 from utils.dependencies import get_current_user
 from services.proposal_templates import ProposalTemplates
 from services.proposal_export import proposal_exporter
+from services.cache.proposal_cache import proposal_cache
+from utils.proposal_utils import calculate_section_counts, replace_company_placeholders
+from utils.email_service import TRANSIENT_EMAIL_ERRORS, send_proposal_submission_email
 from utils.websocket_manager import global_ws_manager
+from utils.retry import async_retry
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Chunk size used when streaming export buffers
+_EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Characters replaced with '_' in export filenames (spaces plus anything unsafe in Content-Disposition)
+_EXPORT_FILENAME_TABLE = str.maketrans({c: "_" for c in ' /\\\n\r\t"'})
+
+# Role that reviews submitted proposals
+_MANAGER_ROLE = "pre_sales_manager"
+
+# Review actions a manager may take, and the proposal statuses they can be applied to
+_ALLOWED_REVIEW_ACTIONS = frozenset({"approve", "reject", "hold"})
+_ALLOWED_REVIEW_ACTIONS_STR = "approve, reject, hold"
+_REVIEWABLE_STATUSES = frozenset({"pending_approval", "on_hold"})
+
+# Handlers that only do blocking work (sync DB session, LLM calls, file export) are plain `def`
+# so FastAPI runs them in its threadpool instead of stalling the event loop.
+
+def _fallback_case_studies(db: Session, limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Case studies used when insights have no matches stored.
+    Only the columns materialized into the insights dict are loaded.
+    """
+    rows = db.query(CaseStudy).with_entities(
+        CaseStudy.id,
+        CaseStudy.title,
+        CaseStudy.industry,
+        CaseStudy.impact,
+        CaseStudy.description
+    ).limit(limit).all()
+    return [
+        {
+            "id": cs.id,
+            "title": cs.title,
+            "industry": cs.industry,
+            "impact": cs.impact,
+            "description": cs.description
+        }
+        for cs in rows
+    ]
+
+def _managers_stmt(manager_id: Optional[int] = None):
+    """
+    Cached statement for active managers that should be notified of a submission.
+    Verified managers are always included; manager_id adds that manager even if unverified.
+    The SQL is compiled once per shape and only the parameters are bound per call.
+    """
+    stmt = lambda_stmt(lambda: select(User).where(
+        User.role == _MANAGER_ROLE,
+        User.is_active.is_(True)
+    ))
+    if manager_id:
+        stmt += lambda s: s.where(or_(User.email_verified.is_(True), User.id == manager_id))
+    else:
+        stmt += lambda s: s.where(User.email_verified.is_(True))
+    return stmt
+
+def _get_owned_proposal(db: Session, proposal_id: int, user_id: int) -> Tuple[Proposal, Project]:
+    """
+    Get a proposal together with its project in a single query and verify ownership.
+    Raises 404 if the proposal doesn't exist and 403 if the user doesn't own its project.
+    """
+    proposal = db.query(Proposal).options(
+        joinedload(Proposal.project)
+    ).filter(Proposal.id == proposal_id).first()
+    
+    if not proposal:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Proposal not found"
+        )
+    
+    project = proposal.project
+    if not project or project.owner_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return proposal, project
+
+def _get_owned_proposal_only(db: Session, proposal_id: int, user_id: int) -> Proposal:
+    """
+    Get a proposal and verify ownership without hydrating its Project.
+    Only Project.owner_id is selected alongside the proposal, in the same query.
+    """
+    row = db.query(Proposal, Project.owner_id).outerjoin(
+        Project, Project.id == Proposal.project_id
+    ).filter(Proposal.id == proposal_id).first()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Proposal not found"
+        )
+    
+    proposal, owner_id = row
+    if owner_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return proposal
+
+def _owns_project(db: Session, project_id: int, user_id: int) -> bool:
+    """Check project ownership with a SQL EXISTS instead of loading the Project row."""
+    return db.query(
+        db.query(Project).filter(
+            Project.id == project_id,
+            Project.owner_id == user_id
+        ).exists()
+    ).scalar() is True
+
+def _update_section_counts(proposal: Proposal) -> None:
+    """Recalculate the denormalized word/section counts from the proposal's sections."""
+    proposal.word_count, proposal.section_count = calculate_section_counts(proposal.sections)
+
+def _bulk_update_proposal(db: Session, proposal_id: int, update_data: Dict[str, Any]) -> None:
+    """
+    Apply field updates with a single UPDATE of only the given columns
+    (skips per-attribute ORM instrumentation). Callers commit and refresh.
+    """
+    if "sections" in update_data:
+        update_data["word_count"], update_data["section_count"] = calculate_section_counts(update_data["sections"])
+    if update_data:
+        db.query(Proposal).filter(Proposal.id == proposal_id).update(update_data, synchronize_session=False)
+
+def _export_response(buffer: BytesIO, media_type: str, filename: str) -> StreamingResponse:
+    """Build a download response that streams an in-memory export buffer."""
+    # Same Content-Disposition encoding as FileResponse (RFC 5987 for non-ASCII names)
+    quoted_filename = quote(filename)
+    if quoted_filename != filename:
+        content_disposition = f"attachment; filename*=utf-8''{quoted_filename}"
+    else:
+        content_disposition = f'attachment; filename="{filename}"'
+    
+    buffer.seek(0)
+    return StreamingResponse(
+        iter(lambda: buffer.read(_EXPORT_CHUNK_SIZE), b""),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": content_disposition,
+            "Content-Length": str(buffer.getbuffer().nbytes)
+        }
+    )
+
 @router.post("/save", response_model=ProposalResponse, status_code=status.HTTP_201_CREATED)
-async def save_proposal(
+def save_proposal(
     proposal_data: ProposalCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -39,37 +199,36 @@ async def save_proposal(
     """Save or create a proposal."""
     try:
         # Verify project ownership
-        project = db.query(Project).filter(
-            Project.id == proposal_data.project_id,
-            Project.owner_id == current_user.id
-        ).first()
-        
-        if not project:
+        if not _owns_project(db, proposal_data.project_id, current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Project not found"
             )
         
-        # Check if proposal already exists
-        existing_proposal = db.query(Proposal).filter(
-            Proposal.project_id == proposal_data.project_id
-        ).first()
-        
-        if existing_proposal:
-            # Update existing proposal
-            update_data = proposal_data.model_dump(exclude_unset=True, exclude={"project_id"})
-            for field, value in update_data.items():
-                setattr(existing_proposal, field, value)
-            db.commit()
-            db.refresh(existing_proposal)
-            return existing_proposal
-        else:
-            # Create new proposal
-            new_proposal = Proposal(**proposal_data.model_dump())
-            db.add(new_proposal)
-            db.commit()
-            db.refresh(new_proposal)
-            return new_proposal
+        # Insert or update in one statement (proposals.project_id is unique)
+        insert_data = proposal_data.model_dump()
+        insert_data["word_count"], insert_data["section_count"] = calculate_section_counts(insert_data.get("sections"))
+        
+        # On conflict only overwrite the fields the client actually sent
+        update_data = proposal_data.model_dump(exclude_unset=True, exclude={"project_id"})
+        if "sections" in update_data:
+            update_data["word_count"] = insert_data["word_count"]
+            update_data["section_count"] = insert_data["section_count"]
+        # ON CONFLICT DO UPDATE doesn't apply column onupdate defaults, so stamp it explicitly
+        update_data["updated_at"] = func.timezone("utc", func.now())
+        
+        upsert_stmt = pg_insert(Proposal).values(**insert_data).on_conflict_do_update(
+            index_elements=[Proposal.project_id],
+            set_=update_data
+        ).returning(Proposal)
+        proposal = db.scalars(
+            upsert_stmt,
+            execution_options={"populate_existing": True}
+        ).one()
+        db.commit()
+        db.refresh(proposal)
+        proposal_cache.invalidate_proposal(proposal.id, proposal.project_id)
+        return proposal
     except HTTPException:
         raise
     except Exception as e:
@@ -80,19 +239,19 @@ async def save_proposal(
         )
 
 @router.get("/by-project/{project_id}", response_model=ProposalResponse)
-async def get_proposal_by_project(
+def get_proposal_by_project(
     project_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get proposal for a specific project."""
-    # Verify project ownership
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.owner_id == current_user.id
-    ).first()
+    # Serve from cache when available (already validated and serialized)
+    cached = proposal_cache.get_by_project(project_id, current_user.id)
+    if cached is not None:
+        return JSONResponse(content=cached)
     
-    if not project:
+    # Verify project ownership
+    if not _owns_project(db, project_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
@@ -110,44 +269,27 @@ async def get_proposal_by_project(
         )
     
     # Replace company name placeholders in proposal sections before returning
-    from utils.proposal_utils import replace_company_placeholders
     company_name = current_user.company_name
     if company_name and proposal.sections:
         for section in proposal.sections:
             if isinstance(section, dict) and section.get("content"):
                 section["content"] = replace_company_placeholders(section["content"], company_name)
     
-    return proposal
+    proposal_dict = ProposalResponse.model_validate(proposal).model_dump(mode="json")
+    proposal_cache.set_by_project(project_id, current_user.id, proposal_dict)
+    return proposal_dict
 
 @router.get("/{proposal_id}", response_model=ProposalResponse)
-async def get_proposal(
+def get_proposal(
     proposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific proposal."""
-    proposal = db.query(Proposal).filter(Proposal.id == proposal_id).first()
-    
-    if not proposal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Proposal not found"
-        )
-    
-    # Verify project ownership
-    project = db.query(Project).filter(
-        Project.id == proposal.project_id,
-        Project.owner_id == current_user.id
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    # Fetch proposal and verify ownership (only the owner id is read from Project)
+    proposal = _get_owned_proposal_only(db, proposal_id, current_user.id)
     
     # Replace company name placeholders in proposal sections before returning
-    from utils.proposal_utils import replace_company_placeholders
     company_name = current_user.company_name
     if company_name and proposal.sections:
         for section in proposal.sections:
@@ -157,7 +299,7 @@ async def get_proposal(
     return proposal
 
 @router.put("/{proposal_id}", response_model=ProposalResponse)
-async def update_proposal(
+def update_proposal(
     proposal_id: int,
     proposal_data: ProposalUpdate,
     db: Session = Depends(get_db),
@@ -165,33 +307,16 @@ async def update_proposal(
 ):
     """Update a proposal."""
     try:
-        proposal = db.query(Proposal).filter(Proposal.id == proposal_id).first()
-        
-        if not proposal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Proposal not found"
-            )
-        
-        # Verify project ownership
-        project = db.query(Project).filter(
-            Project.id == proposal.project_id,
-            Project.owner_id == current_user.id
-        ).first()
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+        # Fetch proposal and verify ownership (only the owner id is read from Project)
+        proposal = _get_owned_proposal_only(db, proposal_id, current_user.id)
         
         # Update proposal
         update_data = proposal_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(proposal, field, value)
+        _bulk_update_proposal(db, proposal.id, update_data)
         
         db.commit()
         db.refresh(proposal)
+        proposal_cache.invalidate_proposal(proposal.id, proposal.project_id)
         
         return proposal
     except HTTPException:
@@ -204,7 +329,7 @@ async def update_proposal(
         )
 
 @router.post("/generate", response_model=Dict[str, Any], status_code=status.HTTP_201_CREATED)
-async def generate_proposal(
+def generate_proposal(
     request: ProposalGenerateRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -213,8 +338,11 @@ async def generate_proposal(
     Generate a new proposal from template, optionally populated with insights.
     """
     try:
-        # Verify project ownership
-        project = db.query(Project).filter(
+        # Verify project ownership and load its insights and existing proposal in one round-trip
+        project = db.query(Project).options(
+            joinedload(Project.insights),
+            joinedload(Project.proposals)
+        ).filter(
             Project.id == request.project_id,
             Project.owner_id == current_user.id
         ).first()
@@ -226,17 +354,13 @@ async def generate_proposal(
             )
         
         # Check if proposal already exists
-        existing_proposal = db.query(Proposal).filter(
-            Proposal.project_id == request.project_id
-        ).first()
+        existing_proposal = project.proposals[0] if project.proposals else None
         
         # Get template
         sections = ProposalTemplates.get_template(request.template_type)
 
         # Always try to populate with insights if available
-        insights = db.query(Insights).filter(
-            Insights.project_id == request.project_id
-        ).first()
+        insights = project.insights
 
         if insights:
             # Get matching case studies from insights
@@ -244,8 +368,15 @@ async def generate_proposal(
             
             # If selected_case_study_ids provided, prioritize those
             if request.selected_case_study_ids:
-                from models.case_study import CaseStudy
-                selected_case_studies = db.query(CaseStudy).filter(
+                # Load only the columns materialized into the insights dict
+                selected_case_studies = db.query(CaseStudy).with_entities(
+                    CaseStudy.id,
+                    CaseStudy.title,
+                    CaseStudy.industry,
+                    CaseStudy.impact,
+                    CaseStudy.description,
+                    CaseStudy.project_description
+                ).filter(
                     CaseStudy.id.in_(request.selected_case_study_ids)
                 ).all()
                 matching_case_studies = [
@@ -261,25 +392,16 @@ async def generate_proposal(
                 ]
                 # Also include any from insights that weren't selected (as fallback)
                 if insights.matching_case_studies:
-                    for cs in insights.matching_case_studies:
-                        if cs.get("id") not in request.selected_case_study_ids:
-                            matching_case_studies.append(cs)
+                    selected_ids = set(request.selected_case_study_ids)
+                    matching_case_studies.extend(
+                        cs for cs in insights.matching_case_studies
+                        if cs.get("id") not in selected_ids
+                    )
             elif insights.matching_case_studies:
                 matching_case_studies = insights.matching_case_studies
             elif insights.challenges:
                 # Fallback: Try to get case studies from database based on challenges
-                from models.case_study import CaseStudy
-                all_case_studies = db.query(CaseStudy).limit(5).all()
-                matching_case_studies = [
-                    {
-                        "id": cs.id,
-                        "title": cs.title,
-                        "industry": cs.industry,
-                        "impact": cs.impact,
-                        "description": cs.description
-                    }
-                    for cs in all_case_studies
-                ]
+                matching_case_studies = _fallback_case_studies(db)
             
             insights_dict = {
                 "rfp_summary": insights.executive_summary or "",
@@ -304,7 +426,6 @@ async def generate_proposal(
             )
             
             # Replace company name placeholders in sections
-            from utils.proposal_utils import replace_company_placeholders
             company_name = current_user.company_name
             if company_name and sections:
                 for section in sections:
@@ -339,10 +460,12 @@ async def generate_proposal(
                 sections=sections,
                 template_type=request.template_type
             )
+            _update_section_counts(new_proposal)
             
             db.add(new_proposal)
             db.commit()
             db.refresh(new_proposal)
+            proposal_cache.invalidate_proposal(new_proposal.id, new_proposal.project_id)
             
             # Convert to dict for consistency with regeneration response
             proposal_dict = ProposalResponse.model_validate(new_proposal).model_dump()
@@ -357,7 +480,7 @@ async def generate_proposal(
         )
 
 @router.post("/save-draft", response_model=ProposalResponse)
-async def save_draft(
+def save_draft(
     request: ProposalSaveDraftRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -366,35 +489,19 @@ async def save_draft(
     Save proposal draft (autosave functionality).
     """
     try:
-        proposal = db.query(Proposal).filter(Proposal.id == request.proposal_id).first()
-        
-        if not proposal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Proposal not found"
-            )
-        
-        # Verify project ownership
-        project = db.query(Project).filter(
-            Project.id == proposal.project_id,
-            Project.owner_id == current_user.id
-        ).first()
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+        # Fetch proposal and verify ownership (only the owner id is read from Project)
+        proposal = _get_owned_proposal_only(db, request.proposal_id, current_user.id)
         
         # Update sections
         proposal.sections = request.sections
+        _update_section_counts(proposal)
         
         if request.title:
             proposal.title = request.title
         
-        proposal.updated_at = now_utc_from_ist()
         db.commit()
         db.refresh(proposal)
+        proposal_cache.invalidate_proposal(proposal.id, proposal.project_id)
         
         return proposal
     except HTTPException:
@@ -407,7 +514,7 @@ async def save_draft(
         )
 
 @router.post("/regenerate-section", response_model=Dict[str, Any])
-async def regenerate_section(
+def regenerate_section(
     request: RegenerateSectionRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -415,26 +522,8 @@ async def regenerate_section(
     """
     Regenerate a specific section's content using AI based on insights.
     """
-    # Get proposal
-    proposal = db.query(Proposal).filter(Proposal.id == request.proposal_id).first()
-    
-    if not proposal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Proposal not found"
-        )
-    
-    # Verify project ownership
-    project = db.query(Project).filter(
-        Project.id == proposal.project_id,
-        Project.owner_id == current_user.id
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    # Fetch proposal and verify ownership (only the owner id is read from Project)
+    proposal = _get_owned_proposal_only(db, request.proposal_id, current_user.id)
     
     # Get insights
     insights = db.query(Insights).filter(
@@ -448,27 +537,10 @@ async def regenerate_section(
         )
     
     # Get matching case studies
-    matching_case_studies = []
-    if hasattr(insights, 'matching_case_studies') and insights.matching_case_studies:
-        matching_case_studies = insights.matching_case_studies
-    else:
-        from models.case_study import CaseStudy
-        all_case_studies = db.query(CaseStudy).limit(5).all()
-        matching_case_studies = [
-            {
-                "id": cs.id,
-                "title": cs.title,
-                "industry": cs.industry,
-                "impact": cs.impact,
-                "description": cs.description
-            }
-            for cs in all_case_studies
-        ]
+    matching_case_studies = insights.matching_case_studies or _fallback_case_studies(db)
     
     # Generate new content for the section
     try:
-        from services.proposal_templates import ProposalTemplates
-        
         insights_dict = {
             "rfp_summary": insights.executive_summary or "",
             "challenges": insights.challenges or [],
@@ -485,7 +557,6 @@ async def regenerate_section(
         )
         
         # Replace company name placeholders in new content
-        from utils.proposal_utils import replace_company_placeholders
         company_name = current_user.company_name
         if company_name:
             new_content = replace_company_placeholders(new_content, company_name)
@@ -525,7 +596,7 @@ async def regenerate_section(
         )
 
 @router.post("/accept-regeneration", response_model=Dict[str, Any])
-async def accept_regeneration(
+def accept_regeneration(
     request: AcceptRegenerationRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -536,47 +607,26 @@ async def accept_regeneration(
     For section regeneration, the new_content should be passed in the request body.
     """
     try:
-        proposal = db.query(Proposal).filter(Proposal.id == request.proposal_id).first()
-        
-        if not proposal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Proposal not found"
-            )
-        
-        # Verify project ownership
-        project = db.query(Project).filter(
-            Project.id == proposal.project_id,
-            Project.owner_id == current_user.id
-        ).first()
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+        # Fetch proposal and verify ownership (only the owner id is read from Project)
+        proposal = _get_owned_proposal_only(db, request.proposal_id, current_user.id)
         
         if request.accept:
             # Accept new version
             if request.section_id and request.new_content:
-                # Section regeneration - update specific section with new content
-                sections = proposal.sections or []
-                updated_sections = []
-                for section in sections:
+                # Section regeneration - update specific section with new content in place
+                for section in proposal.sections or []:
                     if isinstance(section, dict) and section.get("id") == request.section_id:
-                        # Update with new content
-                        updated_section = section.copy()
-                        updated_section["content"] = request.new_content
-                        updated_sections.append(updated_section)
-                    else:
-                        updated_sections.append(section)
-                proposal.sections = updated_sections
+                        section["content"] = request.new_content
+                        break
+                # In-place JSON mutations aren't tracked, so mark the column dirty explicitly
+                flag_modified(proposal, "sections")
             elif request.new_sections:
                 # Full proposal regeneration - update all sections
                 proposal.sections = request.new_sections
-            proposal.updated_at = now_utc_from_ist()
+            _update_section_counts(proposal)
             db.commit()
             db.refresh(proposal)
+            proposal_cache.invalidate_proposal(proposal.id, proposal.project_id)
             # Convert proposal to dict for serialization
             proposal_dict = ProposalResponse.model_validate(proposal).model_dump()
             return {
@@ -605,7 +655,7 @@ async def accept_regeneration(
         )
 
 @router.get("/{proposal_id}/preview", response_model=ProposalPreviewResponse)
-async def preview_proposal(
+def preview_proposal(
     proposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -613,69 +663,53 @@ async def preview_proposal(
     """
     Get proposal preview with metadata.
     """
-    proposal = db.query(Proposal).filter(Proposal.id == proposal_id).first()
-    
-    if not proposal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Proposal not found"
-        )
-    
-    # Verify project ownership
-    project = db.query(Project).filter(
-        Project.id == proposal.project_id,
-        Project.owner_id == current_user.id
-    ).first()
+    # Serve from cache when available (already validated and serialized)
+    cached = proposal_cache.get_preview(proposal_id, current_user.id)
+    if cached is not None:
+        return JSONResponse(content=cached)
     
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    # Fetch proposal and verify ownership (only the owner id is read from Project)
+    proposal = _get_owned_proposal_only(db, proposal_id, current_user.id)
     
-    # Calculate word count
-    word_count = 0
     sections = proposal.sections or []
-    for section in sections:
-        content = section.get('content', '') if isinstance(section, dict) else ''
-        word_count += len(content.split())
+    word_count, section_count = proposal.word_count, proposal.section_count
     
-    return ProposalPreviewResponse(
+    # Counts are maintained on write; backfill rows created before the columns existed
+    backfill_counts = word_count is None or section_count is None
+    if backfill_counts:
+        word_count, section_count = calculate_section_counts(sections)
+    
+    preview = ProposalPreviewResponse(
         proposal_id=proposal.id,
         title=proposal.title,
         sections=sections,
         template_type=proposal.template_type,
         word_count=word_count,
-        section_count=len(sections)
+        section_count=section_count
     )
+    
+    if backfill_counts:
+        # Keep updated_at unchanged - this is a derived-data backfill, not a user edit
+        db.query(Proposal).filter(Proposal.id == proposal_id).update({
+            "word_count": word_count,
+            "section_count": section_count,
+            "updated_at": Proposal.updated_at
+        }, synchronize_session=False)
+        db.commit()
+    
+    proposal_cache.set_preview(proposal_id, current_user.id, preview.model_dump(mode="json"))
+    return preview
 
 @router.get("/export/{proposal_id}/pdf")
-async def export_pdf(
+def export_pdf(
     proposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Export proposal as PDF."""
     try:
-        proposal = db.query(Proposal).filter(Proposal.id == proposal_id).first()
-        
-        if not proposal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Proposal not found"
-            )
-        
-        # Verify project ownership
-        project = db.query(Project).filter(
-            Project.id == proposal.project_id,
-            Project.owner_id == current_user.id
-        ).first()
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+        # Fetch proposal with its project and verify ownership in one query
+        proposal, project = _get_owned_proposal(db, proposal_id, current_user.id)
         
         # Export to PDF
         buffer = proposal_exporter.export_pdf(
@@ -686,18 +720,19 @@ async def export_pdf(
             company_name=current_user.company_name
         )
         
-        # Save export
-        file_path = proposal_exporter.save_export(buffer, "pdf", proposal_id)
+        filename = f"{proposal.title.translate(_EXPORT_FILENAME_TABLE)}.pdf"
         
         # Update metadata
         proposal.last_exported_at = now_utc_from_ist()
         proposal.export_format = "pdf"
         db.commit()
+        proposal_cache.invalidate_proposal(proposal_id, project.id)
         
-        return FileResponse(
-            file_path,
+        # Stream the in-memory export directly (no round-trip through disk)
+        return _export_response(
+            buffer,
             media_type="application/pdf",
-            filename=f"{proposal.title.replace(' ', '_')}.pdf"
+            filename=filename
         )
     except HTTPException:
         raise
@@ -709,32 +744,15 @@ async def export_pdf(
         )
 
 @router.get("/export/{proposal_id}/docx")
-async def export_docx(
+def export_docx(
     proposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Export proposal as DOCX."""
     try:
-        proposal = db.query(Proposal).filter(Proposal.id == proposal_id).first()
-        
-        if not proposal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Proposal not found"
-            )
-        
-        # Verify project ownership
-        project = db.query(Project).filter(
-            Project.id == proposal.project_id,
-            Project.owner_id == current_user.id
-        ).first()
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+        # Fetch proposal with its project and verify ownership in one query
+        proposal, project = _get_owned_proposal(db, proposal_id, current_user.id)
         
         # Export to DOCX
         buffer = proposal_exporter.export_docx(
@@ -745,18 +763,19 @@ async def export_docx(
             company_name=current_user.company_name
         )
         
-        # Save export
-        file_path = proposal_exporter.save_export(buffer, "docx", proposal_id)
+        filename = f"{proposal.title.translate(_EXPORT_FILENAME_TABLE)}.docx"
         
         # Update metadata
         proposal.last_exported_at = now_utc_from_ist()
         proposal.export_format = "docx"
         db.commit()
+        proposal_cache.invalidate_proposal(proposal_id, project.id)
         
-        return FileResponse(
-            file_path,
+        # Stream the in-memory export directly (no round-trip through disk)
+        return _export_response(
+            buffer,
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            filename=f"{proposal.title.replace(' ', '_')}.docx"
+            filename=filename
         )
     except HTTPException:
         raise
@@ -768,32 +787,15 @@ async def export_docx(
         )
 
 @router.get("/export/{proposal_id}/pptx")
-async def export_pptx(
+def export_pptx(
     proposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Export proposal as PowerPoint."""
     try:
-        proposal = db.query(Proposal).filter(Proposal.id == proposal_id).first()
-        
-        if not proposal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Proposal not found"
-            )
-        
-        # Verify project ownership
-        project = db.query(Project).filter(
-            Project.id == proposal.project_id,
-            Project.owner_id == current_user.id
-        ).first()
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+        # Fetch proposal with its project and verify ownership in one query
+        proposal, project = _get_owned_proposal(db, proposal_id, current_user.id)
         
         # Export to PPTX
         buffer = proposal_exporter.export_pptx(
@@ -804,18 +806,19 @@ async def export_pptx(
             company_name=current_user.company_name
         )
         
-        # Save export
-        file_path = proposal_exporter.save_export(buffer, "pptx", proposal_id)
+        filename = f"{proposal.title.translate(_EXPORT_FILENAME_TABLE)}.pptx"
         
         # Update metadata
         proposal.last_exported_at = now_utc_from_ist()
         proposal.export_format = "pptx"
         db.commit()
+        proposal_cache.invalidate_proposal(proposal_id, project.id)
         
-        return FileResponse(
-            file_path,
+        # Stream the in-memory export directly (no round-trip through disk)
+        return _export_response(
+            buffer,
             media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            filename=f"{proposal.title.replace(' ', '_')}.pptx"
+            filename=filename
         )
     except HTTPException:
         raise
@@ -828,33 +831,17 @@ async def export_pptx(
 
 
 @router.post("/{proposal_id}/submit", response_model=ProposalResponse)
-async def submit_proposal(
+def submit_proposal(
     proposal_id: int,
     request: ProposalSubmitRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Submit a proposal for approval."""
     try:
-        proposal = db.query(Proposal).filter(Proposal.id == proposal_id).first()
-        
-        if not proposal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Proposal not found"
-            )
-        
-        # Verify ownership
-        project = db.query(Project).filter(
-            Project.id == proposal.project_id,
-            Project.owner_id == current_user.id
-        ).first()
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+        # Fetch proposal with its project and verify ownership in one query
+        proposal, project = _get_owned_proposal(db, proposal_id, current_user.id)
         
         # Check current status - prevent resubmission if already submitted
         if proposal.status == "pending_approval":
@@ -869,102 +856,74 @@ async def submit_proposal(
         proposal.submitted_at = now_utc_from_ist()
         
         # Always send email to all admins (pre_sales_manager role)
-        ADMIN_ROLE = "pre_sales_manager"
+        # Fetch all active admins plus the specifically requested manager in one query
+        managers = db.execute(_managers_stmt(request.manager_id)).scalars().all()
         
-        # Import email service
-        from utils.email_service import send_proposal_submission_email
-        
-        # Get all active admins with verified emails
-        admins = db.query(User).filter(
-            User.role == ADMIN_ROLE,
-            User.is_active == True,
-            User.email_verified == True
-        ).all()
+        # Only verified admins receive emails; the specific manager always gets an in-app notification
+        admins = [manager for manager in managers if manager.email_verified]
         
         if not admins:
-            print(f"[WARNING] No active admins with verified emails found. Email notifications will not be sent for proposal {proposal.id}")
-        
-        # Prepare proposal data for email
-        proposal_sections = proposal.sections if proposal.sections else []
-        from utils.timezone import format_ist
-        submitted_at_str = format_ist(proposal.submitted_at, "%Y-%m-%d %H:%M:%S IST") if proposal.submitted_at else None
-        
-        # Send email and create notification for all admins
-        for admin in admins:
-            # Create in-app notification
-            notification = Notification(
-                user_id=admin.id,
-                type="info",
-                title="New Proposal Submitted",
-                message=f"Proposal '{proposal.title}' submitted by {current_user.full_name}",
-                metadata_={"proposal_id": proposal.id, "project_id": project.id, "submitter_id": current_user.id}
-            )
-            db.add(notification)
-            
-            # Send email notification with all proposal data (non-blocking)
-            import sys
-            try:
-                await send_proposal_submission_email(
-                    manager_email=admin.email,
-                    manager_name=admin.full_name,
-                    proposal_title=proposal.title,
-                    submitter_name=current_user.full_name,
-                    submitter_message=request.message,
-                    proposal_id=proposal.id,
-                    project_id=project.id,
-                    project_name=project.name,
-                    client_name=project.client_name,
-                    industry=project.industry,
-                    region=project.region,
-                    proposal_sections=proposal_sections,
-                    template_type=proposal.template_type,
-                    submitted_at=submitted_at_str
-                )
-            except Exception as e:
-                # Error already logged in email_service with full details
-                print(f"[PROPOSAL SUBMISSION WARNING] Email notification failed for admin: {admin.email}, Proposal ID: {proposal.id}", file=sys.stderr, flush=True)
-        
-        # If a specific manager_id was provided, also send notification to that manager
-        # (in addition to all admins, if not already included)
-        if request.manager_id:
-            specific_manager = db.query(User).filter(
-                User.id == request.manager_id,
-                User.role == ADMIN_ROLE,
-                User.is_active == True
-            ).first()
-            
-            if specific_manager:
-                # Check if this manager is already in the admins list (to avoid duplicate notifications)
-                admin_ids = [admin.id for admin in admins]
-                if specific_manager.id not in admin_ids:
-                    # Create additional notification for specific manager if not already an admin
-                    notification = Notification(
-                        user_id=specific_manager.id,
-                        type="info",
-                        title="New Proposal Submitted",
-                        message=f"Proposal '{proposal.title}' submitted by {current_user.full_name}",
-                        metadata_={"proposal_id": proposal.id, "project_id": project.id, "submitter_id": current_user.id}
-                    )
-                    db.add(notification)
+            logger.warning("No active admins with verified emails found; no email notifications for proposal %s", proposal.id)
+        
+        # Create in-app notifications for all recipients in a single INSERT
+        if managers:
+            notification_message = f"Proposal '{proposal.title}' submitted by {current_user.full_name}"
+            notification_metadata = {"proposal_id": proposal.id, "project_id": project.id, "submitter_id": current_user.id}
+            db.execute(insert(Notification), [
+                {
+                    "user_id": manager.id,
+                    "type": "info",
+                    "title": "New Proposal Submitted",
+                    "message": notification_message,
+                    "metadata_": notification_metadata
+                }
+                for manager in managers
+            ])
+        
+        # Snapshot email data now - ORM instances are expired by commit and detached before background tasks run
+        email_recipients = [(admin.email, admin.full_name) for admin in admins]
+        email_data = {}
+        if email_recipients:
+            email_data = {
+                "proposal_title": proposal.title,
+                "submitter_name": current_user.full_name,
+                "submitter_message": request.message,
+                "proposal_id": proposal.id,
+                "project_id": project.id,
+                "project_name": project.name,
+                "client_name": project.client_name,
+                "industry": project.industry,
+                "region": project.region,
+                "proposal_sections": proposal.sections if proposal.sections else [],
+                "template_type": proposal.template_type,
+                "submitted_at": format_ist(proposal.submitted_at, "%Y-%m-%d %H:%M:%S IST") if proposal.submitted_at else None
+            }
         
         db.commit()
         db.refresh(proposal)
+        proposal_cache.invalidate_proposal(proposal.id, proposal.project_id)
+        proposal_cache.invalidate_analytics()
+        
+        # Send email notifications to all admins after the response is sent
+        if email_recipients:
+            background_tasks.add_task(
+                _send_submission_emails_background,
+                recipients=email_recipients,
+                email_data=email_data
+            )
         
-        # Broadcast proposal submission via WebSocket
-        try:
-            await global_ws_manager.broadcast({
-                "type": "proposal_submitted",
-                "proposal": {
-                    "id": proposal.id,
-                    "project_id": proposal.project_id,
-                    "title": proposal.title,
-                    "status": proposal.status,
-                    "submitted_at": proposal.submitted_at.isoformat() if proposal.submitted_at else None,
-                    "submitter_id": current_user.id
-                }
-            }, subscription_type="proposals")
-        except Exception as e:
-            print(f"Error broadcasting proposal submission: {e}")
+        # Broadcast proposal submission via WebSocket once the response is sent (runs on the event loop)
+        background_tasks.add_task(_broadcast_proposal_submitted, {
+            "type": "proposal_submitted",
+            "proposal": {
+                "id": proposal.id,
+                "project_id": proposal.project_id,
+                "title": proposal.title,
+                "status": proposal.status,
+                "submitted_at": proposal.submitted_at.isoformat() if proposal.submitted_at else None,
+                "submitter_id": current_user.id
+            }
+        })
         
         return proposal
     except HTTPException:
@@ -976,10 +935,56 @@ async def submit_proposal(
             detail=f"Failed to submit proposal: {str(e)}"
         )
 
+# Background email sends retry transient SMTP failures instead of dropping the notification.
+# Quota and configuration errors can't succeed on retry, so they're not retried.
+_send_submission_email_with_retry = async_retry(
+    max_attempts=3,
+    backoff="exponential",
+    base_delay=2.0,
+    exceptions=TRANSIENT_EMAIL_ERRORS
+)(send_proposal_submission_email)
+
+async def _send_submission_emails_background(recipients: List[tuple], email_data: Dict[str, Any]):
+    """Send proposal submission emails to all recipients concurrently (background job)."""
+    results = await asyncio.gather(*[
+        _send_submission_email_with_retry(
+            manager_email=manager_email,
+            manager_name=manager_name,
+            **email_data
+        )
+        for manager_email, manager_name in recipients
+    ], return_exceptions=True)
+    for (manager_email, _), result in zip(recipients, results):
+        if isinstance(result, Exception):
+            # Error already logged in email_service with full details
+            logger.warning(
+                "Proposal submission email failed for admin %s (proposal %s)",
+                manager_email, email_data.get("proposal_id")
+            )
+
+async def _broadcast_proposal_submitted(message: Dict[str, Any]):
+    """Tell proposal subscribers about a submission (background job)."""
+    try:
+        await global_ws_manager.broadcast(message, subscription_type="proposals")
+    except Exception as e:
+        logger.exception("Error broadcasting proposal submission: %s", e)
+
+async def _broadcast_proposal_reviewed(message: Dict[str, Any], owner_id: Optional[int], owner_message: Dict[str, Any]):
+    """Tell proposal subscribers, and the proposal owner, about a review (background job)."""
+    try:
+        await global_ws_manager.broadcast(message, subscription_type="proposals")
+        
+        # Also notify the proposal owner
+        if owner_id:
+            await global_ws_manager.send_to_user(owner_id, owner_message)
+    except Exception as e:
+        logger.exception("Error broadcasting proposal review: %s", e)
+
 @router.post("/{proposal_id}/review", response_model=ProposalResponse)
-async def review_proposal(
+def review_proposal(
     proposal_id: int,
     request: ProposalReviewRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -993,24 +998,27 @@ async def review_proposal(
         )
     
     try:
-        proposal = db.query(Proposal).filter(Proposal.id == proposal_id).first()
+        # Load the proposal with its project owner (the submitter to notify) in one query
+        row = db.query(Proposal, Project.owner_id).outerjoin(
+            Project, Project.id == Proposal.project_id
+        ).filter(Proposal.id == proposal_id).first()
         
-        if not proposal:
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Proposal not found"
             )
+        proposal, owner_id = row
         
         # Validate action
-        ALLOWED_ACTIONS = ["approve", "reject", "hold"]
-        if request.action not in ALLOWED_ACTIONS:
+        if request.action not in _ALLOWED_REVIEW_ACTIONS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid action. Allowed actions: {', '.join(ALLOWED_ACTIONS)}"
+                detail=f"Invalid action. Allowed actions: {_ALLOWED_REVIEW_ACTIONS_STR}"
             )
         
         # Check if proposal is in a reviewable state (can review pending_approval or on_hold proposals)
-        if proposal.status not in ["pending_approval", "on_hold"]:
+        if proposal.status not in _REVIEWABLE_STATUSES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Proposal cannot be reviewed from current status: {proposal.status}. Only pending_approval or on_hold proposals can be reviewed."
@@ -1029,10 +1037,9 @@ async def review_proposal(
         proposal.reviewed_by = current_user.id
         
         # Notify the submitter
-        project = db.query(Project).filter(Project.id == proposal.project_id).first()
-        if project:
+        if owner_id:
             notification = Notification(
-                user_id=project.owner_id,
+                user_id=owner_id,
                 type="success" if request.action == "approve" else "warning",
                 title=f"Proposal {request.action.capitalize()}d",
                 message=f"Your proposal '{proposal.title}' has been {request.action}ed. Feedback: {request.feedback or 'None'}",
@@ -1042,10 +1049,13 @@ async def review_proposal(
         
         db.commit()
         db.refresh(proposal)
+        proposal_cache.invalidate_proposal(proposal.id, proposal.project_id)
+        proposal_cache.invalidate_analytics()
         
-        # Broadcast proposal review via WebSocket
-        try:
-            await global_ws_manager.broadcast({
+        # Broadcast proposal review via WebSocket once the response is sent (runs on the event loop)
+        background_tasks.add_task(
+            _broadcast_proposal_reviewed,
+            {
                 "type": "proposal_reviewed",
                 "proposal": {
                     "id": proposal.id,
@@ -1055,22 +1065,19 @@ async def review_proposal(
                     "reviewed_at": proposal.reviewed_at.isoformat() if proposal.reviewed_at else None,
                     "reviewed_by": proposal.reviewed_by
                 }
-            }, subscription_type="proposals")
-            
-            # Also notify the proposal owner
-            if project:
-                await global_ws_manager.send_to_user(project.owner_id, {
-                    "type": "proposal_reviewed",
-                    "proposal": {
-                        "id": proposal.id,
-                        "title": proposal.title,
-                        "status": proposal.status,
-                        "action": request.action,
-                        "feedback": request.feedback
-                    }
-                })
-        except Exception as e:
-            print(f"Error broadcasting proposal review: {e}")
+            },
+            owner_id,
+            {
+                "type": "proposal_reviewed",
+                "proposal": {
+                    "id": proposal.id,
+                    "title": proposal.title,
+                    "status": proposal.status,
+                    "action": request.action,
+                    "feedback": request.feedback
+                }
+            }
+        )
         
         return proposal
     except HTTPException:
@@ -1083,12 +1090,18 @@ async def review_proposal(
         )
 
 @router.get("/admin/dashboard", response_model=List[ProposalResponse])
-async def admin_dashboard(
-    status: Optional[str] = None,
+def admin_dashboard(
+    response: Response,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get proposals for admin dashboard."""
+    """
+    Get proposals for admin dashboard.
+    Pass limit/offset to page through results; the total is returned in the X-Total-Count header.
+    """
     MANAGER_ROLE = "pre_sales_manager"
     ALLOWED_STATUSES = ["draft", "pending_approval", "approved", "rejected", "on_hold"]
     
@@ -1100,21 +1113,26 @@ async def admin_dashboard(
     
     query = db.query(Proposal)
     
-    if status:
-        if status not in ALLOWED_STATUSES:
+    if status_filter:
+        if status_filter not in ALLOWED_STATUSES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid status. Allowed statuses: {', '.join(ALLOWED_STATUSES)}"
             )
-        query = query.filter(Proposal.status == status)
+        query = query.filter(Proposal.status == status_filter)
+    
+    # Order by submitted_at desc (nulls last); id breaks ties so pages are stable
+    query = query.order_by(desc(Proposal.submitted_at).nullslast(), desc(Proposal.id))
     
-    # Order by submitted_at desc (nulls last)
-    from sqlalchemy import desc
-    proposals = query.order_by(desc(Proposal.submitted_at).nullslast()).all()
+    if limit is not None:
+        response.headers["X-Total-Count"] = str(query.order_by(None).count())
+        query = query.offset(offset).limit(limit)
+    
+    proposals = query.all()
     return proposals
 
 @router.get("/admin/{proposal_id}", response_model=ProposalResponse)
-async def admin_get_proposal(
+def admin_get_proposal(
     proposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1138,8 +1156,32 @@ async def admin_get_proposal(
     
     return proposal
 
+def _proposal_status_rows(db: Session, seven_days_ago: datetime) -> List[tuple]:
+    """
+    (status, count, recent submissions, recent approvals) per proposal status.
+    Read from the mv_proposal_stats materialized view; falls back to a live
+    aggregate if the view isn't available (e.g. migration hasn't run).
+    """
+    try:
+        return db.query(
+            ProposalStats.status,
+            ProposalStats.cnt,
+            ProposalStats.recent_subs,
+            ProposalStats.recent_apprs
+        ).all()
+    except Exception as e:
+        logger.warning("mv_proposal_stats unavailable, using live aggregate: %s", e)
+        db.rollback()
+    
+    return db.query(
+        Proposal.status,
+        func.count(),
+        func.sum(case((Proposal.submitted_at >= seven_days_ago, 1), else_=0)),
+        func.sum(case((and_(Proposal.reviewed_at >= seven_days_ago, Proposal.status == "approved"), 1), else_=0))
+    ).group_by(Proposal.status).all()
+
 @router.get("/admin/analytics")
-async def admin_analytics(
+def admin_analytics(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -1152,107 +1194,95 @@ async def admin_analytics(
             detail="Access denied"
         )
     
-    from sqlalchemy import func, case
-    from models.project import Project
-    from models.insights import Insights
+    # Aggregates are shared by all managers, so serve from cache when fresh
+    cached = proposal_cache.get_analytics()
+    if cached:
+        return cached
+    
+    now = now_utc_from_ist()
+    seven_days_ago = now - timedelta(days=7)
+    
+    # Proposal statistics - per-status counts plus recent activity (last 7 days)
+    status_rows = _proposal_status_rows(db, seven_days_ago)
     
-    # Proposal statistics
-    total_proposals = db.query(func.count(Proposal.id)).scalar() or 0
-    pending_proposals = db.query(func.count(Proposal.id)).filter(Proposal.status == "pending_approval").scalar() or 0
-    approved_proposals = db.query(func.count(Proposal.id)).filter(Proposal.status == "approved").scalar() or 0
-    rejected_proposals = db.query(func.count(Proposal.id)).filter(Proposal.status == "rejected").scalar() or 0
-    on_hold_proposals = db.query(func.count(Proposal.id)).filter(Proposal.status == "on_hold").scalar() or 0
+    status_counts = {row_status: count for row_status, count, _, _ in status_rows}
+    total_proposals = sum(status_counts.values())
+    pending_proposals = status_counts.get("pending_approval", 0)
+    approved_proposals = status_counts.get("approved", 0)
+    rejected_proposals = status_counts.get("rejected", 0)
+    on_hold_proposals = status_counts.get("on_hold", 0)
+    recent_submissions = sum(int(submitted or 0) for _, _, submitted, _ in status_rows)
+    recent_approvals = sum(int(approved or 0) for _, _, _, approved in status_rows)
     
     # Project statistics
-    total_projects = db.query(func.count(Project.id)).scalar() or 0
-    active_projects = db.query(func.count(Project.id)).filter(Project.status.in_(["Active", "Submitted"])).scalar() or 0
+    total_projects, active_projects = db.query(
+        func.count(),
+        func.sum(case((Project.status.in_(["Active", "Submitted"]), 1), else_=0))
+    ).select_from(Project).one()
+    total_projects = total_projects or 0
+    active_projects = int(active_projects or 0)
     
     # User statistics
-    total_analysts = db.query(func.count(User.id)).filter(User.role == "pre_sales_analyst", User.is_active == True).scalar() or 0
-    total_managers = db.query(func.count(User.id)).filter(User.role == MANAGER_ROLE, User.is_active == True).scalar() or 0
+    role_counts = dict(db.query(User.role, func.count()).filter(
+        User.role.in_(["pre_sales_analyst", MANAGER_ROLE]),
+        User.is_active == True
+    ).group_by(User.role).all())
+    total_analysts = role_counts.get("pre_sales_analyst", 0)
+    total_managers = role_counts.get(MANAGER_ROLE, 0)
     
-    # Recent activity (last 7 days)
-    from datetime import date
-    seven_days_ago = now_utc_from_ist() - timedelta(days=7)
-    thirty_days_ago = now_utc_from_ist() - timedelta(days=30)
-    recent_submissions = db.query(func.count(Proposal.id)).filter(
-        Proposal.submitted_at >= seven_days_ago
-    ).scalar() or 0
-    recent_approvals = db.query(func.count(Proposal.id)).filter(
-        Proposal.reviewed_at >= seven_days_ago
-    ).filter(
-        Proposal.status == "approved"
-    ).scalar() or 0
+    # Time-series buckets: calendar days from 30 days ago up to (not including) today
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    window_start = today_start - timedelta(days=30)
+    
+    submitted_day = func.date(Proposal.submitted_at)
+    submissions_by_day = {
+        str(day): count
+        for day, count in db.query(submitted_day, func.count()).filter(
+            Proposal.submitted_at >= window_start,
+            Proposal.submitted_at < today_start
+        ).group_by(submitted_day).all()
+    }
+    
+    reviewed_day = func.date(Proposal.reviewed_at)
+    reviews_by_day = {
+        (str(day), row_status): count
+        for day, row_status, count in db.query(reviewed_day, Proposal.status, func.count()).filter(
+            Proposal.reviewed_at >= window_start,
+            Proposal.reviewed_at < today_start,
+            Proposal.status.in_(["approved", "rejected"])
+        ).group_by(reviewed_day, Proposal.status).all()
+    }
     
     # Time-series data for last 30 days (daily)
     daily_submissions = []
     daily_approvals = []
     for i in range(30):
-        day = now_utc_from_ist() - timedelta(days=30-i)
-        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        submissions_count = db.query(func.count(Proposal.id)).filter(
-            Proposal.submitted_at >= day_start
-        ).filter(
-            Proposal.submitted_at <= day_end
-        ).scalar() or 0
-        
-        approvals_count = db.query(func.count(Proposal.id)).filter(
-            Proposal.reviewed_at >= day_start
-        ).filter(
-            Proposal.reviewed_at <= day_end
-        ).filter(
-            Proposal.status == "approved"
-        ).scalar() or 0
+        day_start = window_start + timedelta(days=i)
+        day_key = day_start.strftime("%Y-%m-%d")
         
         daily_submissions.append({
-            "date": day_start.strftime("%Y-%m-%d"),
+            "date": day_key,
             "label": day_start.strftime("%b %d"),
-            "value": submissions_count
+            "value": submissions_by_day.get(day_key, 0)
         })
         daily_approvals.append({
-            "date": day_start.strftime("%Y-%m-%d"),
+            "date": day_key,
             "label": day_start.strftime("%b %d"),
-            "value": approvals_count
+            "value": reviews_by_day.get((day_key, "approved"), 0)
         })
     
-    # Weekly data (last 4 weeks)
+    # Weekly data (last 4 weeks), summed from the daily buckets
     weekly_data = []
     for i in range(4):
-        week_start = now_utc_from_ist() - timedelta(days=28-i*7)
-        week_end = week_start + timedelta(days=6)
-        week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_end = week_end.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        weekly_submissions = db.query(func.count(Proposal.id)).filter(
-            Proposal.submitted_at >= week_start
-        ).filter(
-            Proposal.submitted_at <= week_end
-        ).scalar() or 0
-        
-        weekly_approvals = db.query(func.count(Proposal.id)).filter(
-            Proposal.reviewed_at >= week_start
-        ).filter(
-            Proposal.reviewed_at <= week_end
-        ).filter(
-            Proposal.status == "approved"
-        ).scalar() or 0
-        
-        weekly_rejections = db.query(func.count(Proposal.id)).filter(
-            Proposal.reviewed_at >= week_start
-        ).filter(
-            Proposal.reviewed_at <= week_end
-        ).filter(
-            Proposal.status == "rejected"
-        ).scalar() or 0
+        week_start = today_start - timedelta(days=28-i*7)
+        week_days = [(week_start + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(7)]
         
         weekly_data.append({
             "week": f"Week {4-i}",
             "label": week_start.strftime("%b %d"),
-            "submissions": weekly_submissions,
-            "approvals": weekly_approvals,
-            "rejections": weekly_rejections
+            "submissions": sum(submissions_by_day.get(day_key, 0) for day_key in week_days),
+            "approvals": sum(reviews_by_day.get((day_key, "approved"), 0) for day_key in week_days),
+            "rejections": sum(reviews_by_day.get((day_key, "rejected"), 0) for day_key in week_days)
         })
     
     # Approval rate
@@ -1261,14 +1291,14 @@ async def admin_analytics(
     
     # Proposals by status (for chart)
     proposals_by_status = {
-        "draft": db.query(func.count(Proposal.id)).filter(Proposal.status == "draft").scalar() or 0,
+        "draft": status_counts.get("draft", 0),
         "pending_approval": pending_proposals,
         "approved": approved_proposals,
         "rejected": rejected_proposals,
         "on_hold": on_hold_proposals,
     }
     
-    return {
+    analytics = {
         "proposals": {
             "total": total_proposals,
             "pending": pending_proposals,
@@ -1297,4 +1327,6 @@ async def admin_analytics(
             "weekly": weekly_data
         }
     }
-
+    
+    proposal_cache.set_analytics(analytics)
+    return analytics
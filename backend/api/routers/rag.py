@@ -2,6 +2,7 @@
 RAG API routes.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from db.database import get_db
 from models.user import User
@@ -190,7 +191,7 @@ async def chat_with_rfp(
     
     # Chat with RFP
     try:
-        result = chat_service.chat(
+        result = await chat_service.chat_async(
             query=request.query,
             project_id=request.project_id,
             conversation_history=request.conversation_history,
@@ -217,6 +218,48 @@ async def chat_with_rfp(
             query=request.query
         )
 
+@router.post("/chat/stream")
+async def chat_with_rfp_stream(
+    request: ChatRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Chat with RFP document using RAG, streaming the answer as plain text while it is generated.
+    """
+    # Verify project ownership
+    project = db.query(Project).filter(
+        Project.id == request.project_id,
+        Project.owner_id == current_user.id
+    ).first()
+    
+    if not project:
+        # Check if project exists but belongs to different user
+        project_exists = db.query(Project).filter(
+            Project.id == request.project_id
+        ).first()
+        
+        if project_exists:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Access denied: Project {request.project_id} does not belong to user {current_user.id}"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Project not found: {request.project_id}"
+            )
+    
+    return StreamingResponse(
+        chat_service.chat_stream(
+            query=request.query,
+            project_id=request.project_id,
+            conversation_history=request.conversation_history,
+            top_k=request.top_k
+        ),
+        media_type="text/plain; charset=utf-8"
+    )
+
 @router.get("/status/{project_id}")
 async def get_rag_status(
     project_id: int,
@@ -4,19 +4,24 @@ Handles proposals, projects, users, notifications, etc.
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Dict
-import json
+from typing import Dict, Tuple
+import asyncio
+import logging
+import orjson
 
 from db.database import SessionLocal
 from models.user import User
 from utils.websocket_manager import global_ws_manager
 from utils.security import decode_token
+from utils.auth_cache import get_cached_token_user, cache_token_user
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
 
 
-def get_user_from_token(token: str, db: Session) -> User:
-    """Extract user from JWT token"""
+def get_user_from_token(token: str, db: Session) -> Tuple[int, str]:
+    """Verify a JWT token and return (user_id, role) of its active user"""
     payload = decode_token(token)
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
@@ -25,17 +30,27 @@ def get_user_from_token(token: str, db: Session) -> User:
     if not user_email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
     
-    user = db.query(User).filter(User.email == user_email).first()
+    user = db.query(User.id, User.role, User.is_active, User.email_verified).filter(User.email == user_email).first()
     if not user or not user.is_active or not user.email_verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
     
-    return user
+    cache_token_user(token, user.id, user.role, payload.get("exp"))
+    return user.id, user.role
+
+
+def _authenticate_token(token: str) -> Tuple[int, str]:
+    """Look up a token's user in a short-lived session (runs in a worker thread)"""
+    db = SessionLocal()
+    try:
+        return get_user_from_token(token, db)
+    finally:
+        db.close()
 
 
 @router.websocket("/system/{user_id}")
 async def system_websocket_endpoint(websocket: WebSocket, user_id: int, token: str = None):
     """WebSocket endpoint for system-wide real-time updates"""
-    db = SessionLocal()
+    current_user_id = None
     
     try:
         # Get token from query params
@@ -46,27 +61,31 @@ async def system_websocket_endpoint(websocket: WebSocket, user_id: int, token: s
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
         
-        # Verify user
-        user = get_user_from_token(token, db)
-        if user.id != user_id:
+        # Verify user (cached tokens skip JWT verification and the DB lookup entirely)
+        cached_user = get_cached_token_user(token)
+        if cached_user:
+            current_user_id, user_role = cached_user
+        else:
+            # Only hold a DB connection for the lookup, and keep the blocking query off the event loop
+            current_user_id, user_role = await asyncio.to_thread(_authenticate_token, token)
+        if current_user_id != user_id:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
         
         # Connect to global manager (this accepts the connection)
-        await global_ws_manager.connect(websocket, user.id)
+        await global_ws_manager.connect(websocket, current_user_id)
         
         # Small delay to ensure connection is fully established
-        import asyncio
         await asyncio.sleep(0.1)
         
         # Send connection confirmation (only if connection is still valid)
         try:
             if websocket.client_state.name == "CONNECTED":
-                await global_ws_manager.send_to_user(user.id, {
+                await global_ws_manager.send_to_user(current_user_id, {
                     "type": "connection",
                     "status": "connected",
-                    "user_id": user.id,
-                    "role": user.role
+                    "user_id": current_user_id,
+                    "role": user_role
                 })
         except Exception as e:
             # Silently handle connection confirmation errors
@@ -80,16 +99,16 @@ async def system_websocket_endpoint(websocket: WebSocket, user_id: int, token: s
                     break
                 
                 data = await websocket.receive_text()
-                message_data = json.loads(data)
+                message_data = orjson.loads(data)
                 message_type = message_data.get("type")
                 
                 if message_type == "subscribe":
                     # Subscribe to specific update types
                     subscription_type = message_data.get("subscription_type", "all")
-                    global_ws_manager.subscribe(user.id, subscription_type)
+                    global_ws_manager.subscribe(current_user_id, subscription_type)
                     # Only send if connection is still valid
                     if websocket.client_state.name == "CONNECTED":
-                        await global_ws_manager.send_to_user(user.id, {
+                        await global_ws_manager.send_to_user(current_user_id, {
                             "type": "subscription",
                             "status": "subscribed",
                             "subscription_type": subscription_type
@@ -98,10 +117,10 @@ async def system_websocket_endpoint(websocket: WebSocket, user_id: int, token: s
                 elif message_type == "unsubscribe":
                     # Unsubscribe from specific update types
                     subscription_type = message_data.get("subscription_type", "all")
-                    global_ws_manager.unsubscribe(user.id, subscription_type)
+                    global_ws_manager.unsubscribe(current_user_id, subscription_type)
                     # Only send if connection is still valid
                     if websocket.client_state.name == "CONNECTED":
-                        await global_ws_manager.send_to_user(user.id, {
+                        await global_ws_manager.send_to_user(current_user_id, {
                             "type": "subscription",
                             "status": "unsubscribed",
                             "subscription_type": subscription_type
@@ -110,13 +129,13 @@ async def system_websocket_endpoint(websocket: WebSocket, user_id: int, token: s
             except WebSocketDisconnect:
                 # Client disconnected, break out of loop
                 break
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 continue
             except Exception as e:
                 error_str = str(e).lower()
                 # Only log non-connection errors to reduce spam
                 if "not connected" not in error_str and "accept" not in error_str:
-                    print(f"Error processing WebSocket message: {e}")
+                    logger.error("Error processing WebSocket message: %s", e)
                 # Check if connection is still open before continuing
                 if not hasattr(websocket, 'client_state') or websocket.client_state.name == "DISCONNECTED":
                     break
@@ -125,16 +144,12 @@ async def system_websocket_endpoint(websocket: WebSocket, user_id: int, token: s
     except WebSocketDisconnect:
         pass  # Already handled in while loop
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.error("WebSocket error: %s", e)
     finally:
         # Clean up connection
         try:
-            global_ws_manager.disconnect(websocket, user.id)
+            if current_user_id is not None:
+                global_ws_manager.disconnect(websocket, current_user_id)
         except:
             pass
-        if db:
-            try:
-                db.close()
-            except:
-                pass
 
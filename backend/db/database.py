@@ -18,12 +18,13 @@ if settings.DB_USE_NULLPOOL:
     # Delegate pooling entirely to PgBouncer (recommended with PgBouncer)
     engine_kwargs["poolclass"] = NullPool
 else:
-    # Use a conservative client-side pool to avoid PgBouncer MaxClients
+    # Client-side pool; lower DB_POOL_SIZE/DB_MAX_OVERFLOW if the server caps connections
     engine_kwargs.update({
         "pool_size": settings.DB_POOL_SIZE,
         "max_overflow": settings.DB_MAX_OVERFLOW,
         "pool_timeout": settings.DB_POOL_TIMEOUT,
         "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
     })
 
 engine = create_engine(settings.DATABASE_URL, **engine_kwargs)
@@ -0,0 +1,76 @@
+"""
+Auto-migration: Create the mv_proposal_stats materialized view if it doesn't exist.
+This runs automatically on server startup.
+
+The view rolls proposals up per status so the admin analytics endpoint reads
+a handful of rows instead of scanning the proposals table.
+"""
+from sqlalchemy import text
+from db.database import engine
+
+def migrate_proposal_stats_view():
+    """Create the proposal stats materialized view and its unique index."""
+    try:
+        with engine.connect() as conn:
+            # Check if proposals table exists
+            table_check = text("""
+                SELECT EXISTS (
+                    SELECT FROM information_schema.tables
+                    WHERE table_schema = 'public'
+                    AND table_name = 'proposals'
+                )
+            """)
+            result = conn.execute(table_check)
+            if not result.scalar():
+                print("⚠ Proposals table does not exist yet. Proposal stats view will be created on next startup.")
+                return
+
+            view_check = text("""
+                SELECT 1 FROM pg_matviews
+                WHERE schemaname = 'public'
+                AND matviewname = 'mv_proposal_stats'
+            """)
+            if conn.execute(view_check).fetchone():
+                print("✓ Proposal stats view already exists")
+                return
+
+            try:
+                # submitted_at/reviewed_at are naive UTC timestamps, so compare against UTC now.
+                # Grouped by the raw status, like the live aggregate (NULL statuses stay their own row).
+                view_query = text("""
+                    CREATE MATERIALIZED VIEW mv_proposal_stats AS
+                    SELECT
+                        status,
+                        COUNT(*) AS cnt,
+                        SUM(CASE WHEN submitted_at >= (now() AT TIME ZONE 'UTC') - interval '7 days' THEN 1 ELSE 0 END) AS recent_subs,
+                        SUM(CASE WHEN reviewed_at >= (now() AT TIME ZONE 'UTC') - interval '7 days' AND status = 'approved' THEN 1 ELSE 0 END) AS recent_apprs
+                    FROM proposals
+                    GROUP BY status
+                """)
+                conn.execute(view_query)
+                # REFRESH ... CONCURRENTLY requires a unique index on the view
+                index_query = text("""
+                    CREATE UNIQUE INDEX ix_mv_proposal_stats_status
+                    ON mv_proposal_stats (status)
+                """)
+                conn.execute(index_query)
+                conn.commit()
+                print("✓ Created materialized view: mv_proposal_stats")
+            except Exception as e:
+                print(f"⚠ Failed to create materialized view mv_proposal_stats: {e}")
+                conn.rollback()
+
+    except Exception as e:
+        print(f"⚠ Proposal stats view migration error: {e}")
+        import traceback
+        traceback.print_exc()
+        # Don't raise - allow server to start even if migration fails
+
+def refresh_proposal_stats_view():
+    """Refresh mv_proposal_stats without blocking readers."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_proposal_stats"))
+            conn.commit()
+    except Exception as e:
+        print(f"[WARNING] Failed to refresh mv_proposal_stats: {e}")
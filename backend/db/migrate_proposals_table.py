@@ -128,6 +128,22 @@ def migrate_proposals_table():
                     print(f"⚠ Failed to add column export_format: {e}")
                     conn.rollback()
             
+            # Add denormalized word/section counts if missing (NULL until next write or preview)
+            for count_column in ('word_count', 'section_count'):
+                if count_column not in existing_columns:
+                    try:
+                        alter_query = text(f"""
+                            ALTER TABLE proposals 
+                            ADD COLUMN {count_column} INTEGER
+                        """)
+                        conn.execute(alter_query)
+                        conn.commit()
+                        print(f"✓ Added column: {count_column}")
+                        added_count += 1
+                    except Exception as e:
+                        print(f"⚠ Failed to add column {count_column}: {e}")
+                        conn.rollback()
+            
             # Fix approval workflow fields - migrate from old names to new names
             if 'approval_status' in existing_columns and 'status' not in existing_columns:
                 try:
@@ -307,6 +323,80 @@ def migrate_proposals_table():
                     print(f"⚠ Failed to add column reviewed_by: {e}")
                     conn.rollback()
             
+            # updated_at is stamped by the database, as naive UTC like created_at
+            updated_at_default = conn.execute(text("""
+                SELECT column_default FROM information_schema.columns 
+                WHERE table_schema = 'public' 
+                AND table_name = 'proposals' 
+                AND column_name = 'updated_at'
+            """)).scalar()
+            if not updated_at_default:
+                try:
+                    alter_query = text("""
+                        ALTER TABLE proposals 
+                        ALTER COLUMN updated_at SET DEFAULT timezone('utc', now())
+                    """)
+                    conn.execute(alter_query)
+                    conn.commit()
+                    print("✓ Set default: updated_at (timezone('utc', now()))")
+                    added_count += 1
+                except Exception as e:
+                    print(f"⚠ Failed to set default for updated_at: {e}")
+                    conn.rollback()
+            
+            # Enforce one proposal per project (required by the upsert in POST /proposal/save)
+            index_check = text("""
+                SELECT 1 FROM pg_indexes 
+                WHERE tablename = 'proposals' 
+                AND indexname = 'ix_proposals_project_id'
+            """)
+            if not conn.execute(index_check).fetchone():
+                try:
+                    # Older databases can hold several proposals per project; keep the most
+                    # recently updated one (highest id on ties) so the index can be built
+                    dedupe_query = text("""
+                        DELETE FROM proposals 
+                        WHERE id IN (
+                            SELECT id FROM (
+                                SELECT id, ROW_NUMBER() OVER (
+                                    PARTITION BY project_id 
+                                    ORDER BY updated_at DESC NULLS LAST, id DESC
+                                ) AS rn 
+                                FROM proposals 
+                                WHERE project_id IS NOT NULL
+                            ) ranked 
+                            WHERE rn > 1
+                        )
+                    """)
+                    removed = conn.execute(dedupe_query).rowcount
+                    if removed:
+                        print(f"✓ Removed {removed} duplicate proposal(s) (kept the newest per project)")
+                    index_query = text("""
+                        CREATE UNIQUE INDEX ix_proposals_project_id 
+                        ON proposals (project_id)
+                    """)
+                    conn.execute(index_query)
+                    conn.commit()
+                    print("✓ Added unique index: ix_proposals_project_id")
+                except Exception as e:
+                    print(f"⚠ Failed to add unique index on proposals.project_id: {e}")
+                    conn.rollback()
+            
+            # Indexes for admin dashboard/analytics filters (create_all doesn't add them to existing tables)
+            analytics_indexes = [
+                ("ix_proposals_status", "ON proposals (status)"),
+                ("ix_proposals_submitted_at", "ON proposals (submitted_at DESC)"),
+                ("ix_proposals_reviewed_at_approved", "ON proposals (reviewed_at DESC) WHERE status = 'approved'"),
+                ("ix_projects_status", "ON projects (status)"),
+            ]
+            for index_name, index_definition in analytics_indexes:
+                try:
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} {index_definition}"))
+                    conn.commit()
+                except Exception as e:
+                    print(f"⚠ Failed to add index {index_name}: {e}")
+                    conn.rollback()
+            
             if added_count > 0:
                 print(f"✓ Migration complete: Updated {added_count} column(s) in proposals table")
             else:
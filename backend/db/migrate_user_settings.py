@@ -67,6 +67,34 @@ def migrate_user_settings():
                         print(f"⚠ Failed to add column {column_name}: {e}")
                         conn.rollback()
             
+            # Index for admin analytics active-user counts per role
+            try:
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_role_is_active ON users (role, is_active)"))
+                conn.commit()
+            except Exception as e:
+                print(f"⚠ Failed to add index ix_users_role_is_active: {e}")
+                conn.rollback()
+            
+            # Partial index for the active, verified manager lookup on proposal submission
+            index_check = text("""
+                SELECT 1 FROM pg_indexes 
+                WHERE tablename = 'users' 
+                AND indexname = 'ix_users_active_verified_role'
+            """)
+            if not conn.execute(index_check).fetchone():
+                try:
+                    index_query = text("""
+                        CREATE INDEX ix_users_active_verified_role 
+                        ON users (role) 
+                        WHERE is_active AND email_verified
+                    """)
+                    conn.execute(index_query)
+                    conn.commit()
+                    print("✓ Added partial index: ix_users_active_verified_role")
+                except Exception as e:
+                    print(f"⚠ Failed to add partial index on users.role: {e}")
+                    conn.rollback()
+            
             if added_count > 0:
                 print(f"✓ Migration complete: Added {added_count} column(s) to users table")
             else:
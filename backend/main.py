@@ -1,14 +1,14 @@
 from fastapi import FastAPI, Request, status, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
-from starlette.middleware.base import BaseHTTPMiddleware
-import sys
 import warnings
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 # Suppress langchain warnings
@@ -23,6 +23,17 @@ from api.routers import (
 from db.database import engine, Base
 from utils.config import settings
 
+logging.basicConfig(
+    level=settings.LOG_LEVEL.upper(),
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+)
+# Handlers write from a listener thread; log calls only enqueue the record, so they never block the event loop
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, *logging.root.handlers, respect_handler_level=True)
+logging.root.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+logger = logging.getLogger(__name__)
+
 # Import models so SQLAlchemy registers them
 from models import (
     User, Project, RFPDocument, Insights,
@@ -35,13 +46,6 @@ try:
 except ImportError:
     pass
 
-# Request logging middleware
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        return response
-
-
 # Lifespan events: database init + services init
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -55,61 +59,111 @@ async def lifespan(app: FastAPI):
             # Quick connection test
             with engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
+            
+            if not settings.RUN_MIGRATIONS_ON_STARTUP:
+                logger.info("Skipping table creation and migrations (RUN_MIGRATIONS_ON_STARTUP=false)")
+                return
+            
             Base.metadata.create_all(bind=engine)
-            print("[OK] Database tables created/verified")
+            logger.info("Database tables created/verified")
             
             # Run migrations
             from db.migrate_user_settings import migrate_user_settings
             from db.migrate_notifications import migrate_notifications
             from db.migrate_case_studies import migrate_case_studies
             from db.migrate_proposals_table import migrate_proposals_table
+            from db.migrate_proposal_stats_view import migrate_proposal_stats_view
             try:
                 from db.migrate_chat_tables import migrate_chat_tables
                 migrate_chat_tables()
             except Exception as e:
-                print(f"[WARNING] Chat tables migration check failed: {e}")
+                logger.warning("Chat tables migration check failed: %s", e)
 
             migrate_user_settings()
             migrate_notifications()
             migrate_case_studies()
             migrate_proposals_table()
+            migrate_proposal_stats_view()
         except Exception as e:
-            print(f"[WARNING] Database initialization failed: {e}")
-            print("[INFO] Server will continue - database operations may fail until connection is available")
+            logger.warning("Database initialization failed: %s", e)
+            logger.info("Server will continue - database operations may fail until connection is available")
     
-    # Run database init in executor with timeout
     loop = asyncio.get_running_loop()
-    try:
-        await asyncio.wait_for(
-            loop.run_in_executor(None, create_tables),
-            timeout=15.0
-        )
-    except asyncio.TimeoutError:
-        print("[WARNING] Database initialization timed out after 15 seconds")
-        print("[INFO] Server will continue - check database connection and DATABASE_URL in .env")
-    except asyncio.CancelledError:
-        # If cancelled during startup, re-raise to allow proper cleanup
-        print("[INFO] Startup cancelled by user")
-        raise
-    except Exception as e:
-        print(f"[WARNING] Database initialization error: {e}")
-
+    
+    # Run database init in executor with timeout
+    async def init_database():
+        try:
+            await asyncio.wait_for(
+                loop.run_in_executor(None, create_tables),
+                timeout=15.0
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Database initialization timed out after 15 seconds")
+            logger.info("Server will continue - check database connection and DATABASE_URL in .env")
+        except Exception as e:
+            logger.warning("Database initialization error: %s", e)
+    
     # Service check logs - run quickly, don't block
     # Note: Services are initialized on import, but we check availability here
-    try:
+    def check_gemini():
         from utils.gemini_service import gemini_service
         if gemini_service.is_available():
-            print(f"[OK] Gemini ready: {settings.GEMINI_MODEL}")
+            logger.info("Gemini ready: %s", settings.GEMINI_MODEL)
         else:
-            print("[WARNING] Gemini service not available - check GEMINI_API_KEY in .env")
-    except Exception as e:
-        print(f"[WARNING] Gemini service failed: {e}")
+            logger.warning("Gemini service not available - check GEMINI_API_KEY in .env")
+    
+    def check_vector_store():
+        from rag.vector_store import vector_store_manager
+        if vector_store_manager.is_available():
+            logger.info("Vector store ready: %s", settings.VECTOR_DB_TYPE)
+        else:
+            logger.warning("Vector store not available - RAG search will be disabled")
+    
+    # DB init and service checks are independent, so run them concurrently (startup = slowest, not sum)
+    try:
+        _, gemini_result, vector_store_result = await asyncio.gather(
+            init_database(),
+            asyncio.to_thread(check_gemini),
+            asyncio.to_thread(check_vector_store),
+            return_exceptions=True
+        )
+    except asyncio.CancelledError:
+        # If cancelled during startup, re-raise to allow proper cleanup
+        logger.info("Startup cancelled by user")
+        raise
+    if isinstance(gemini_result, Exception):
+        logger.warning("Gemini service failed: %s", gemini_result)
+    if isinstance(vector_store_result, Exception):
+        logger.warning("Vector store check failed: %s", vector_store_result)
 
     # RAG services are imported lazily to avoid blocking startup
     # They will be initialized when first accessed
-    print("[INFO] RAG services will be initialized on first use")
+    logger.info("RAG services will be initialized on first use")
+    
+    # Warm the embedding model in the background so the first RAG request doesn't pay for the load
+    def warm_embedding_model():
+        try:
+            from rag.embedding_service import embedding_service
+            embedding_service.is_available()
+        except Exception as e:
+            logger.warning("Embedding model warm-up failed: %s", e)
+    
+    loop.run_in_executor(None, warm_embedding_model)
+
+    # Keep the admin analytics materialized view fresh in the background
+    async def refresh_proposal_stats_periodically():
+        from db.migrate_proposal_stats_view import refresh_proposal_stats_view
+        while True:
+            await asyncio.sleep(settings.PROPOSAL_STATS_REFRESH_SECONDS)
+            await loop.run_in_executor(None, refresh_proposal_stats_view)
+    
+    stats_refresh_task = asyncio.create_task(refresh_proposal_stats_periodically())
+    
+    # Queue outbound emails and deliver them in batches over pooled SMTP connections
+    from utils.email_service import EMAIL_DRAIN_TIMEOUT_SECONDS, email_sender_worker
+    email_sender_task = asyncio.create_task(email_sender_worker())
 
-    print("[INFO] Startup complete - server ready to accept requests")
+    logger.info("Startup complete - server ready to accept requests")
     
     # Startup complete, yield control
     try:
@@ -119,18 +173,31 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         # Shutdown cleanup - handle cancellation gracefully
+        stats_refresh_task.cancel()
+        # Let the email sender flush queued mail before the loop goes away (bounded, in case the
+        # cancellation races a queue get and the worker keeps running)
+        email_sender_task.cancel()
+        await asyncio.wait({email_sender_task}, timeout=EMAIL_DRAIN_TIMEOUT_SECONDS + 5)
+        from utils.gemini_service import gemini_service
+        await gemini_service.aclose()
+        from utils.llm_factory import aclose_http_clients
+        await aclose_http_clients()
         try:
-            print("[INFO] Shutting down...")
+            logger.info("Shutting down...")
         except (asyncio.CancelledError, KeyboardInterrupt):
             # Suppress cancellation errors during shutdown
             pass
+        # Flush queued log records
+        _log_listener.stop()
 
 
 app = FastAPI(
     title="NovaIntel API",
     description="AI-powered presales platform backend API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson serializes large JSON payloads (e.g. proposal sections) much faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
 # -----------------------------------------------------
@@ -152,9 +219,6 @@ app.add_middleware(
     allowed_hosts=settings.allowed_hosts_list
 )
 
-# Logging middleware
-app.add_middleware(LoggingMiddleware)
-
 
 # -----------------------------------------------------
 # HTTP EXCEPTION HANDLER (for 400, 401, 403, 404, etc.)
@@ -170,7 +234,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         "Access-Control-Allow-Headers": "*",
     }
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
         headers={**cors_headers, **(exc.headers or {})}
@@ -179,11 +243,16 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 # -----------------------------------------------------
 # VALIDATION ERROR HANDLER
 # -----------------------------------------------------
+def _error_field(loc) -> str:
+    """Dotted field path of a validation error, without the leading "body" segment."""
+    return ".".join([str(x) for x in loc if x != "body"])
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = [
         {
-            "field": ".".join(str(x) for x in e["loc"] if x != "body"),
+            "field": _error_field(e["loc"]),
             "message": e["msg"],
             "type": e["type"],
         }
@@ -199,7 +268,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         "Access-Control-Allow-Headers": "*",
     }
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "Validation error",
@@ -215,7 +284,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
 
-    logging.error(f"Unhandled Exception: {str(exc)}", exc_info=True)
+    logger.error("Unhandled Exception: %s", exc, exc_info=True)
 
     # Explicitly add CORS headers to ensure they're present even on errors
     origin = request.headers.get("origin")
@@ -226,7 +295,7 @@ async def global_exception_handler(request: Request, exc: Exception):
         "Access-Control-Allow-Headers": "*",
     }
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "detail": "Internal server error",
@@ -262,7 +331,7 @@ upload_dir.mkdir(parents=True, exist_ok=True)
 try:
     app.mount("/uploads", StaticFiles(directory=str(upload_dir)), name="uploads")
 except Exception as e:
-    print(f"[WARNING] Could not mount static files: {e}")
+    logger.warning("Could not mount static files: %s", e)
 
 @app.get("/")
 async def root():
@@ -28,7 +28,7 @@ class Project(Base):
     region = Column(String, nullable=False)
     project_type = Column(SQLEnum(ProjectType), default=ProjectType.NEW)
     description = Column(Text, nullable=True)
-    status = Column(SQLEnum(ProjectStatus), default=ProjectStatus.DRAFT)
+    status = Column(SQLEnum(ProjectStatus), default=ProjectStatus.DRAFT, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=now_utc_from_ist)
     updated_at = Column(DateTime, default=now_utc_from_ist, onupdate=now_utc_from_ist)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, String, JSON
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, String, JSON, Index, text
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db.database import Base
@@ -8,7 +9,7 @@ class Proposal(Base):
     __tablename__ = "proposals"
     
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, unique=True, index=True)  # One proposal per project
     title = Column(String, nullable=False, default="Proposal")
     
     # Sections stored as JSON array of {id, title, content}
@@ -17,21 +18,36 @@ class Proposal(Base):
     # Template type
     template_type = Column(String, default="full")  # executive, full, one-page
     
+    # Denormalized section stats (recalculated whenever sections are written)
+    word_count = Column(Integer, nullable=True)
+    section_count = Column(Integer, nullable=True)
+    
     # Export metadata
     last_exported_at = Column(DateTime, nullable=True)
     export_format = Column(String, nullable=True)  # pdf, docx
     
     created_at = Column(DateTime, default=now_utc_from_ist)
-    updated_at = Column(DateTime, default=now_utc_from_ist, onupdate=now_utc_from_ist)
+    # Stamped by the database, as naive UTC like created_at and the other timestamps
+    updated_at = Column(DateTime, server_default=func.timezone("utc", func.now()), onupdate=func.timezone("utc", func.now()))
     
     # Relationships
     project = relationship("Project", back_populates="proposals")
 
     # Approval Workflow
-    status = Column(String, default="draft")  # draft, pending_approval, approved, rejected, on_hold
+    status = Column(String, default="draft", index=True)  # draft, pending_approval, approved, rejected, on_hold
     submitter_message = Column(Text, nullable=True)
     admin_feedback = Column(Text, nullable=True)
     submitted_at = Column(DateTime, nullable=True)
     reviewed_at = Column(DateTime, nullable=True)
     reviewed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
-
+    
+    __table_args__ = (
+        # Admin dashboard ordering and analytics submission windows
+        Index("ix_proposals_submitted_at", submitted_at.desc()),
+        # Analytics approval windows
+        Index(
+            "ix_proposals_reviewed_at_approved",
+            reviewed_at.desc(),
+            postgresql_where=text("status = 'approved'")
+        ),
+    )
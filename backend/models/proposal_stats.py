@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import declarative_base
+
+# Separate metadata so Base.metadata.create_all() never creates a table over the view.
+# The view itself is created by db/migrate_proposal_stats_view.py.
+ViewBase = declarative_base()
+
+class ProposalStats(ViewBase):
+    """Read-only mapping of the mv_proposal_stats materialized view (one row per proposal status)."""
+    __tablename__ = "mv_proposal_stats"
+
+    status = Column(String, primary_key=True)
+    cnt = Column(Integer, nullable=False)
+    recent_subs = Column(Integer, nullable=False)  # Submitted in the 7 days before the last refresh
+    recent_apprs = Column(Integer, nullable=False)  # Approved in the 7 days before the last refresh
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db.database import Base
@@ -31,4 +31,15 @@ class User(Base):
     # Relationships
     projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan")
     notifications = relationship("Notification", back_populates="user", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Admin analytics counts active users per role
+        Index("ix_users_role_is_active", "role", "is_active"),
+        # Partial index for the active, verified manager lookup on proposal submission
+        Index(
+            "ix_users_active_verified_role",
+            "role",
+            postgresql_where=text("is_active AND email_verified")
+        ),
+    )
 
@@ -0,0 +1,219 @@
+"""
+Corpus-wide BM25 statistics (document frequencies and average chunk length).
+Updated at ingest time and persisted next to the Chroma store, so hybrid search can
+score retrieved chunks with corpus IDF instead of building a BM25 index per query.
+"""
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import orjson
+
+from utils.config import settings
+
+# Okapi BM25 parameters (the usual k1/b defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizer shared by ingest and query time (must match on both sides)."""
+    return text.lower().split()
+
+
+def _stats_path() -> Path:
+    """Stats live alongside the Chroma data they describe."""
+    chroma_path = Path(settings.CHROMA_PERSIST_DIR)
+    if not chroma_path.is_absolute():
+        chroma_path = Path(__file__).parent.parent / chroma_path
+    return chroma_path / "bm25_stats.json"
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive lock on a sidecar file, held across processes (uvicorn workers, ingest jobs)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class CorpusBM25Stats:
+    """
+    Document count, total token count and per-term document frequency of every indexed chunk.
+
+    The JSON file is the source of truth shared by all processes: writers merge their deltas into
+    it under a file lock, and readers re-load it whenever its mtime changes.
+    """
+
+    def __init__(self):
+        self.doc_count = 0
+        self.total_length = 0
+        self.doc_freq: Dict[str, int] = {}
+        self._loaded = False
+        self._mtime: Optional[int] = None  # mtime_ns of the file the counters were read from
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mtime_of(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read(path: Path) -> Dict:
+        """Persisted stats, or empty ones if there are none yet."""
+        data = {"doc_count": 0, "total_length": 0, "doc_freq": {}}
+        try:
+            if path.exists():
+                data.update(orjson.loads(path.read_bytes()))
+        except Exception as e:
+            print(f"[WARNING] Failed to load BM25 corpus stats: {e}")
+        return data
+
+    def _apply(self, data: Dict, mtime: Optional[int]):
+        """Adopt stats read from (or just written to) the file (caller holds the lock)."""
+        self.doc_count = data["doc_count"]
+        self.total_length = data["total_length"]
+        self.doc_freq = data["doc_freq"]
+        self._mtime = mtime
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        """Read persisted stats on first use, and again whenever another process has rewritten them."""
+        path = _stats_path()
+        mtime = self._mtime_of(path)
+        if self._loaded and mtime == self._mtime:
+            return
+        with self._lock:
+            if self._loaded and mtime == self._mtime:
+                return
+            self._apply(self._read(path), mtime)
+
+    @staticmethod
+    def _write(path: Path, data: Dict):
+        """Write stats atomically (caller holds the file lock)."""
+        try:
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(orjson.dumps(data))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[WARNING] Failed to save BM25 corpus stats: {e}")
+
+    def _update_file(self, update):
+        """Re-read the file, apply update() to it and write it back, all under the file lock."""
+        path = _stats_path()
+        with self._lock, _file_lock(path.with_suffix(".lock")):
+            data = update(self._read(path))
+            self._write(path, data)
+            self._apply(data, self._mtime_of(path))
+
+    def is_available(self) -> bool:
+        """True once at least one chunk has been indexed with stats."""
+        self._ensure_loaded()
+        return self.doc_count > 0
+
+    def add_documents(self, texts: List[str]):
+        """Count newly indexed chunks into the corpus stats."""
+        if not texts:
+            return
+        total_length = 0
+        doc_freq: Counter = Counter()
+        for text in texts:
+            tokens = tokenize(text)
+            total_length += len(tokens)
+            doc_freq.update(set(tokens))
+
+        def merge(data: Dict) -> Dict:
+            # Deltas go into the latest file contents, so concurrent writers don't overwrite each other
+            data["doc_count"] += len(texts)
+            data["total_length"] += total_length
+            merged = data["doc_freq"]
+            for term, count in doc_freq.items():
+                merged[term] = merged.get(term, 0) + count
+            return data
+
+        self._update_file(merge)
+
+    def reset(self):
+        """Forget all stats (the collection was recreated)."""
+        self._update_file(lambda data: {"doc_count": 0, "total_length": 0, "doc_freq": {}})
+
+    def score(self, query: str, texts: List[str]) -> Optional[np.ndarray]:
+        """
+        BM25 scores of texts for the query using corpus-wide IDF and average length.
+
+        Returns:
+            One score per text, or None if no corpus stats are available
+        """
+        if not self.is_available():
+            return None
+
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms or not texts:
+            return np.zeros(len(texts))
+
+        term_counts = [Counter(tokenize(text)) for text in texts]
+        doc_len = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float64)
+        idf = _idf(query_terms, self.doc_freq, self.doc_count)
+        return _bm25(_tf_matrix(term_counts, query_terms), doc_len, idf, self.total_length / self.doc_count)
+
+
+class LocalBM25:
+    """BM25 over a small document set (e.g. the retrieved results) when no corpus stats exist yet."""
+
+    def __init__(self, texts: List[str]):
+        self.term_counts = [Counter(tokenize(text)) for text in texts]
+        self.doc_len = np.array([sum(counts.values()) for counts in self.term_counts], dtype=np.float64)
+        self.avg_len = float(self.doc_len.mean()) if len(texts) else 0.0
+        self.doc_freq: Counter = Counter()
+        for counts in self.term_counts:
+            self.doc_freq.update(counts.keys())
+
+    def get_scores(self, query_terms: List[str]) -> np.ndarray:
+        """One BM25 score per document for the (tokenized) query."""
+        query_terms = list(dict.fromkeys(query_terms))
+        if not query_terms or not self.term_counts:
+            return np.zeros(len(self.term_counts))
+        idf = _idf(query_terms, self.doc_freq, len(self.term_counts))
+        return _bm25(_tf_matrix(self.term_counts, query_terms), self.doc_len, idf, self.avg_len)
+
+
+def _idf(query_terms: List[str], doc_freq: Dict[str, int], doc_count: int) -> np.ndarray:
+    """Lucene-style IDF, always positive; unseen terms count as df=0."""
+    df = np.array([doc_freq.get(t, 0) for t in query_terms], dtype=np.float64)
+    return np.log1p((doc_count - df + 0.5) / (df + 0.5))
+
+
+def _tf_matrix(term_counts: List[Counter], query_terms: List[str]) -> np.ndarray:
+    """Term frequencies of the query terms only: (docs x query terms)."""
+    return np.array([[counts.get(t, 0) for t in query_terms] for counts in term_counts], dtype=np.float64)
+
+
+def _bm25(tf: np.ndarray, doc_len: np.ndarray, idf: np.ndarray, avg_len: float) -> np.ndarray:
+    """Okapi BM25 for every document at once: one elementwise pass and a matrix-vector product."""
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / (avg_len or 1.0))
+    return (tf * (BM25_K1 + 1) / (tf + norm[:, None])) @ idf
+
+
+# Global instance
+corpus_bm25_stats = CorpusBM25Stats()
@@ -1,8 +1,9 @@
 """
 Chat service for RAG-based conversations with RFP documents.
 """
+import asyncio
 import hashlib
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from rag.retriever import retriever
 from utils.config import settings
 from utils.gemini_service import gemini_service
@@ -38,19 +39,19 @@ class ChatService:
         return hashlib.md5(conv_str.encode()).hexdigest()[:16]
     
 
-    # -------------------------------------------------------------------------
-    #                               CHAT METHOD
-    # -------------------------------------------------------------------------
-    def chat(
+    def _prepare(
         self,
         query: str,
         project_id: int,
-        conversation_history: Optional[List[Dict[str, str]]] = None,
-        top_k: int = 5,
-        use_cache: bool = True
-    ) -> Dict[str, Any]:
+        conversation_history: Optional[List[Dict[str, str]]],
+        top_k: int,
+        use_cache: bool
+    ) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, str]], List[Dict[str, Any]]]:
         """
-        Chat with RFP document using RAG with caching.
+        Cache lookup, retrieval and prompt building (everything before the LLM call).
+        
+        Returns:
+            (final response if no LLM call is needed, LLM messages, sources)
         """
 
         if not self.is_available():
@@ -61,14 +62,14 @@ class ChatService:
                 'sources': [],
                 'context_used': 0,
                 'query': query
-            }
+            }, [], []
 
         # Check cache first
         if use_cache:
             conv_hash = self._hash_conversation(conversation_history)
             cached_response = self.cache.get_chat_response(query, project_id, conv_hash)
             if cached_response is not None:
-                return cached_response
+                return cached_response, [], []
 
         # ------------------------------
         # Retrieve context chunks
@@ -83,7 +84,7 @@ class ChatService:
                 'sources': [],
                 'context_used': 0,
                 'query': query
-            }
+            }, [], []
 
         context_parts = []
         sources = []
@@ -157,50 +158,136 @@ INSTRUCTIONS:
                 })
 
         messages.append({"role": "user", "content": user_prompt})
+        return None, messages, sources
 
-        # ------------------------------
-        # Call Gemini
-        # ------------------------------
-        try:
-            result = self.service.chat(messages, temperature=0.1)
-
-            if result.get("error"):
-                return {
-                    'success': False,
-                    'error': result["error"],
-                    'answer': None,
-                    'sources': sources,
-                    'context_used': len(nodes),
-                    'query': query
-                }
-
-            answer = result.get("content", "")
-
-            response = {
-                'success': True,
-                'answer': answer,
-                'sources': sources,
-                'context_used': len(nodes),
-                'query': query
-            }
-            
-            # Cache response
-            if use_cache:
-                conv_hash = self._hash_conversation(conversation_history)
-                self.cache.set_chat_response(query, project_id, conv_hash, response)
-            
-            return response
-
-        except Exception as e:
+    def _finish(
+        self,
+        result: Dict[str, Any],
+        query: str,
+        project_id: int,
+        conversation_history: Optional[List[Dict[str, str]]],
+        sources: List[Dict[str, Any]],
+        use_cache: bool
+    ) -> Dict[str, Any]:
+        """Turn the LLM result into the chat response and cache it."""
+        if result.get("error"):
             return {
                 'success': False,
-                'error': f"Error generating response: {str(e)}",
+                'error': result["error"],
                 'answer': None,
                 'sources': sources,
-                'context_used': len(nodes),
+                'context_used': len(sources),
                 'query': query
             }
 
+        response = {
+            'success': True,
+            'answer': result.get("content", ""),
+            'sources': sources,
+            'context_used': len(sources),
+            'query': query
+        }
+        
+        # Cache response
+        if use_cache:
+            conv_hash = self._hash_conversation(conversation_history)
+            self.cache.set_chat_response(query, project_id, conv_hash, response)
+        
+        return response
+
+    def _error_response(self, error: Exception, query: str, sources: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': f"Error generating response: {str(error)}",
+            'answer': None,
+            'sources': sources,
+            'context_used': len(sources),
+            'query': query
+        }
+
+    # -------------------------------------------------------------------------
+    #                               CHAT METHOD
+    # -------------------------------------------------------------------------
+    def chat(
+        self,
+        query: str,
+        project_id: int,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        top_k: int = 5,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Chat with RFP document using RAG with caching.
+        """
+        response, messages, sources = self._prepare(query, project_id, conversation_history, top_k, use_cache)
+        if response is not None:
+            return response
+
+        try:
+            result = self.service.chat(messages, temperature=0.1)
+            return self._finish(result, query, project_id, conversation_history, sources, use_cache)
+        except Exception as e:
+            return self._error_response(e, query, sources)
+
+    async def chat_async(
+        self,
+        query: str,
+        project_id: int,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        top_k: int = 5,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async chat for request handlers: retrieval runs in a worker thread and the Gemini call
+        is awaited on the pooled async client, so the event loop is never blocked.
+        """
+        response, messages, sources = await asyncio.to_thread(
+            self._prepare, query, project_id, conversation_history, top_k, use_cache
+        )
+        if response is not None:
+            return response
+
+        try:
+            result = await self.service.chat_async(messages, temperature=0.1)
+            return self._finish(result, query, project_id, conversation_history, sources, use_cache)
+        except Exception as e:
+            return self._error_response(e, query, sources)
+
+
+    async def chat_stream(
+        self,
+        query: str,
+        project_id: int,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        top_k: int = 5,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Stream the answer text as Gemini generates it. Cache hits and early failures (no context,
+        service unavailable) are yielded as a single chunk; a failure mid-stream ends the body with
+        the error message. The full answer is cached only once the stream completes with content.
+        """
+        response, messages, sources = await asyncio.to_thread(
+            self._prepare, query, project_id, conversation_history, top_k, use_cache
+        )
+        if response is not None:
+            yield response.get('answer') or response.get('error') or ""
+            return
+
+        chunks = []
+        try:
+            async for text in self.service.stream_chat(messages, temperature=0.1):
+                chunks.append(text)
+                yield text
+        except Exception as e:
+            # The 200 is already sent: end the body with the error instead of silently truncating it
+            yield ("\n\n" if chunks else "") + self._error_response(e, query, sources)['error']
+            return
+        if not chunks:
+            # Nothing generated (e.g. a safety block) - report it rather than caching an empty answer
+            yield "Error generating response: the model returned no content"
+            return
+        self._finish({"content": "".join(chunks)}, query, project_id, conversation_history, sources, use_cache)
 
 # Global instance
 chat_service = ChatService()
@@ -1,19 +1,64 @@
 """
 Embedding generation service using OpenAI (recommended) or Hugging Face (free fallback).
 """
-from typing import List, Optional
+import logging
+import threading
+from typing import Dict, List, Optional
 from utils.config import settings
 from services.cache.rag_cache import rag_cache
 
+logger = logging.getLogger(__name__)
+
 class EmbeddingService:
     """Service for generating embeddings with caching. Supports OpenAI and HuggingFace."""
     
-    def __init__(self):
+    # Texts per request for OpenAI (the API batches server-side)
+    OPENAI_BATCH_SIZE = 100
+    
+    def __init__(self, batch_size: int = 32):
         self.embedding_model = None
+        self.batch_size = batch_size  # Texts per local (HuggingFace/ONNX) model call
         self.embedding_dimension = None
         self.provider = None
         self.cache = rag_cache
-        self._initialize()
+        # The model is loaded on first use (not at import) so it doesn't block server startup
+        self._loaded = False
+        self._load_lock = threading.Lock()
+    
+    def _ensure_loaded(self):
+        """Load the embedding model once; concurrent first callers wait for the same load."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._initialize()
+                self._apply_truncation()
+                self._loaded = True
+    
+    def _apply_truncation(self):
+        """Shorten vectors to EMBEDDING_TRUNCATE_DIM (Matryoshka-trained models only) when configured."""
+        truncate_dim = settings.EMBEDDING_TRUNCATE_DIM
+        if not truncate_dim or self.embedding_model is None:
+            return
+        if self.embedding_dimension and truncate_dim >= self.embedding_dimension:
+            logger.warning("EMBEDDING_TRUNCATE_DIM=%s is not below the model dimension (%s); ignoring", truncate_dim, self.embedding_dimension)
+            return
+        
+        from rag.truncated_embedding import TruncatedEmbedding
+        self.embedding_model = TruncatedEmbedding(self.embedding_model, truncate_dim)
+        self.embedding_dimension = truncate_dim
+        logger.info("Embeddings truncated to %sd", truncate_dim)
+    
+    @staticmethod
+    def _huggingface_device_kwargs() -> dict:
+        """Run on GPU in fp16 when CUDA is available (half the weight memory), else CPU fp32."""
+        try:
+            import torch
+            if torch.cuda.is_available():
+                return {"device": "cuda", "model_kwargs": {"torch_dtype": torch.float16}}
+        except ImportError:
+            pass
+        return {"device": "cpu"}
     
     def _initialize(self):
         """Initialize embedding model - Supports OpenAI (best quality) or HuggingFace (free)."""
@@ -41,15 +86,13 @@ class EmbeddingService:
                 else:
                     self.embedding_dimension = 1536  # Default for ada-002
                 
-                print(f"[OK] Embedding service initialized: OpenAI ({model_name}) - {self.embedding_dimension}d")
+                logger.info("Embedding service initialized: OpenAI (%s) - %sd", model_name, self.embedding_dimension)
                 return
             except ImportError as e:
-                print(f"[WARNING] OpenAI embedding dependencies not found: {e}")
-                print("   Install: pip install llama-index-embeddings-openai")
+                logger.warning("OpenAI embedding dependencies not found: %s", e)
+                logger.warning("Install: pip install llama-index-embeddings-openai")
             except Exception as e:
-                print(f"[WARNING] Failed to initialize OpenAI embeddings: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.warning("Failed to initialize OpenAI embeddings: %s", e, exc_info=True)
         
         # Fallback to HuggingFace (free)
         # Note: This initialization might take time if models need to be downloaded
@@ -66,11 +109,18 @@ class EmbeddingService:
                 'sentence-transformers/all-MiniLM-L6-v2'   # Fallback: smaller, faster
             ]
             
+            # Optional ONNX Runtime backend (int8, CPU) - falls back to PyTorch if unavailable
+            if getattr(settings, 'EMBEDDING_BACKEND', 'torch').lower() == 'onnx' and self._initialize_onnx(models_to_try):
+                return
+            
+            device_kwargs = self._huggingface_device_kwargs()
+            
             for model_name in models_to_try:
                 try:
                     # Try to initialize - if this blocks, we'll catch and continue
                     self.embedding_model = HuggingFaceEmbedding(
-                        model_name=model_name
+                        model_name=model_name,
+                        **device_kwargs
                     )
                     self.provider = "huggingface"
                     # HuggingFace models are typically 384d or 768d
@@ -78,36 +128,61 @@ class EmbeddingService:
                         self.embedding_dimension = 768
                     else:
                         self.embedding_dimension = 384
-                    print(f"[OK] Embedding service initialized: HuggingFace ({model_name}) - {self.embedding_dimension}d")
+                    logger.info("Embedding service initialized: HuggingFace (%s, %s) - %sd", model_name, device_kwargs['device'], self.embedding_dimension)
                     break
                 except Exception as e:
                     if model_name == models_to_try[-1]:
                         # Last model failed, but don't raise - just set to None
-                        print(f"[WARNING] Failed to load any HuggingFace model: {e}")
+                        logger.warning("Failed to load any HuggingFace model: %s", e)
                         self.embedding_model = None
                         break
-                    print(f"[INFO] Failed to load {model_name}, trying next model...")
+                    logger.info("Failed to load %s, trying next model...", model_name)
                     continue
                     
         except ImportError as e:
-            print(f"[WARNING] Missing HuggingFace dependencies: {e}")
-            print("   Run: pip install llama-index-embeddings-huggingface sentence-transformers")
+            logger.warning("Missing HuggingFace dependencies: %s", e)
+            logger.warning("Run: pip install llama-index-embeddings-huggingface sentence-transformers")
             self.embedding_model = None
         except Exception as e:
             # Catch any other exceptions to prevent blocking server startup
-            print(f"[WARNING] Error initializing embeddings (non-blocking): {e}")
+            logger.warning("Error initializing embeddings (non-blocking): %s", e)
             self.embedding_model = None
     
+    def _initialize_onnx(self, models_to_try: List[str]) -> bool:
+        """Try to load the first working model through ONNX Runtime. Returns True on success."""
+        try:
+            from rag.onnx_embedding import ONNXEmbedding
+        except ImportError as e:
+            logger.warning("ONNX embedding dependencies not found: %s", e)
+            logger.warning("Install: pip install \"optimum[onnxruntime]\" (falling back to PyTorch)")
+            return False
+        
+        for model_name in models_to_try:
+            try:
+                self.embedding_model = ONNXEmbedding(model_name=model_name)
+                self.provider = "huggingface"
+                self.embedding_dimension = 768 if "mpnet" in model_name.lower() else 384
+                logger.info("Embedding service initialized: HuggingFace ONNX int8 (%s) - %sd", model_name, self.embedding_dimension)
+                return True
+            except Exception as e:
+                logger.info("Failed to load %s with ONNX Runtime: %s", model_name, e)
+        
+        self.embedding_model = None
+        return False
+    
     def get_embedding_dimension(self) -> Optional[int]:
         """Get the dimension of embeddings."""
+        self._ensure_loaded()
         return self.embedding_dimension
     
     def get_embedding_model(self):
         """Get the embedding model instance."""
+        self._ensure_loaded()
         return self.embedding_model
     
     def is_available(self) -> bool:
         """Check if embedding service is available."""
+        self._ensure_loaded()
         return self.embedding_model is not None
     
     def get_embedding(self, text: str, use_cache: bool = True) -> List[float]:
@@ -130,7 +205,7 @@ class EmbeddingService:
                 # HuggingFace embeddings
                 embedding = self.embedding_model.get_query_embedding(text)
         except Exception as e:
-            print(f"[ERROR] Failed to generate embedding: {e}")
+            logger.error("Failed to generate embedding: %s", e)
             raise
         
         # Cache it
@@ -140,60 +215,54 @@ class EmbeddingService:
         return embedding
     
     def get_embeddings(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
-        """Get embeddings for multiple texts with caching and batching."""
+        """Get embeddings for multiple texts with caching, deduplication and batching."""
         if not self.is_available():
             raise ValueError("Embedding service not available")
         
-        embeddings = []
-        texts_to_embed = []
-        text_indices = []
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
         
-        # Check cache for each text
-        if use_cache:
-            for i, text in enumerate(texts):
-                cached = self.cache.get_embedding(text)
-                if cached is not None:
-                    embeddings.append((i, cached))
-                else:
-                    texts_to_embed.append((i, text))
-        else:
-            texts_to_embed = [(i, text) for i, text in enumerate(texts)]
+        # Group indices by text so repeated texts are looked up and embedded only once
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            positions.setdefault(text, []).append(i)
+        
+        unique_texts = list(positions)
+        # One MGET for all unique texts instead of a GET per text
+        cached_list = self.cache.get_embeddings_bulk(unique_texts) if use_cache else [None] * len(unique_texts)
         
-        # Generate embeddings for uncached texts in batches
+        texts_to_embed = []
+        for text, cached in zip(unique_texts, cached_list):
+            if cached is not None:
+                for i in positions[text]:
+                    embeddings[i] = cached
+            else:
+                texts_to_embed.append(text)
+        
+        # Generate embeddings for uncached texts in fixed-size micro-batches
         if texts_to_embed:
-            text_list = [text for _, text in texts_to_embed]
+            # OpenAI can handle larger batches per request
+            batch_size = self.OPENAI_BATCH_SIZE if self.provider == "openai" else self.batch_size
             
             try:
-                # Batch processing - OpenAI handles batching automatically
-                if self.provider == "openai":
-                    # OpenAI can handle larger batches
-                    batch_size = 100
-                    new_embeddings = []
-                    for i in range(0, len(text_list), batch_size):
-                        batch = text_list[i:i+batch_size]
-                        batch_embeddings = self.embedding_model.get_text_embedding_batch(batch)
-                        new_embeddings.extend(batch_embeddings)
-                else:
-                    # HuggingFace batching
-                    batch_size = 32
-                    new_embeddings = []
-                    for i in range(0, len(text_list), batch_size):
-                        batch = text_list[i:i+batch_size]
-                        batch_embeddings = self.embedding_model.get_text_embedding_batch(batch)
-                        new_embeddings.extend(batch_embeddings)
-                
-                # Cache and store new embeddings
-                for (i, text), embedding in zip(texts_to_embed, new_embeddings):
-                    if use_cache and embedding:
-                        self.cache.set_embedding(text, embedding)
-                    embeddings.append((i, embedding))
+                for start in range(0, len(texts_to_embed), batch_size):
+                    batch = texts_to_embed[start:start + batch_size]
+                    batch_embeddings = self.embedding_model.get_text_embedding_batch(batch)
+                    
+                    # Scatter to every original position, then cache the batch in one pipeline
+                    for text, embedding in zip(batch, batch_embeddings):
+                        for i in positions[text]:
+                            embeddings[i] = embedding
+                    if use_cache:
+                        self.cache.set_embeddings_bulk({
+                            text: embedding
+                            for text, embedding in zip(batch, batch_embeddings)
+                            if embedding
+                        })
             except Exception as e:
-                print(f"[ERROR] Failed to generate batch embeddings: {e}")
+                logger.error("Failed to generate batch embeddings: %s", e)
                 raise
         
-        # Sort by original index and return
-        embeddings.sort(key=lambda x: x[0])
-        return [emb for _, emb in embeddings]
+        return embeddings
 
 # Global instance
 embedding_service = EmbeddingService()
@@ -7,6 +7,7 @@ from llama_index.core.schema import BaseNode
 from rag.vector_store import vector_store_manager
 from rag.document_processor import document_processor
 from rag.embedding_service import embedding_service
+from rag.bm25_stats import corpus_bm25_stats
 from db.database import get_db
 from models.rfp_document import RFPDocument
 from sqlalchemy.orm import Session
@@ -14,8 +15,10 @@ from sqlalchemy.orm import Session
 class IndexBuilder:
     """Build and manage vector indexes."""
     
-    def __init__(self):
-        self.vector_store = vector_store_manager.get_vector_store()
+    @property
+    def vector_store(self):
+        """Current vector store (resolved on use, so it follows recreate_collection)."""
+        return vector_store_manager.get_vector_store()
     
     def build_index_from_file(
         self,
@@ -81,6 +84,7 @@ class IndexBuilder:
                 storage_context=storage_context,
                 show_progress=True
             )
+            corpus_bm25_stats.add_documents([node.get_content() for node in nodes])
             
             # Update RFP document with extracted text
             rfp_doc = db.query(RFPDocument).filter(
@@ -112,10 +116,7 @@ class IndexBuilder:
                 if vector_store_manager.recreate_collection():
                     # Retry building the index
                     try:
-                        # Get the vector store again (it was recreated)
-                        self.vector_store = vector_store_manager.get_vector_store()
-                        
-                        # Create storage context with new vector store
+                        # Create storage context with the recreated vector store
                         storage_context = StorageContext.from_defaults(
                             vector_store=self.vector_store
                         )
@@ -126,6 +127,7 @@ class IndexBuilder:
                             storage_context=storage_context,
                             show_progress=True
                         )
+                        corpus_bm25_stats.add_documents([node.get_content() for node in nodes])
                         
                         # Update RFP document with extracted text
                         rfp_doc = db.query(RFPDocument).filter(
@@ -0,0 +1,127 @@
+"""
+ONNX Runtime backend for sentence-transformers embedding models (optional).
+Exports the HuggingFace model to ONNX once, applies graph optimizations and
+dynamic int8 quantization, and caches the result on disk.
+Enable with EMBEDDING_BACKEND=onnx (requires: pip install "optimum[onnxruntime]").
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Any, List
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+def _onnx_cache_dir(model_name: str) -> Path:
+    """Exported models live next to the Chroma store, one directory per model."""
+    base_dir = Path(settings.CHROMA_PERSIST_DIR).resolve().parent / "onnx_cache"
+    return base_dir / model_name.replace("/", "__")
+
+
+def _export_quantized_model(model_name: str, cache_dir: Path) -> Path:
+    """Export, optimize and int8-quantize the model; returns the quantized model directory."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTOptimizer, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig, OptimizationConfig
+    from transformers import AutoTokenizer
+
+    quantized_dir = cache_dir / "quantized"
+    if (quantized_dir / QUANTIZED_FILE_NAME).exists():
+        return quantized_dir
+
+    logger.info("Exporting %s to ONNX (one-time, cached in %s)", model_name, cache_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+
+    # Graph fusion (attention/GELU/LayerNorm) - level 2 is still hardware-independent
+    optimized_dir = cache_dir / "optimized"
+    optimizer = ORTOptimizer.from_pretrained(model)
+    optimizer.optimize(save_dir=optimized_dir, optimization_config=OptimizationConfig(optimization_level=2))
+
+    # Dynamic int8 quantization of the weights (no calibration data needed)
+    quantizer = ORTQuantizer.from_pretrained(optimized_dir, file_name="model_optimized.onnx")
+    quantizer.quantize(
+        save_dir=quantized_dir,
+        quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    )
+    tokenizer.save_pretrained(quantized_dir)
+    return quantized_dir
+
+
+class ONNXEmbedding(BaseEmbedding):
+    """LlamaIndex embedding model backed by an int8-quantized ONNX Runtime session (mean pooling + L2 norm)."""
+
+    max_length: int = Field(default=512, description="Maximum tokens per text.")
+
+    _session_model: Any = PrivateAttr()
+    _tokenizer: Any = PrivateAttr()
+
+    def __init__(self, model_name: str, max_length: int = 512, embed_batch_size: int = 32, **kwargs: Any):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+        import onnxruntime as ort
+
+        super().__init__(
+            model_name=model_name,
+            max_length=max_length,
+            embed_batch_size=embed_batch_size,
+            **kwargs
+        )
+
+        model_dir = _export_quantized_model(model_name, _onnx_cache_dir(model_name))
+
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self._session_model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir,
+            file_name=QUANTIZED_FILE_NAME,
+            session_options=session_options,
+            provider="CPUExecutionProvider"
+        )
+        self._tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ONNXEmbedding"
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        encoded = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np"
+        )
+        # Only feed the inputs the exported graph declares (e.g. mpnet has no token_type_ids)
+        inputs = {name: value for name, value in encoded.items() if name in self._session_model.input_names}
+        hidden = self._session_model(**inputs).last_hidden_state
+
+        # Mean pooling over real tokens, then L2-normalize (sentence-transformers defaults)
+        mask = encoded["attention_mask"][..., None].astype(hidden.dtype)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([query])[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embedding(text)
@@ -1,6 +1,7 @@
 """
 Retrieval system for RAG pipeline with caching and query optimization.
 """
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 from llama_index.core import VectorStoreIndex, StorageContext
 from llama_index.core.schema import NodeWithScore, QueryBundle
@@ -10,14 +11,21 @@ from rag.embedding_service import embedding_service
 from services.cache.rag_cache import rag_cache
 from services.rag.query_optimizer import query_optimizer
 
+# Shared pool for retrieving expanded query variations concurrently
+_retrieval_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-retrieve")
+
 class Retriever:
     """Retrieve relevant context from vector store with caching."""
     
     def __init__(self, top_k: int = 5):
         self.top_k = top_k
-        self.vector_store = vector_store_manager.get_vector_store()
         self.cache = rag_cache
     
+    @property
+    def vector_store(self):
+        """Current vector store (resolved on use, so it follows recreate_collection)."""
+        return vector_store_manager.get_vector_store()
+    
     def get_index(self) -> Optional[VectorStoreIndex]:
         """Get or create vector store index."""
         if not self.vector_store:
@@ -96,16 +104,24 @@ class Retriever:
                 return []
             
             # Retrieve for all query variations
-            all_nodes = []
-            for q in queries:
+            similarity_top_k = top_k * 2 if len(queries) > 1 else top_k  # Get more if multiple queries
+            
+            def retrieve_variation(q: str) -> List[NodeWithScore]:
                 retriever = VectorIndexRetriever(
                     index=index,
-                    similarity_top_k=top_k * 2 if len(queries) > 1 else top_k  # Get more if multiple queries
+                    similarity_top_k=similarity_top_k
                 )
-                
-                query_bundle = QueryBundle(query_str=q)
-                nodes = retriever.retrieve(query_bundle)
-                all_nodes.extend(nodes)
+                # Pre-computed (and cached) query embedding, so the retriever skips its own model call
+                query_bundle = QueryBundle(query_str=q, embedding=embedding_service.get_embedding(q))
+                return retriever.retrieve(query_bundle)
+            
+            all_nodes = []
+            if len(queries) > 1:
+                # Each variation is an embedding call + vector search; overlap them instead of running back to back
+                for nodes in _retrieval_executor.map(retrieve_variation, queries):
+                    all_nodes.extend(nodes)
+            else:
+                all_nodes.extend(retrieve_variation(queries[0]))
             
             # Filter by project_id if provided
             if project_id:
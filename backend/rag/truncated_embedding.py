@@ -0,0 +1,52 @@
+"""
+Matryoshka-style shortened embeddings (optional).
+Keeps the first N components of another embedding model's vectors and re-normalizes them,
+so the vector store holds and searches smaller vectors. Only use with models trained for it
+(e.g. OpenAI text-embedding-3-*); enable with EMBEDDING_TRUNCATE_DIM.
+"""
+from typing import Any, List
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+
+
+class TruncatedEmbedding(BaseEmbedding):
+    """LlamaIndex embedding model that shortens and L2-normalizes a wrapped model's output."""
+
+    dim: int = Field(description="Number of leading components to keep.")
+
+    _inner: Any = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, dim: int, **kwargs: Any):
+        super().__init__(
+            model_name=inner.model_name,
+            dim=dim,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs
+        )
+        self._inner = inner
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "TruncatedEmbedding"
+
+    def _shorten(self, vectors: List[List[float]]) -> List[List[float]]:
+        shortened = np.asarray(vectors, dtype=np.float32)[:, :self.dim]
+        shortened /= np.clip(np.linalg.norm(shortened, axis=1, keepdims=True), 1e-12, None)
+        return shortened.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._shorten([self._inner.get_query_embedding(query)])[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._shorten([self._inner.get_text_embedding(text)])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._shorten(self._inner.get_text_embedding_batch(texts))
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._shorten([await self._inner.aget_query_embedding(query)])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return self._shorten([await self._inner.aget_text_embedding(text)])[0]
@@ -3,34 +3,76 @@ Vector database integration with support for Chroma, Qdrant, and Pinecone.
 """
 from typing import List, Optional, Dict, Any
 from utils.config import settings
-import sys
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Max ids per vector store delete call
+DELETE_BATCH_SIZE = 500
 
 class VectorStoreManager:
     """Manage vector database connections and operations."""
     
+    # Embedding dimension, resolved once per process
+    _cached_dim: Optional[int] = None
+    
     def __init__(self):
         self.chroma_client = None
         self.qdrant_client = None
         self.pinecone_client = None
+        self.pinecone_index = None
         self.vector_store = None
+        # Chroma collection handle, cached so delete/upsert paths don't re-fetch it per call
+        self.collection = None
         self.collection_name = "novaintel_documents"
-        self._initialize()
+        # Connect on first use (not at import) so importing the RAG modules doesn't open the store
+        self._loaded = False
+        self._load_lock = threading.Lock()
+    
+    def _ensure_loaded(self):
+        """Connect to the vector database once; concurrent first callers wait for the same load."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._initialize()
+                self._loaded = True
     
     def _get_embedding_dimension(self, timeout: float = 2.0) -> Optional[int]:
-        """Get the embedding dimension from the embedding service (non-blocking)."""
-        try:
-            from rag.embedding_service import embedding_service
-            if not embedding_service.is_available():
+        """Get the embedding dimension: settings, then the embedding service, then a live probe (memoized)."""
+        if VectorStoreManager._cached_dim is not None:
+            return VectorStoreManager._cached_dim
+        
+        dim = settings.EMBEDDING_DIM
+        if not dim:
+            try:
+                from rag.embedding_service import embedding_service
+                if not embedding_service.is_available():
+                    return None
+                
+                # The service knows the dimension of the model it loaded; only probe as a last resort
+                dim = embedding_service.get_embedding_dimension()
+                if not dim:
+                    test_embedding = embedding_service.get_embedding("test", use_cache=False)
+                    dim = len(test_embedding) if test_embedding else None
+            except Exception as e:
+                # Silently skip if embedding service isn't ready or blocks
+                # This prevents blocking during server startup
                 return None
-            
-            # Try to get dimension - if it blocks, we'll catch and skip
-            # Note: This is a best-effort check, if it hangs we'll just skip it
-            test_embedding = embedding_service.get_embedding("test", use_cache=False)
-            return len(test_embedding) if test_embedding else None
-        except Exception as e:
-            # Silently skip if embedding service isn't ready or blocks
-            # This prevents blocking during server startup
-            return None
+        
+        VectorStoreManager._cached_dim = dim
+        return dim
+    
+    @staticmethod
+    def _collection_metadata(expected_dim: Optional[int]) -> Dict[str, Any]:
+        """Chroma collection metadata; records the embedding dimension when it is known."""
+        metadata: Dict[str, Any] = {"hnsw:space": "cosine"}
+        if expected_dim:
+            metadata["embedding_dim"] = expected_dim
+        return metadata
     
     def _check_and_fix_collection_dimension(self, collection, expected_dim: Optional[int]) -> bool:
         """
@@ -44,25 +86,24 @@ class VectorStoreManager:
             return True  # Can't verify, assume OK
         
         try:
-            # Try to get collection metadata to check dimension
-            # Chroma doesn't directly expose dimension in metadata, so we'll try to add a test vector
             try:
-                # Try to peek at collection - if it has items, check one
-                count = collection.count()
-                if count > 0:
-                    # Get a sample to check dimension
-                    sample = collection.get(limit=1)
-                    if sample and 'embeddings' in sample and len(sample['embeddings']) > 0:
-                        existing_dim = len(sample['embeddings'][0])
-                        if existing_dim != expected_dim:
-                            print(f"[WARNING] Collection dimension mismatch: {existing_dim} != {expected_dim}")
-                            print(f"   Deleting old collection and creating new one with dimension {expected_dim}")
-                            # Delete the collection
-                            self.chroma_client.delete_collection(name=self.collection_name)
-                            return False  # Need to recreate
+                # Collections created by this manager record their dimension in metadata (no vector fetch)
+                existing_dim = (collection.metadata or {}).get("embedding_dim")
+                if existing_dim is None and collection.count() > 0:
+                    # Legacy collection: read the dimension off one stored vector
+                    sample = collection.get(limit=1, include=["embeddings"])
+                    embeddings = sample.get("embeddings") if sample else None
+                    if embeddings is not None and len(embeddings) > 0:
+                        existing_dim = len(embeddings[0])
+                if existing_dim is not None and existing_dim != expected_dim:
+                    logger.warning("Collection dimension mismatch: %s != %s", existing_dim, expected_dim)
+                    logger.info("Deleting old collection and creating new one with dimension %s", expected_dim)
+                    # Delete the collection
+                    self.chroma_client.delete_collection(name=self.collection_name)
+                    return False  # Need to recreate
             except Exception as e:
                 # Collection might be empty or have issues, try to recreate
-                print(f"[INFO] Collection check failed: {e}, will recreate if needed")
+                logger.info("Collection check failed: %s, will recreate if needed", e)
                 try:
                     self.chroma_client.delete_collection(name=self.collection_name)
                 except:
@@ -71,7 +112,7 @@ class VectorStoreManager:
             
             return True  # Collection is valid
         except Exception as e:
-            print(f"[WARNING] Error checking collection dimension: {e}")
+            logger.warning("Error checking collection dimension: %s", e)
             return True  # Assume OK to avoid breaking
     
     def _initialize(self):
@@ -85,7 +126,7 @@ class VectorStoreManager:
         elif vector_db_type == "pinecone":
             self._initialize_pinecone()
         else:
-            print(f"[WARNING] Unknown vector DB type '{vector_db_type}', defaulting to Chroma", file=sys.stderr, flush=True)
+            logger.warning("Unknown vector DB type '%s', defaulting to Chroma", vector_db_type)
             self._initialize_chroma()
     
     def _initialize_chroma(self):
@@ -110,9 +151,9 @@ class VectorStoreManager:
                 path=str(chroma_path)
             )
             
-            # Skip embedding dimension check during startup to avoid blocking
+            # Only use a configured dimension here - probing the model would block startup
             # Dimension will be checked when actually needed (when adding vectors)
-            expected_dim = None
+            expected_dim = settings.EMBEDDING_DIM
             
             # Try to get existing collection
             collection = None
@@ -129,29 +170,46 @@ class VectorStoreManager:
             if collection is None:
                 collection = self.chroma_client.create_collection(
                     name=self.collection_name,
-                    metadata={"hnsw:space": "cosine"}
+                    metadata=self._collection_metadata(expected_dim)
                 )
                 if expected_dim:
-                    print(f"[OK] Created Chroma collection with dimension {expected_dim}", file=sys.stderr, flush=True)
+                    logger.info("Created Chroma collection with dimension %s", expected_dim)
                 else:
-                    print(f"[OK] Created Chroma collection", file=sys.stderr, flush=True)
+                    logger.info("Created Chroma collection")
             else:
-                print(f"[OK] Using existing Chroma collection", file=sys.stderr, flush=True)
+                logger.info("Using existing Chroma collection")
             
             # Create LlamaIndex vector store
+            self.collection = collection
             self.vector_store = ChromaVectorStore(chroma_collection=collection)
             
-            print(f"[OK] Chroma vector store initialized: {chroma_path}", file=sys.stderr, flush=True)
+            logger.info("Chroma vector store initialized: %s", chroma_path)
+            
+            # Pull the HNSW segment files into the page cache so the first query doesn't hit cold disk
+            threading.Thread(target=self._prefetch_chroma_files, args=(chroma_path,), daemon=True).start()
         except ImportError as e:
-            print(f"[ERROR] Missing Chroma dependencies: {e}", file=sys.stderr, flush=True)
-            print("   Run: pip install chromadb llama-index-vector-stores-chroma", file=sys.stderr, flush=True)
+            logger.error("Missing Chroma dependencies: %s", e)
+            logger.error("Run: pip install chromadb llama-index-vector-stores-chroma")
             self.vector_store = None
         except Exception as e:
-            print(f"[ERROR] Error initializing Chroma vector store: {e}", file=sys.stderr, flush=True)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.error("Error initializing Chroma vector store: %s", e, exc_info=True)
             self.vector_store = None
     
+    @staticmethod
+    def _prefetch_chroma_files(chroma_path):
+        """Ask the OS to read Chroma's index and SQLite files ahead (Linux posix_fadvise; no-op elsewhere)."""
+        if not hasattr(os, "posix_fadvise"):
+            return
+        for path in [*chroma_path.rglob("*.bin"), *chroma_path.glob("*.sqlite3")]:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logger.debug("Prefetch skipped for %s: %s", path, e)
+    
     def _initialize_qdrant(self):
         """Initialize Qdrant vector database."""
         try:
@@ -182,7 +240,7 @@ class VectorStoreManager:
             # Check if collection exists
             try:
                 collection_info = client.get_collection(self.collection_name)
-                print(f"[OK] Using existing Qdrant collection: {self.collection_name}", file=sys.stderr, flush=True)
+                logger.info("Using existing Qdrant collection: %s", self.collection_name)
             except:
                 # Create collection if it doesn't exist
                 client.create_collection(
@@ -192,7 +250,7 @@ class VectorStoreManager:
                         distance=models.Distance.COSINE
                     )
                 )
-                print(f"[OK] Created Qdrant collection '{self.collection_name}' with dimension {expected_dim}", file=sys.stderr, flush=True)
+                logger.info("Created Qdrant collection '%s' with dimension %s", self.collection_name, expected_dim)
             
             # Create LlamaIndex vector store
             self.vector_store = QdrantVectorStore(
@@ -201,15 +259,13 @@ class VectorStoreManager:
             )
             
             self.qdrant_client = client
-            print(f"[OK] Qdrant vector store initialized: {settings.QDRANT_URL}", file=sys.stderr, flush=True)
+            logger.info("Qdrant vector store initialized: %s", settings.QDRANT_URL)
         except ImportError as e:
-            print(f"[ERROR] Missing Qdrant dependencies: {e}", file=sys.stderr, flush=True)
-            print("   Run: pip install qdrant-client llama-index-vector-stores-qdrant", file=sys.stderr, flush=True)
+            logger.error("Missing Qdrant dependencies: %s", e)
+            logger.error("Run: pip install qdrant-client llama-index-vector-stores-qdrant")
             self.vector_store = None
         except Exception as e:
-            print(f"[ERROR] Error initializing Qdrant vector store: {e}", file=sys.stderr, flush=True)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.error("Error initializing Qdrant vector store: %s", e, exc_info=True)
             self.vector_store = None
     
     def _initialize_pinecone(self):
@@ -249,9 +305,9 @@ class VectorStoreManager:
                         region=settings.PINECONE_ENVIRONMENT
                     )
                 )
-                print(f"[OK] Created Pinecone index '{index_name}' with dimension {expected_dim}", file=sys.stderr, flush=True)
+                logger.info("Created Pinecone index '%s' with dimension %s", index_name, expected_dim)
             else:
-                print(f"[OK] Using existing Pinecone index: {index_name}", file=sys.stderr, flush=True)
+                logger.info("Using existing Pinecone index: %s", index_name)
             
             # Get index
             index = pc.Index(index_name)
@@ -263,15 +319,14 @@ class VectorStoreManager:
             )
             
             self.pinecone_client = pc
-            print(f"[OK] Pinecone vector store initialized: {index_name}", file=sys.stderr, flush=True)
+            self.pinecone_index = index
+            logger.info("Pinecone vector store initialized: %s", index_name)
         except ImportError as e:
-            print(f"[ERROR] Missing Pinecone dependencies: {e}", file=sys.stderr, flush=True)
-            print("   Run: pip install pinecone-client llama-index-vector-stores-pinecone", file=sys.stderr, flush=True)
+            logger.error("Missing Pinecone dependencies: %s", e)
+            logger.error("Run: pip install pinecone-client llama-index-vector-stores-pinecone")
             self.vector_store = None
         except Exception as e:
-            print(f"[ERROR] Error initializing Pinecone vector store: {e}", file=sys.stderr, flush=True)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.error("Error initializing Pinecone vector store: %s", e, exc_info=True)
             self.vector_store = None
     
     def recreate_collection(self) -> bool:
@@ -279,6 +334,7 @@ class VectorStoreManager:
         Recreate the collection (useful after embedding model change).
         WARNING: This will delete all existing vectors!
         """
+        self._ensure_loaded()
         if settings.VECTOR_DB_TYPE != "chroma" or not self.chroma_client:
             return False
         
@@ -288,7 +344,7 @@ class VectorStoreManager:
             # Delete existing collection
             try:
                 self.chroma_client.delete_collection(name=self.collection_name)
-                print(f"[INFO] Deleted existing collection: {self.collection_name}", file=sys.stderr, flush=True)
+                logger.info("Deleted existing collection: %s", self.collection_name)
             except:
                 pass  # Collection might not exist
             
@@ -302,28 +358,35 @@ class VectorStoreManager:
             # Create new collection
             collection = self.chroma_client.create_collection(
                 name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata=self._collection_metadata(expected_dim)
             )
             
             # Recreate vector store
+            self.collection = collection
             self.vector_store = ChromaVectorStore(chroma_collection=collection)
             
+            # The old chunks are gone, so their BM25 corpus stats are too
+            from rag.bm25_stats import corpus_bm25_stats
+            corpus_bm25_stats.reset()
+            
             if expected_dim:
-                print(f"[OK] Recreated collection with dimension {expected_dim}", file=sys.stderr, flush=True)
+                logger.info("Recreated collection with dimension %s", expected_dim)
             else:
-                print(f"[OK] Recreated collection", file=sys.stderr, flush=True)
+                logger.info("Recreated collection")
             
             return True
         except Exception as e:
-            print(f"[ERROR] Failed to recreate collection: {e}", file=sys.stderr, flush=True)
+            logger.error("Failed to recreate collection: %s", e)
             return False
     
     def get_vector_store(self):
         """Get the vector store instance."""
+        self._ensure_loaded()
         return self.vector_store
     
     def is_available(self) -> bool:
         """Check if vector store is available."""
+        self._ensure_loaded()
         return self.vector_store is not None
     
     def delete_by_ids(self, ids: List[str]) -> bool:
@@ -332,36 +395,41 @@ class VectorStoreManager:
             return False
         
         try:
-            if settings.VECTOR_DB_TYPE == "chroma" and self.chroma_client:
-                collection = self.chroma_client.get_collection("novaintel_documents")
-                collection.delete(ids=ids)
+            # Delete in chunks so huge id lists don't become one giant IN clause / write transaction
+            if settings.VECTOR_DB_TYPE == "chroma" and self.collection:
+                for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                    self.collection.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
                 return True
             elif settings.VECTOR_DB_TYPE == "qdrant" and self.qdrant_client:
-                self.qdrant_client.delete(
-                    collection_name=self.collection_name,
-                    points_selector=ids
-                )
+                for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                    self.qdrant_client.delete(
+                        collection_name=self.collection_name,
+                        points_selector=ids[start:start + DELETE_BATCH_SIZE]
+                    )
                 return True
-            elif settings.VECTOR_DB_TYPE == "pinecone" and self.pinecone_client:
-                index = self.pinecone_client.Index(settings.PINECONE_INDEX_NAME)
-                index.delete(ids=ids)
+            elif settings.VECTOR_DB_TYPE == "pinecone" and self.pinecone_index:
+                for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                    self.pinecone_index.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
                 return True
             return False
         except Exception as e:
-            print(f"Error deleting vectors: {e}", file=sys.stderr, flush=True)
+            logger.error("Error deleting vectors: %s", e)
             return False
     
+    async def adelete_by_ids(self, ids: List[str]) -> bool:
+        """Async variant of delete_by_ids - runs the blocking client calls in a worker thread."""
+        return await asyncio.to_thread(self.delete_by_ids, ids)
+    
     def delete_by_metadata_filter(self, filter_dict: Dict[str, Any]) -> bool:
         """Delete vectors by metadata filter."""
         if not self.is_available():
             return False
         
         try:
-            if settings.VECTOR_DB_TYPE == "chroma" and self.chroma_client:
-                collection = self.chroma_client.get_collection("novaintel_documents")
+            if settings.VECTOR_DB_TYPE == "chroma" and self.collection:
                 # Convert filter dict to Chroma format
                 where = filter_dict
-                collection.delete(where=where)
+                self.collection.delete(where=where)
                 return True
             elif settings.VECTOR_DB_TYPE == "qdrant" and self.qdrant_client:
                 # Qdrant uses filter expressions
@@ -380,14 +448,13 @@ class VectorStoreManager:
                     points_selector=models.FilterSelector(filter=filter_expr)
                 )
                 return True
-            elif settings.VECTOR_DB_TYPE == "pinecone" and self.pinecone_client:
+            elif settings.VECTOR_DB_TYPE == "pinecone" and self.pinecone_index:
                 # Pinecone delete by metadata filter
-                index = self.pinecone_client.Index(settings.PINECONE_INDEX_NAME)
-                index.delete(filter=filter_dict)
+                self.pinecone_index.delete(filter=filter_dict)
                 return True
             return False
         except Exception as e:
-            print(f"Error deleting vectors by filter: {e}", file=sys.stderr, flush=True)
+            logger.error("Error deleting vectors by filter: %s", e)
             return False
 
 # Global instance
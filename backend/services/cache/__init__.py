@@ -3,6 +3,8 @@ Caching service for RAG queries, embeddings, and other operations.
 """
 from services.cache.rag_cache import RAGCache
 from services.cache.cache_manager import CacheManager
+from services.cache.proposal_cache import ProposalCache
+from services.cache.llm_cache import LLMCache
 
-__all__ = ["RAGCache", "CacheManager"]
+__all__ = ["RAGCache", "CacheManager", "ProposalCache", "LLMCache"]
 
@@ -1,11 +1,17 @@
 """
 Redis-based cache manager for NovaIntel.
 """
-import json
 import hashlib
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
+
+import orjson
+
 from utils.config import settings
 
+def _dumps(value: Any) -> bytes:
+    """orjson encoding; non-string dict keys are stringified the way json.dumps did."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
 class CacheManager:
     """Manages Redis cache connections and operations."""
     
@@ -75,7 +81,7 @@ class CacheManager:
             value = self.redis_client.get(key)
             if value is None:
                 return None
-            return json.loads(value)
+            return orjson.loads(value)
         except Exception as e:
             print(f"[WARNING] Cache get error for key {key}: {e}")
             return None
@@ -87,13 +93,41 @@ class CacheManager:
         
         try:
             ttl = ttl or settings.CACHE_TTL
-            serialized = json.dumps(value)
+            serialized = _dumps(value)
             self.redis_client.setex(key, ttl, serialized)
             return True
         except Exception as e:
             print(f"[WARNING] Cache set error for key {key}: {e}")
             return False
     
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get multiple values in one round-trip (MGET). Missing keys come back as None."""
+        if not self.is_available() or not keys:
+            return [None] * len(keys)
+        
+        try:
+            values = self.redis_client.mget(keys)
+            return [orjson.loads(value) if value is not None else None for value in values]
+        except Exception as e:
+            print(f"[WARNING] Cache get_many error for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+    
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Set multiple values with the same TTL in one pipelined round-trip."""
+        if not self.is_available() or not items:
+            return False
+        
+        try:
+            ttl = ttl or settings.CACHE_TTL
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, _dumps(value))
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"[WARNING] Cache set_many error for {len(items)} keys: {e}")
+            return False
+    
     def delete(self, key: str) -> bool:
         """Delete key from cache."""
         if not self.is_available():
@@ -0,0 +1,62 @@
+"""
+Caching of LLM completions by prompt hash: a small in-process LRU in front of Redis.
+Only near-deterministic (low temperature) generations are cached.
+"""
+import hashlib
+import threading
+from typing import Any, Optional
+from cachetools import LRUCache
+from services.cache.cache_manager import cache_manager
+
+# Regenerating at higher temperatures is expected to give a different answer
+LLM_CACHE_MAX_TEMPERATURE = 0.2
+LLM_CACHE_TTL = 86400
+LLM_LOCAL_CACHE_SIZE = 1024
+
+
+class LLMCache:
+    """Cache-aside store for generated text keyed by model + prompt + generation parameters."""
+
+    def __init__(self):
+        self.cache = cache_manager
+        self._local: LRUCache = LRUCache(maxsize=LLM_LOCAL_CACHE_SIZE)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_cacheable(temperature: float) -> bool:
+        return temperature <= LLM_CACHE_MAX_TEMPERATURE
+
+    @staticmethod
+    def make_key(model: str, prompt: str, **params: Any) -> str:
+        """Stable key over the model, prompt and every parameter that changes the output."""
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(model.encode())
+        for name, value in sorted(params.items()):
+            hasher.update(f"\x00{name}={value!r}".encode())
+        hasher.update(b"\x00")
+        hasher.update(prompt.encode())
+        return f"llm:{hasher.hexdigest()}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached completion: in-process first, then Redis (promoting hits to the local LRU)."""
+        with self._lock:
+            content = self._local.get(key)
+        if content is not None:
+            return content
+        if not self.cache.is_available():
+            return None
+        content = self.cache.get(key)
+        if content is not None:
+            with self._lock:
+                self._local[key] = content
+        return content
+
+    def set(self, key: str, content: str):
+        """Store a completion in both tiers."""
+        with self._lock:
+            self._local[key] = content
+        if self.cache.is_available():
+            self.cache.set(key, content, LLM_CACHE_TTL)
+
+# Global instance
+llm_cache = LLMCache()
@@ -0,0 +1,77 @@
+"""
+Proposal-specific caching for read-heavy proposal endpoints.
+"""
+from typing import Optional, Dict, Any
+from services.cache.cache_manager import cache_manager
+
+# Short TTL - entries are also invalidated explicitly on every proposal write
+PROPOSAL_CACHE_TTL = 300
+
+# Dashboard aggregates only need to be near-real-time
+ANALYTICS_CACHE_TTL = 60
+ANALYTICS_CACHE_KEY = "proposal:admin_analytics"
+
+
+class ProposalCache:
+    """Caching layer for proposal previews and by-project lookups."""
+
+    def __init__(self):
+        self.cache = cache_manager
+
+    def _preview_key(self, proposal_id: int, user_id: int) -> str:
+        return f"proposal:preview:{proposal_id}:user:{user_id}"
+
+    def _by_project_key(self, project_id: int, user_id: int) -> str:
+        return f"proposal:by_project:{project_id}:user:{user_id}"
+
+    def get_preview(self, proposal_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get cached proposal preview."""
+        if not self.cache.is_available():
+            return None
+        return self.cache.get(self._preview_key(proposal_id, user_id))
+
+    def set_preview(self, proposal_id: int, user_id: int, preview: Dict[str, Any]) -> bool:
+        """Cache proposal preview."""
+        if not self.cache.is_available():
+            return False
+        return self.cache.set(self._preview_key(proposal_id, user_id), preview, PROPOSAL_CACHE_TTL)
+
+    def get_by_project(self, project_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get cached proposal for a project."""
+        if not self.cache.is_available():
+            return None
+        return self.cache.get(self._by_project_key(project_id, user_id))
+
+    def set_by_project(self, project_id: int, user_id: int, proposal: Dict[str, Any]) -> bool:
+        """Cache proposal for a project."""
+        if not self.cache.is_available():
+            return False
+        return self.cache.set(self._by_project_key(project_id, user_id), proposal, PROPOSAL_CACHE_TTL)
+
+    def invalidate_proposal(self, proposal_id: int, project_id: int):
+        """Invalidate all cached views of a proposal (for every user)."""
+        if not self.cache.is_available():
+            return
+        self.cache.delete_pattern(f"proposal:preview:{proposal_id}:*")
+        self.cache.delete_pattern(f"proposal:by_project:{project_id}:*")
+
+    def get_analytics(self) -> Optional[Dict[str, Any]]:
+        """Get cached admin analytics."""
+        if not self.cache.is_available():
+            return None
+        return self.cache.get(ANALYTICS_CACHE_KEY)
+
+    def set_analytics(self, analytics: Dict[str, Any]) -> bool:
+        """Cache admin analytics."""
+        if not self.cache.is_available():
+            return False
+        return self.cache.set(ANALYTICS_CACHE_KEY, analytics, ANALYTICS_CACHE_TTL)
+
+    def invalidate_analytics(self):
+        """Invalidate cached admin analytics (after submissions and reviews)."""
+        if not self.cache.is_available():
+            return
+        self.cache.delete(ANALYTICS_CACHE_KEY)
+
+# Global instance
+proposal_cache = ProposalCache()
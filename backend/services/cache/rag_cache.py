@@ -1,12 +1,26 @@
 """
 RAG-specific caching for queries, embeddings, and context.
 """
+import base64
 import hashlib
 from typing import Optional, List, Dict, Any
+import numpy as np
 from services.cache.cache_manager import cache_manager
 from utils.config import settings
 
 
+def _encode_embedding(embedding: List[float]) -> str:
+    """Pack an embedding as base64 float16 (~2 bytes/dim vs ~20 for a JSON float list)."""
+    return base64.b64encode(np.asarray(embedding, dtype=np.float16).tobytes()).decode("ascii")
+
+
+def _decode_embedding(value: Any) -> Optional[List[float]]:
+    """Unpack a cached embedding; plain lists are entries written before float16 packing."""
+    if value is None or isinstance(value, list):
+        return value
+    return np.frombuffer(base64.b64decode(value), dtype=np.float16).astype(np.float32).tolist()
+
+
 class RAGCache:
     """Caching layer for RAG operations."""
     
@@ -50,14 +64,30 @@ class RAGCache:
         ttl = ttl or settings.CACHE_TTL
         return self.cache.set(cache_key, results, ttl)
     
+    def _embedding_key(self, text: str) -> str:
+        """Cache key for a text's embedding."""
+        text_hash = hashlib.md5(text.encode()).hexdigest()
+        # Shortened vectors must not be served from (or into) the full-size cache entries
+        if settings.EMBEDDING_TRUNCATE_DIM:
+            return f"rag:embedding:{settings.EMBEDDING_TRUNCATE_DIM}:{text_hash}"
+        return f"rag:embedding:{text_hash}"
+    
     def get_embedding(self, text: str) -> Optional[List[float]]:
         """Get cached embedding for text."""
         if not self.cache.is_available():
             return None
         
-        text_hash = hashlib.md5(text.encode()).hexdigest()
-        cache_key = f"rag:embedding:{text_hash}"
-        return self.cache.get(cache_key)
+        return _decode_embedding(self.cache.get(self._embedding_key(text)))
+    
+    def get_embeddings_bulk(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Get cached embeddings for many texts in a single MGET (None where missing)."""
+        if not self.cache.is_available():
+            return [None] * len(texts)
+        
+        return [
+            _decode_embedding(value)
+            for value in self.cache.get_many([self._embedding_key(text) for text in texts])
+        ]
     
     def set_embedding(
         self,
@@ -69,10 +99,23 @@ class RAGCache:
         if not self.cache.is_available():
             return False
         
-        text_hash = hashlib.md5(text.encode()).hexdigest()
-        cache_key = f"rag:embedding:{text_hash}"
         ttl = ttl or settings.EMBEDDING_CACHE_TTL
-        return self.cache.set(cache_key, embedding, ttl)
+        return self.cache.set(self._embedding_key(text), _encode_embedding(embedding), ttl)
+    
+    def set_embeddings_bulk(
+        self,
+        embeddings: Dict[str, List[float]],
+        ttl: Optional[int] = None
+    ) -> bool:
+        """Cache embeddings for many texts ({text: embedding}) in one pipelined round-trip."""
+        if not self.cache.is_available():
+            return False
+        
+        ttl = ttl or settings.EMBEDDING_CACHE_TTL
+        return self.cache.set_many(
+            {self._embedding_key(text): _encode_embedding(embedding) for text, embedding in embeddings.items()},
+            ttl
+        )
     
     def get_chat_response(
         self,
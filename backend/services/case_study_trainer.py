@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 from rag.document_processor import document_processor
 from rag.index_builder import index_builder
 from rag.vector_store import vector_store_manager
+from rag.bm25_stats import corpus_bm25_stats
 from llama_index.core import Document, VectorStoreIndex, StorageContext
 from llama_index.core.schema import BaseNode
 
@@ -308,6 +309,7 @@ Project Description: {case_study.project_description}
                     storage_context=storage_context,
                     show_progress=False
                 )
+                corpus_bm25_stats.add_documents([node.get_content() for node in nodes])
                 
                 return {
                     "success": True,
@@ -4,14 +4,13 @@ Service layer for Proposal business logic.
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from sqlalchemy.orm import Session
-import sys
 from repositories.proposal_repository import ProposalRepository
 from repositories.project_repository import ProjectRepository
 from models.proposal import Proposal
 from models.project import Project
 from models.user import User
 from models.notification import Notification
-from utils.email_service import send_proposal_submission_email
+from utils.email_service import enqueue_proposal_submission_email
 
 
 class ProposalService:
@@ -163,27 +162,23 @@ class ProposalService:
             )
             self.db.add(notification)
             
-            # Send email notification
-            try:
-                await send_proposal_submission_email(
-                    manager_email=admin.email,
-                    manager_name=admin.full_name,
-                    proposal_title=proposal.title,
-                    submitter_name=user.full_name,
-                    submitter_message=message,
-                    proposal_id=proposal.id,
-                    project_id=project.id,
-                    project_name=project.name,
-                    client_name=project.client_name,
-                    industry=project.industry,
-                    region=project.region,
-                    proposal_sections=proposal_sections,
-                    template_type=proposal.template_type,
-                    submitted_at=submitted_at_str
-                )
-            except Exception as e:
-                # Error already logged in email_service with full details
-                print(f"[PROPOSAL SUBMISSION WARNING] Email notification failed for admin: {admin.email}, Proposal ID: {proposal.id}", file=sys.stderr, flush=True)
+            # Queue email notification (sent by the background email worker, failures logged there)
+            enqueue_proposal_submission_email(
+                manager_email=admin.email,
+                manager_name=admin.full_name,
+                proposal_title=proposal.title,
+                submitter_name=user.full_name,
+                submitter_message=message,
+                proposal_id=proposal.id,
+                project_id=project.id,
+                project_name=project.name,
+                client_name=project.client_name,
+                industry=project.industry,
+                region=project.region,
+                proposal_sections=proposal_sections,
+                template_type=proposal.template_type,
+                submitted_at=submitted_at_str
+            )
         
         self.db.commit()
         self.db.refresh(proposal)
@@ -2,7 +2,7 @@
 Proposal templates for different proposal types.
 """
 from typing import List, Dict, Any, Optional
-from workflows.agents.proposal_builder import proposal_builder_agent
+from workflows.agents.proposal_builder import get_proposal_builder_agent
 
 class ProposalTemplates:
     """Proposal templates with predefined sections."""
@@ -576,6 +576,29 @@ class ProposalTemplates:
         }
     ]
     
+    # Lookup tables built once at class creation instead of on every get_template() call
+    INDUSTRY_TEMPLATES = {
+        "bfsi": BFSI_TEMPLATE,
+        "financial": BFSI_TEMPLATE,
+        "banking": BFSI_TEMPLATE,
+        "healthcare": HEALTHCARE_TEMPLATE,
+        "medical": HEALTHCARE_TEMPLATE,
+        "retail": RETAIL_TEMPLATE,
+        "technology": TECHNOLOGY_TEMPLATE,
+        "tech": TECHNOLOGY_TEMPLATE,
+        "manufacturing": MANUFACTURING_TEMPLATE
+    }
+    
+    GENERIC_TEMPLATES = {
+        "executive": EXECUTIVE_TEMPLATE,
+        "full": FULL_TEMPLATE,
+        "one-page": ONE_PAGE_TEMPLATE,
+        "exclusive": EXCLUSIVE_TEMPLATE,
+        "short-pitch": SHORT_PITCH_TEMPLATE,
+        "executive-summary": EXECUTIVE_SUMMARY_TEMPLATE,
+        "technical-appendix": TECHNICAL_APPENDIX_TEMPLATE
+    }
+    
     @classmethod
     def get_template(cls, template_type: str, industry: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -586,44 +609,21 @@ class ProposalTemplates:
             industry: Optional industry for industry-specific templates
         
         Returns:
-            List of section dictionaries
+            List of section dictionaries (fresh copies - safe for callers to mutate)
         """
-        # Industry-specific templates
-        industry_templates = {
-            "bfsi": cls.BFSI_TEMPLATE,
-            "financial": cls.BFSI_TEMPLATE,
-            "banking": cls.BFSI_TEMPLATE,
-            "healthcare": cls.HEALTHCARE_TEMPLATE,
-            "medical": cls.HEALTHCARE_TEMPLATE,
-            "retail": cls.RETAIL_TEMPLATE,
-            "technology": cls.TECHNOLOGY_TEMPLATE,
-            "tech": cls.TECHNOLOGY_TEMPLATE,
-            "manufacturing": cls.MANUFACTURING_TEMPLATE,
-            "manufacturing": cls.MANUFACTURING_TEMPLATE
-        }
+        template = None
         
         # Check for industry-specific template first
         if industry:
-            industry_lower = industry.lower()
-            if industry_lower in industry_templates:
-                return industry_templates[industry_lower].copy()
-        
-        # Generic templates
-        templates = {
-            "executive": cls.EXECUTIVE_TEMPLATE,
-            "full": cls.FULL_TEMPLATE,
-            "one-page": cls.ONE_PAGE_TEMPLATE,
-            "exclusive": cls.EXCLUSIVE_TEMPLATE,
-            "short-pitch": cls.SHORT_PITCH_TEMPLATE,
-            "executive-summary": cls.EXECUTIVE_SUMMARY_TEMPLATE,
-            "technical-appendix": cls.TECHNICAL_APPENDIX_TEMPLATE
-        }
+            template = cls.INDUSTRY_TEMPLATES.get(industry.lower())
         
-        # Also check if template_type is an industry
-        if template_type.lower() in industry_templates:
-            return industry_templates[template_type.lower()].copy()
+        if template is None:
+            # Also check if template_type is an industry, then fall back to generic templates
+            template_type_lower = template_type.lower()
+            template = cls.INDUSTRY_TEMPLATES.get(template_type_lower) or cls.GENERIC_TEMPLATES.get(template_type_lower, cls.FULL_TEMPLATE)
         
-        return templates.get(template_type.lower(), cls.FULL_TEMPLATE).copy()
+        # Copy each section so populated content never leaks back into the shared class templates
+        return [section.copy() for section in template]
     
     @classmethod
     def populate_from_insights(
@@ -648,7 +648,7 @@ class ProposalTemplates:
         """
         sections = cls.get_template(template_type)
         
-        if use_ai and proposal_builder_agent.llm:
+        if use_ai and get_proposal_builder_agent().llm:
             # Use AI to generate full content for each section
             rfp_summary = insights.get("rfp_summary", "") or insights.get("executive_summary", "")
             challenges = insights.get("challenges", [])
@@ -810,7 +810,7 @@ Write professional, persuasive content for this section. Do not include the sect
         ])
         
         try:
-            chain = prompt | proposal_builder_agent.llm
+            chain = prompt | get_proposal_builder_agent().llm
             response = chain.invoke({
                 "section_title": section_title,
                 "rfp_summary": rfp_summary or "No summary available",
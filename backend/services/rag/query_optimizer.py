@@ -1,16 +1,43 @@
 """
 Query optimization for RAG: expansion, reranking, and hybrid search.
 """
+import asyncio
+import hashlib
+import heapq
+import json
+import threading
 from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from cachetools import LRUCache, TTLCache
 from utils.gemini_service import gemini_service
 from rag.embedding_service import embedding_service
+from rag.bm25_stats import LocalBM25, corpus_bm25_stats, tokenize
+from services.rag.semantic_cache import SemanticCache
 
 
 class QueryExpander:
     """Expand queries with synonyms and related terms."""
     
+    # Expansions are reused for repeated queries for an hour
+    CACHE_SIZE = 512
+    CACHE_TTL = 3600
+    
     def __init__(self):
         self.llm = gemini_service
+        self._cache: TTLCache = TTLCache(maxsize=self.CACHE_SIZE, ttl=self.CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        # Near-duplicate queries (cosine >= 0.95) reuse an earlier expansion
+        self._semantic_cache = SemanticCache(max_entries=1024, threshold=0.95)
+    
+    @staticmethod
+    def _query_embedding(query: str) -> Optional[List[float]]:
+        """Embedding for the semantic cache (cached, and reused by retrieval); None if unavailable."""
+        try:
+            if embedding_service.is_available():
+                return embedding_service.get_embedding(query)
+        except Exception:
+            pass
+        return None
     
     def expand(self, query: str, max_expansions: int = 3) -> List[str]:
         """
@@ -26,40 +53,49 @@ class QueryExpander:
         if not self.llm.is_available():
             return [query]
         
-        prompt = f"""Given the following query, generate {max_expansions} alternative phrasings or related terms that would help find the same information.
-
-Query: {query}
-
-Generate alternative phrasings that:
-1. Use synonyms or related terms
-2. Maintain the same intent
-3. Are concise (1-5 words each)
-
-Return only the alternative phrasings, one per line, without numbering or bullets."""
-
+        cache_key = (query, max_expansions)
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
+        query_embedding = self._query_embedding(query)
+        if query_embedding is not None:
+            similar = self._semantic_cache.get(query_embedding)
+            if similar is not None and len(similar) - 1 >= max_expansions:
+                # Keep the caller's own wording as the first variation
+                return [query] + [e for e in similar[1:max_expansions + 1] if e != query]
+        
+        # JSON mode: terse prompt, schema-constrained output, no line parsing
+        prompt = f"Return {max_expansions} short (1-5 word) alternative phrasings or synonyms with the same intent as: {query}"
+        
         try:
-            result = self.llm.generate_content(prompt, temperature=0.3)
-            if result.get("error"):
-                return [query]
-            
-            content = result.get("content", "")
-            if not content:
+            result = self.llm.generate_content(
+                prompt,
+                temperature=0.3,
+                response_mime_type="application/json",
+                response_schema={"type": "ARRAY", "items": {"type": "STRING"}}
+            )
+            if result.get("error") or not result.get("content"):
                 return [query]
             
-            # Parse expansions
-            expansions = [
-                line.strip()
-                for line in content.split('\n')
-                if line.strip() and len(line.strip()) < 100
-            ]
+            expansions = [e.strip() for e in json.loads(result["content"]) if isinstance(e, str) and e.strip()]
             
             # Limit and add original
-            expansions = expansions[:max_expansions]
-            return [query] + expansions
+            variations = [query] + expansions[:max_expansions]
+            with self._cache_lock:
+                self._cache[cache_key] = tuple(variations)
+            if query_embedding is not None:
+                self._semantic_cache.set(query_embedding, tuple(variations))
+            return variations
         
         except Exception as e:
             print(f"[WARNING] Query expansion failed: {e}")
             return [query]
+    
+    async def expand_async(self, query: str, max_expansions: int = 3) -> List[str]:
+        """Async variant of expand(); the blocking LLM call runs in a worker thread."""
+        return await asyncio.to_thread(self.expand, query, max_expansions)
 
 
 class QueryReranker:
@@ -109,25 +145,40 @@ class QueryReranker:
 class HybridSearcher:
     """Hybrid search combining keyword (BM25) and semantic search using Reciprocal Rank Fusion."""
     
+    # BM25 indexes kept for recently seen corpora (same retrieved set across reranking passes)
+    BM25_CACHE_SIZE = 128
+    
     def __init__(self):
         self.bm25_index = None
-        self._initialize()
+        self._bm25_cache: LRUCache = LRUCache(maxsize=self.BM25_CACHE_SIZE)
+        self._bm25_lock = threading.Lock()
     
-    def _initialize(self):
-        """Initialize BM25 index."""
-        try:
-            from rank_bm25 import BM25Okapi
-            # We'll build this dynamically per query
-            self.bm25_available = True
-        except ImportError:
-            print("[WARNING] rank-bm25 not available. Install with: pip install rank-bm25")
-            self.bm25_available = False
+    @staticmethod
+    def _corpus_key(texts: List[str]) -> bytes:
+        """Order-sensitive content hash of a corpus (BM25 scores are positional)."""
+        digest = hashlib.blake2b(digest_size=16)
+        for text in texts:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.digest()
+    
+    def _get_bm25(self, texts: List[str]):
+        """Return a BM25 index for the corpus, building and caching it on a miss."""
+        key = self._corpus_key(texts)
+        with self._bm25_lock:
+            bm25 = self._bm25_cache.get(key)
+        if bm25 is None:
+            bm25 = LocalBM25(texts)
+            with self._bm25_lock:
+                self._bm25_cache[key] = bm25
+        return bm25
     
     def reciprocal_rank_fusion(
         self,
         semantic_rankings: List[Dict[str, Any]],
         bm25_rankings: List[Dict[str, Any]],
-        k: int = 60
+        k: int = 60,
+        top_k: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Combine rankings using Reciprocal Rank Fusion (RRF).
@@ -137,9 +188,10 @@ class HybridSearcher:
             semantic_rankings: Documents ranked by semantic similarity with 'text' identifier
             bm25_rankings: Documents ranked by BM25 with 'text' identifier
             k: RRF constant (typically 60)
+            top_k: Return only the top K fused results (None for all)
         
         Returns:
-            RRF-fused rankings
+            RRF-fused rankings (scores are written onto the input dicts)
         """
         # Create score maps
         semantic_scores = {}
@@ -163,19 +215,22 @@ class HybridSearcher:
         for doc in semantic_rankings + bm25_rankings:
             doc_id = doc.get('text', '')[:200]
             if doc_id not in all_docs_map:
-                all_docs_map[doc_id] = doc.copy()
+                all_docs_map[doc_id] = doc
         
         # Calculate RRF for each document
         for doc_id in all_doc_ids:
             rrf_score = semantic_scores.get(doc_id, 0.0) + bm25_scores.get(doc_id, 0.0)
             rrf_scores[doc_id] = rrf_score
         
-        # Sort by RRF score and return
-        sorted_items = sorted(rrf_scores.items(), key=lambda x: x[1], reverse=True)
+        # Sort by RRF score and return (partial selection when only the top few are wanted)
+        if top_k and top_k < len(rrf_scores) // 2:
+            sorted_items = heapq.nlargest(top_k, rrf_scores.items(), key=lambda x: x[1])
+        else:
+            sorted_items = sorted(rrf_scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
         
         results = []
         for doc_id, rrf_score in sorted_items:
-            doc = all_docs_map[doc_id].copy()
+            doc = all_docs_map[doc_id]
             doc['hybrid_score'] = rrf_score
             doc['rrf_score'] = rrf_score
             doc['semantic_rank_score'] = semantic_scores.get(doc_id, 0.0)
@@ -190,7 +245,8 @@ class HybridSearcher:
         documents: List[Dict[str, Any]],
         semantic_scores: List[float],
         use_rrf: bool = True,
-        alpha: float = 0.5
+        alpha: float = 0.5,
+        top_k: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Combine keyword (BM25) and semantic scores using RRF (recommended) or linear combination.
@@ -201,72 +257,62 @@ class HybridSearcher:
             semantic_scores: Semantic similarity scores
             use_rrf: Use Reciprocal Rank Fusion (True) or linear combination (False)
             alpha: Weight for semantic when using linear combination (1-alpha for BM25)
+            top_k: Return only the top K results (None for all)
         
         Returns:
-            Documents with combined scores
+            Documents with combined scores (scores are written onto the input dicts)
         """
-        if not self.bm25_available or not documents:
-            # Return with semantic scores only
-            for doc, score in zip(documents, semantic_scores):
-                doc['hybrid_score'] = score
+        if not documents:
             return documents
         
         try:
-            from rank_bm25 import BM25Okapi
-            
-            # Build BM25 index
             texts = [doc.get('text', '') for doc in documents]
-            tokenized_texts = [text.lower().split() for text in texts]
-            bm25 = BM25Okapi(tokenized_texts)
             
-            # Get BM25 scores
-            tokenized_query = query.lower().split()
-            bm25_scores_list = bm25.get_scores(tokenized_query)
-            
-            # Create rankings from scores
-            semantic_ranked = sorted(
-                zip(documents, semantic_scores),
-                key=lambda x: x[1],
-                reverse=True
-            )
-            semantic_rankings = [doc for doc, _ in semantic_ranked]
+            # Score with corpus-wide IDF when ingest stats exist, else BM25 over just the retrieved set
+            bm25_scores_list = corpus_bm25_stats.score(query, texts)
+            if bm25_scores_list is None:
+                bm25 = self._get_bm25(texts)
+                bm25_scores_list = bm25.get_scores(tokenize(query))
             
-            bm25_ranked = sorted(
-                zip(documents, bm25_scores_list),
-                key=lambda x: x[1],
-                reverse=True
-            )
-            bm25_rankings = [doc for doc, _ in bm25_ranked]
+            sem_arr = np.array(semantic_scores, dtype=np.float64)
+            bm25_arr = np.asarray(bm25_scores_list, dtype=np.float64)
             
             # Use RRF if enabled (recommended)
             if use_rrf:
-                results = self.reciprocal_rank_fusion(semantic_rankings, bm25_rankings)
+                # Stable descending order, same tie-breaking as sorted(..., reverse=True)
+                semantic_rankings = [documents[i] for i in np.argsort(-sem_arr, kind="stable")]
+                bm25_rankings = [documents[i] for i in np.argsort(-bm25_arr, kind="stable")]
+                results = self.reciprocal_rank_fusion(semantic_rankings, bm25_rankings, top_k=top_k)
                 return results
             
             # Fallback to linear combination
-            # Normalize scores to [0, 1]
-            if max(bm25_scores_list) > 0:
-                bm25_scores_norm = [s / max(bm25_scores_list) for s in bm25_scores_list]
-            else:
-                bm25_scores_norm = bm25_scores_list
+            # Normalize scores to [0, 1] (left as-is when the max is not positive)
+            bm25_max = bm25_arr.max()
+            if bm25_max > 0:
+                bm25_arr /= bm25_max
+            sem_max = sem_arr.max()
+            if sem_max > 0:
+                sem_arr /= sem_max
             
-            if max(semantic_scores) > 0:
-                semantic_scores_norm = [s / max(semantic_scores) for s in semantic_scores]
-            else:
-                semantic_scores_norm = semantic_scores
+            hybrid_arr = alpha * sem_arr + (1 - alpha) * bm25_arr
             
-            # Combine scores
+            # Sort by hybrid score, then build the result dicts in ranked order
+            hybrid_scores = hybrid_arr.tolist()
+            bm25_norm = bm25_arr.tolist()
+            sem_norm = sem_arr.tolist()
             results = []
-            for doc, bm25_score, sem_score in zip(documents, bm25_scores_norm, semantic_scores_norm):
-                hybrid_score = alpha * sem_score + (1 - alpha) * bm25_score
-                doc_copy = doc.copy()
-                doc_copy['hybrid_score'] = hybrid_score
-                doc_copy['bm25_score'] = bm25_score
-                doc_copy['semantic_score'] = sem_score
-                results.append(doc_copy)
-            
-            # Sort by hybrid score
-            results.sort(key=lambda x: x['hybrid_score'], reverse=True)
+            if top_k and top_k < len(hybrid_arr) // 2:
+                # Select the top K in O(N), then order just those
+                top_idx = np.argpartition(-hybrid_arr, top_k)[:top_k]
+                ranked = top_idx[np.argsort(-hybrid_arr[top_idx], kind="stable")]
+            else:
+                ranked = np.argsort(-hybrid_arr, kind="stable")[:top_k]
+            for i in ranked.tolist():
+                doc = documents[i]
+                doc['hybrid_score'] = hybrid_scores[i]
+                doc['bm25_score'] = bm25_norm[i]
+                doc['semantic_score'] = sem_norm[i]
+                results.append(doc)
             return results
         
         except Exception as e:
@@ -300,6 +346,12 @@ class QueryOptimizer:
             return self.expander.expand(query)
         return [query]
     
+    async def optimize_query_async(self, query: str, use_expansion: bool = True) -> List[str]:
+        """Async variant of optimize_query() for callers on the event loop."""
+        if use_expansion:
+            return await self.expander.expand_async(query)
+        return [query]
+    
     def optimize_results(
         self,
         query: str,
@@ -332,7 +384,7 @@ class QueryOptimizer:
         if use_hybrid and results and 'score' in results[0]:
             semantic_scores = [r.get('score', 0.0) for r in results]
             # Use RRF by default for better results
-            results = self.hybrid_searcher.hybrid_search(query, results, semantic_scores, use_rrf=True)
+            results = self.hybrid_searcher.hybrid_search(query, results, semantic_scores, use_rrf=True, top_k=top_k)
         
         # Return top_k
         if top_k:
@@ -4,15 +4,31 @@ Supports Cohere Rerank (best quality) and BGE-Reranker (open-source).
 """
 from typing import List, Dict, Any, Optional
 from utils.config import settings
+import heapq
 import sys
+import threading
 
 class RerankingService:
     """Service for reranking retrieval results to improve relevance."""
     
+    # Query-document pairs per CrossEncoder forward pass
+    PREDICT_BATCH_SIZE = 64
+    
     def __init__(self):
         self.reranker = None
         self.provider = None
-        self._initialize()
+        # The cross-encoder is loaded on first use (not at import) so it doesn't slow down startup
+        self._loaded = False
+        self._load_lock = threading.Lock()
+    
+    def _ensure_loaded(self):
+        """Load the reranker once; concurrent first callers wait for the same load."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._initialize()
+                self._loaded = True
     
     def _initialize(self):
         """Initialize reranking model - Cohere (best) or BGE-Reranker (open-source)."""
@@ -34,9 +50,11 @@ class RerankingService:
             from sentence_transformers import CrossEncoder
             # Use BGE reranker model
             model_name = "BAAI/bge-reranker-base"  # Can upgrade to "BAAI/bge-reranker-large"
-            self.reranker = CrossEncoder(model_name)
+            device = self._cross_encoder_device()
+            self.reranker = CrossEncoder(model_name, device=device)
+            precision = self._optimize_cross_encoder(device)
             self.provider = "bge"
-            print(f"[OK] Reranking service initialized: BGE-Reranker ({model_name})")
+            print(f"[OK] Reranking service initialized: BGE-Reranker ({model_name}, {device} {precision})")
         except ImportError:
             print("[WARNING] sentence-transformers not available for reranking")
             print("   Install: pip install sentence-transformers")
@@ -45,8 +63,35 @@ class RerankingService:
             print(f"[WARNING] Failed to initialize BGE reranker: {e}")
             self.reranker = None
     
+    @staticmethod
+    def _cross_encoder_device() -> str:
+        """Rerank on GPU when CUDA is available, else CPU."""
+        try:
+            import torch
+            if torch.cuda.is_available():
+                return "cuda"
+        except ImportError:
+            pass
+        return "cpu"
+    
+    def _optimize_cross_encoder(self, device: str) -> str:
+        """fp16 weights on GPU, dynamic int8 Linear layers on CPU. Returns the precision in use."""
+        try:
+            import torch
+            if device == "cuda":
+                self.reranker.model.half()
+                return "fp16"
+            self.reranker.model = torch.quantization.quantize_dynamic(
+                self.reranker.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            return "int8"
+        except Exception as e:
+            print(f"[WARNING] Reranker precision optimization skipped, using fp32: {e}")
+            return "fp32"
+    
     def is_available(self) -> bool:
         """Check if reranking service is available."""
+        self._ensure_loaded()
         return self.reranker is not None
     
     def rerank(
@@ -65,6 +110,7 @@ class RerankingService:
         
         Returns:
             Reranked list of documents with 'text', 'rerank_score', 'metadata'
+            (scores are written onto the input dicts)
         """
         if not self.is_available():
             return documents  # Return as-is if reranking unavailable
@@ -85,6 +131,15 @@ class RerankingService:
             traceback.print_exc(file=sys.stderr)
             return documents  # Return original on error
     
+    @staticmethod
+    def _set_rerank_score(doc: Dict[str, Any], rerank_score: float) -> Dict[str, Any]:
+        """Attach the rerank score to the caller's dict in place (no per-document copy)."""
+        doc.setdefault('text', '')
+        doc.setdefault('score', 0.0)  # Original score
+        doc.setdefault('metadata', {})
+        doc['rerank_score'] = rerank_score
+        return doc
+    
     def _rerank_cohere(
         self,
         query: str,
@@ -119,13 +174,7 @@ class RerankingService:
             original_idx = result.index
             original_doc = documents[original_idx]
             
-            reranked.append({
-                'text': original_doc.get('text', ''),
-                'rerank_score': result.relevance_score,
-                'score': original_doc.get('score', 0.0),  # Original score
-                'metadata': original_doc.get('metadata', {}),
-                **{k: v for k, v in original_doc.items() if k not in ['text', 'score', 'metadata']}
-            })
+            reranked.append(self._set_rerank_score(original_doc, result.relevance_score))
         
         return reranked
     
@@ -140,18 +189,22 @@ class RerankingService:
         pairs = [[query, doc.get('text', '')] for doc in documents]
         
         # Get rerank scores
-        scores = self.reranker.predict(pairs)
+        scores = self.reranker.predict(
+            pairs,
+            batch_size=self.PREDICT_BATCH_SIZE,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
         
         # Combine with original documents
-        scored_docs = []
-        for doc, score in zip(documents, scores):
-            scored_docs.append({
-                'text': doc.get('text', ''),
-                'rerank_score': float(score),
-                'score': doc.get('score', 0.0),
-                'metadata': doc.get('metadata', {}),
-                **{k: v for k, v in doc.items() if k not in ['text', 'score', 'metadata']}
-            })
+        scored_docs = [
+            self._set_rerank_score(doc, float(score))
+            for doc, score in zip(documents, scores)
+        ]
+        
+        # Partial selection (O(N log k)) when only a few of many results are wanted
+        if top_k and top_k < len(scored_docs) // 2:
+            return heapq.nlargest(top_k, scored_docs, key=lambda x: x['rerank_score'])
         
         # Sort by rerank score (descending)
         scored_docs.sort(key=lambda x: x['rerank_score'], reverse=True)
@@ -0,0 +1,61 @@
+"""
+In-process semantic cache: looks values up by query embedding with a cosine-similarity
+threshold, so near-duplicate queries ("cloud migration plan" / "plan for cloud migration")
+share one result.
+"""
+import threading
+from typing import Any, List, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """Fixed-capacity cache keyed by normalized embeddings; least recently used entries are evicted."""
+
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._embeddings: Optional[np.ndarray] = None  # (max_entries, dim), allocated on first set
+        self._values: List[Any] = [None] * max_entries
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._size = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(self, embedding: List[float]) -> Optional[Any]:
+        """Value of the most similar cached query, if its cosine similarity clears the threshold."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._size == 0 or self._embeddings.shape[1] != vector.shape[0]:
+                return None
+            sims = self._embeddings[:self._size] @ vector
+            best = int(sims.argmax())
+            if sims[best] < self.threshold:
+                return None
+            self._clock += 1
+            self._last_used[best] = self._clock
+            return self._values[best]
+
+    def set(self, embedding: List[float], value: Any):
+        """Cache a value under a query embedding, evicting the least recently used entry when full."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._embeddings is None or self._embeddings.shape[1] != vector.shape[0]:
+                # First entry, or the embedding model changed: start over at the new dimension
+                self._embeddings = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._size = 0
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(self._last_used.argmin())
+            self._clock += 1
+            self._embeddings[slot] = vector
+            self._values[slot] = value
+            self._last_used[slot] = self._clock
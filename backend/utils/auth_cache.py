@@ -0,0 +1,42 @@
+"""
+In-process cache of verified auth tokens for the WebSocket connect path.
+Avoids re-verifying the JWT and re-querying the user on every (re)connect.
+
+A cached entry is trusted until it expires, so a role change or deactivation reaches
+WebSocket auth only after up to AUTH_CACHE_TTL seconds (60s).
+"""
+import hashlib
+import threading
+import time
+from typing import Optional, Tuple
+from cachetools import TTLCache
+
+# Entries are short-lived so deactivated users lose access quickly
+AUTH_CACHE_TTL = 60
+AUTH_CACHE_MAX_SIZE = 10_000
+
+_token_cache: TTLCache = TTLCache(maxsize=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL)
+_lock = threading.Lock()
+
+def _token_key(token: str) -> bytes:
+    """Hash the token so raw JWTs are never kept as dict keys."""
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+def get_cached_token_user(token: str) -> Optional[Tuple[int, str]]:
+    """Return (user_id, role) for a previously verified token, or None."""
+    key = _token_key(token)
+    with _lock:
+        entry = _token_cache.get(key)
+        if entry is None:
+            return None
+        user_id, role, expires_at = entry
+        # Never serve a token past its own expiry, even if the cache TTL hasn't elapsed
+        if expires_at is not None and expires_at <= time.time():
+            _token_cache.pop(key, None)
+            return None
+        return user_id, role
+
+def cache_token_user(token: str, user_id: int, role: str, expires_at: Optional[float] = None):
+    """Remember a verified token's user until the cache TTL or the token's exp, whichever is first."""
+    with _lock:
+        _token_cache[_token_key(token)] = (user_id, role, expires_at)
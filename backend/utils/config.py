@@ -1,7 +1,10 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
+    # Logging
+    LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR
+    
     # API Settings
     API_V1_PREFIX: str = "/api/v1"
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -29,14 +32,23 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str = ""
     LLM_PROVIDER: str = "gemini"  # "gemini" or "openai"
     GEMINI_MODEL: str = "gemini-2.0-flash"
+    LLM_BATCH_MAX_CONCURRENCY: int = 8  # Concurrent LLM calls per agent *_batch() call
+    WORKFLOW_FUSED_ANALYSIS: bool = False  # One LLM call for RFP analysis + challenges + discovery questions
     
     # Embedding Model Configuration
     EMBEDDING_PROVIDER: str = "openai"  # "openai" or "huggingface"
     EMBEDDING_MODEL: str = "text-embedding-3-large"  # OpenAI model or HuggingFace model name
+    EMBEDDING_BACKEND: str = "torch"  # HuggingFace runtime: "torch" or "onnx" (int8 ONNX Runtime, needs optimum)
+    EMBEDDING_DIM: Optional[int] = None  # Known embedding dimension; skips the startup probe when set
+    EMBEDDING_TRUNCATE_DIM: Optional[int] = None  # Matryoshka shortening (e.g. 512) for text-embedding-3-*; changing it needs recreate_collection
     
     # Legacy OpenAI (optional fallback)
     OPENAI_API_KEY: str = ""
     ANTHROPIC_API_KEY: str = ""
+    # Self-hosted OpenAI-compatible gateway (vLLM --enable-prefix-caching or SGLang); takes every task when set
+    LOCAL_LLM_BASE_URL: str = ""  # e.g. http://localhost:8000/v1
+    LOCAL_LLM_MODEL: str = ""
+    LOCAL_LLM_API_KEY: str = ""
     COHERE_API_KEY: str = ""  # For reranking
     SERPAPI_API_KEY: str = ""  # For web search (optional, DuckDuckGo is free)
     GOOGLE_SEARCH_API_KEY: str = ""  # Google Custom Search API key
@@ -71,6 +83,11 @@ class Settings(BaseSettings):
     MAIL_FROM: str = ""
     MAIL_TLS: bool = True
     MAIL_SSL: bool = False
+    SMTP_POOL_SIZE: int = 5  # Concurrent SMTP connections for outbound mail
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100  # Recycle a connection after this many sends (provider caps)
+    SMTP_IDLE_TIMEOUT_SECONDS: int = 60  # Close pooled connections unused for this long
+    EMAIL_RATE_LIMIT_PER_MINUTE: int = 100  # Outbound sends per minute (0 = unlimited)
+    EMAIL_DAILY_LIMIT: int = 500  # Outbound sends per 24h, e.g. Gmail's cap; sends over it fail (0 = unlimited)
     
     @property
     def mail_server(self) -> str:
@@ -108,13 +125,16 @@ class Settings(BaseSettings):
     CORS_ORIGINS: str = "http://localhost:8080,http://localhost:5173,http://127.0.0.1:8080"
     ALLOWED_HOSTS: str = "*"  # Comma-separated string in .env
     
-    # Database Pool Controls (PgBouncer-friendly)
-    DB_POOL_SIZE: int = 5               # keep low to avoid hitting PgBouncer pool
-    DB_MAX_OVERFLOW: int = 0            # avoid burst connections
+    # Database Pool Controls (sized for the threadpool that runs sync handlers)
+    DB_POOL_SIZE: int = 20              # persistent connections kept open
+    DB_MAX_OVERFLOW: int = 40           # extra burst connections above pool_size
     DB_POOL_TIMEOUT: int = 30           # seconds to wait for a pool connection
-    DB_POOL_RECYCLE: int = 1800         # recycle connections every 30 min
+    DB_POOL_RECYCLE: int = 3600         # recycle connections every 60 min
+    DB_POOL_USE_LIFO: bool = True       # reuse the most recent connection so idle ones can expire
     DB_USE_NULLPOOL: bool = False       # set true to delegate pooling to PgBouncer
     DB_CONNECT_TIMEOUT: int = 5         # seconds for TCP connect timeout
+    RUN_MIGRATIONS_ON_STARTUP: bool = True  # create_all + db/migrate_* on boot; set false once the schema is managed out-of-band
+    PROPOSAL_STATS_REFRESH_SECONDS: int = 300  # mv_proposal_stats refresh interval (admin analytics)
     
     # Redis Cache Configuration
     REDIS_HOST: str = "localhost"
@@ -7,11 +7,14 @@ from utils.security import decode_token
 
 security = HTTPBearer()
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get the current authenticated user from JWT token."""
+    """
+    Get the current authenticated user from JWT token.
+    Sync on purpose: FastAPI runs it in the threadpool so the DB lookup doesn't block the event loop.
+    """
     token = credentials.credentials
     
     # Decode token
@@ -1,40 +1,220 @@
 """
 Email service for sending verification emails using Google SMTP.
 """
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from aiolimiter import AsyncLimiter
+from fastapi_mail import MessageSchema, ConnectionConfig
+from fastapi_mail.msg import MailMsg
+from jinja2 import DictLoader, Environment
+from markupsafe import Markup
 from utils.config import settings
-from datetime import datetime
-import traceback
-import sys
+from itertools import islice
+from typing import List, Optional, Tuple
+import aiosmtplib
+import asyncio
+import html
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Email configuration for Google SMTP
 # Google SMTP settings: smtp.gmail.com, port 587, STARTTLS
 # Lazy initialization - only create config when email is actually configured
 _conf = None
+# Settings don't change at runtime, so whether email is configured is decided once
+_EMAIL_CONFIGURED = bool(settings.mail_from and settings.mail_username and settings.mail_password)
 
-def _log_email_error(email_type: str, recipient: str, error: Exception, context: str = ""):
-    """Log email sending errors with full details."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    error_type = type(error).__name__
-    error_msg = str(error)
+# HTML email bodies, compiled once at import (autoescaped, so user-supplied text can't inject markup)
+VERIFY_EMAIL_TEMPLATE = """
+<html>
+<body>
+    <h2>Welcome to NovaIntel!</h2>
+    <p>Please verify your email address by clicking the link below:</p>
+    <p><a href="{{ verification_url }}">Verify Email</a></p>
+    <p>Or copy this link: {{ verification_url }}</p>
+    <p>This link will expire in 7 days.</p>
+</body>
+</html>
+"""
+
+RESET_PASSWORD_TEMPLATE = """
+<html>
+<body>
+    <h2>Password Reset Request</h2>
+    <p>You requested to reset your password. Click the link below to set a new password:</p>
+    <p><a href="{{ reset_url }}">Reset Password</a></p>
+    <p>Or copy this link: {{ reset_url }}</p>
+    <p>This link will expire in 7 days.</p>
+    <p>If you didn't request this, please ignore this email.</p>
+</body>
+</html>
+"""
+
+PROPOSAL_SUBMISSION_TEMPLATE = """
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 700px; margin: 0 auto; padding: 20px;">
+        <h2 style="color: #2563eb; border-bottom: 2px solid #2563eb; padding-bottom: 10px;">New Proposal Submitted for Review</h2>
+        
+        <p>Hello {{ manager_name }},</p>
+        
+        <p>A new proposal has been submitted and requires your review:</p>
+        
+        <div style="background-color: #f3f4f6; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #2563eb;">
+            <h3 style="margin-top: 0; color: #1e40af;">Proposal Details</h3>
+            <p style="margin: 8px 0;"><strong>Proposal Title:</strong> {{ proposal_title }}</p>
+            <p style="margin: 8px 0;"><strong>Proposal ID:</strong> #{{ proposal_id or 'N/A' }}</p>
+            <p style="margin: 8px 0;"><strong>Template Type:</strong> {{ template_type }}</p>
+            <p style="margin: 8px 0;"><strong>Submitted At:</strong> {{ submitted_date }}</p>
+            
+            <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
+            
+            <h3 style="color: #1e40af;">Project Information</h3>
+            <p style="margin: 8px 0;"><strong>Project:</strong> {{ project_name or 'N/A' }}</p>
+            <p style="margin: 8px 0;"><strong>Client:</strong> {{ client_name or 'N/A' }}</p>
+            <p style="margin: 8px 0;"><strong>Industry:</strong> {{ industry or 'N/A' }}</p>
+            <p style="margin: 8px 0;"><strong>Region:</strong> {{ region or 'N/A' }}</p>
+            <p style="margin: 8px 0;"><strong>Project ID:</strong> #{{ project_id or 'N/A' }}</p>
+            
+            <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
+            
+            <h3 style="color: #1e40af;">Submitter Information</h3>
+            <p style="margin: 8px 0;"><strong>Submitted By:</strong> {{ submitter_name }}</p>
+            {% if submitter_message %}<p style="margin: 8px 0;"><strong>Message from Submitter:</strong></p><p style="margin: 8px 0; padding: 10px; background-color: #ffffff; border-radius: 4px; font-style: italic;">{{ submitter_message }}</p>{% endif %}
+            
+            {% if sections %}
+            <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
+            <div style='margin: 20px 0;'>
+                <h3 style='color: #1e40af; margin-bottom: 15px;'>Proposal Preview ({{ total_sections }} sections)</h3>
+                {% for section in sections %}
+                <div style='background-color: #ffffff; border: 1px solid #e5e7eb; border-radius: 6px; padding: 15px; margin-bottom: 15px;'>
+                    <h4 style='color: #1e40af; margin: 0 0 10px 0; font-size: 16px; font-weight: 600;'>{{ section.title }}</h4>
+                    <div style='color: #374151; font-size: 14px; line-height: 1.6;'>
+                        <p style="margin: 8px 0;">{{ section.content_html }}</p>
+                    </div>
+                </div>
+                {% endfor %}
+                {% if total_sections > sections|length %}
+                <p style='color: #6b7280; font-size: 14px; margin-top: 10px;'>... and {{ total_sections - sections|length }} more sections (view full proposal in dashboard)</p>
+                {% endif %}
+            </div>
+            {% endif %}
+        </div>
+        
+        <p style="font-size: 16px; font-weight: 500;">Please review the proposal and provide your feedback.</p>
+        
+        <div style="margin: 30px 0; text-align: center;">
+            <a href="{{ admin_dashboard_url }}" 
+               style="background-color: #2563eb; color: white; padding: 14px 28px; 
+                      text-decoration: none; border-radius: 6px; display: inline-block; 
+                      font-weight: bold; font-size: 16px;">
+                Review Proposal Now
+            </a>
+        </div>
+        
+        <p style="color: #6b7280; font-size: 14px; margin-top: 30px;">
+            Or <a href="{{ login_url }}" style="color: #2563eb; text-decoration: underline;">login to your account</a> to access the admin dashboard.
+        </p>
+        
+        <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
+        
+        <p style="color: #6b7280; font-size: 12px;">
+            This is an automated notification from NovaIntel. 
+            Please do not reply to this email.
+        </p>
+    </div>
+</body>
+</html>
+"""
+
+_template_env = Environment(
+    loader=DictLoader({
+        "verify": VERIFY_EMAIL_TEMPLATE,
+        "reset": RESET_PASSWORD_TEMPLATE,
+        "proposal_submission": PROPOSAL_SUBMISSION_TEMPLATE,
+    }),
+    autoescape=True,
+    auto_reload=False
+)
+_VERIFY_TEMPLATE = _template_env.get_template("verify")
+_RESET_TEMPLATE = _template_env.get_template("reset")
+# Links that don't vary per message are bound into the template once
+_PROPOSAL_TEMPLATE = _template_env.get_template(
+    "proposal_submission",
+    globals={
+        "login_url": f"{settings.FRONTEND_URL}/login",
+        "admin_dashboard_url": f"{settings.FRONTEND_URL}/admin/proposals",
+    }
+)
+
+def _md_bold(line: str) -> str:
+    """**bold** -> <strong>: split on the marker and wrap every other piece (an unpaired marker stays literal)."""
+    parts = line.split('**')
+    if len(parts) == 1:
+        return line
+    out = [parts[0]]
+    for i in range(1, len(parts) - 1, 2):
+        out.append(f"<strong>{parts[i]}</strong>" if parts[i] else "****")
+        out.append(parts[i + 1])
+    if len(parts) % 2 == 0:
+        out.append('**' + parts[-1])
+    return ''.join(out)
+
+def _md_italic(line: str) -> str:
+    """*italic* -> <em>: pair up lone asterisks (not part of a ** run) left to right."""
+    last = len(line) - 1
+    stars = [
+        i for i, char in enumerate(line)
+        if char == '*' and (i == 0 or line[i - 1] != '*') and (i == last or line[i + 1] != '*')
+    ]
+    if len(stars) < 2:
+        return line
+    out = []
+    prev = 0
+    for open_idx, close_idx in zip(stars[::2], stars[1::2]):
+        out.append(line[prev:open_idx])
+        out.append(f"<em>{line[open_idx + 1:close_idx]}</em>")
+        prev = close_idx + 1
+    out.append(line[prev:])
+    return ''.join(out)
+
+def _md_bold_italic(text: str) -> str:
+    """Convert markdown-like **bold** and *italic* in one pass per line (markers never span lines)."""
+    if '*' not in text:
+        return text
+    return '\n'.join(_md_italic(_md_bold(line)) for line in text.split('\n'))
+
+_EMPTY_PREVIEW = Markup("No content available")
+
+def _preview_html(content: str) -> Markup:
+    """Escape a section's first 500 chars and convert **bold**, *italic* and line breaks to HTML."""
+    if not content:
+        return _EMPTY_PREVIEW
+    # Truncate before any per-character work
+    content_preview = content[:500] + "..." if len(content) > 500 else content
     
-    print(f"\n{'='*60}", file=sys.stderr, flush=True)
-    print(f"[EMAIL ERROR] {timestamp}", file=sys.stderr, flush=True)
-    print(f"{'='*60}", file=sys.stderr, flush=True)
-    print(f"Email Type: {email_type}", file=sys.stderr, flush=True)
-    print(f"Recipient: {recipient}", file=sys.stderr, flush=True)
-    if context:
-        print(f"Context: {context}", file=sys.stderr, flush=True)
-    print(f"Error Type: {error_type}", file=sys.stderr, flush=True)
-    print(f"Error Message: {error_msg}", file=sys.stderr, flush=True)
-    print(f"\nFull Traceback:", file=sys.stderr, flush=True)
-    traceback.print_exc(file=sys.stderr)
-    print(f"{'='*60}\n", file=sys.stderr, flush=True)
+    content_html = html.escape(content_preview)
+    content_html = _md_bold_italic(content_html)
+    content_html = content_html.replace('\n\n', '</p><p style="margin: 8px 0;">')
+    content_html = content_html.replace('\n', '<br>')
+    # Already escaped above, so mark it safe for the autoescaping template
+    return Markup(content_html)
+
+def _log_email_error(email_type: str, recipient: str, error: Exception, context: str = ""):
+    """Log an email sending failure with full details (one record, one write)."""
+    logger.error(
+        "Email send failed\nEmail Type: %s\nRecipient: %s%s\nError Type: %s\nError Message: %s",
+        email_type,
+        recipient,
+        f"\nContext: {context}" if context else "",
+        type(error).__name__,
+        error,
+        exc_info=(type(error), error, error.__traceback__)
+    )
 
 def get_email_config():
     """Get or create email configuration. Returns None if email is not configured."""
     global _conf
-    if _conf is None and settings.mail_from and settings.mail_username and settings.mail_password:
+    if _conf is None and _EMAIL_CONFIGURED:
         _conf = ConnectionConfig(
             MAIL_USERNAME=settings.mail_username,
             MAIL_PASSWORD=settings.mail_password,
@@ -49,78 +229,259 @@ def get_email_config():
         )
     return _conf
 
-async def send_verification_email(email: str, verification_token: str):
-    """Send email verification link via Google SMTP."""
-    try:
-        conf = get_email_config()
-        if not conf:
-            print(f"[EMAIL WARNING] Email service not configured. Cannot send verification email to: {email}", file=sys.stderr, flush=True)
-            print(f"Verification link (manual): {settings.FRONTEND_URL}/verify-email?token={verification_token}", file=sys.stderr, flush=True)
-            return
-        
-        verification_url = f"{settings.FRONTEND_URL}/verify-email?token={verification_token}"
-        
-        message = MessageSchema(
-            subject="Verify your NovaIntel account",
-            recipients=[email],
-            body=f"""
-            <html>
-            <body>
-                <h2>Welcome to NovaIntel!</h2>
-                <p>Please verify your email address by clicking the link below:</p>
-                <p><a href="{verification_url}">Verify Email</a></p>
-                <p>Or copy this link: {verification_url}</p>
-                <p>This link will expire in 7 days.</p>
-            </body>
-            </html>
-            """,
-            subtype="html"
+# SMTP connection pool: the TCP connect + STARTTLS + AUTH handshake dominates per-message cost,
+# so authenticated connections are kept open and reused. Up to SMTP_POOL_SIZE sends run in
+# parallel, and each connection is recycled after SMTP_MAX_MESSAGES_PER_CONNECTION messages
+# to stay under provider per-connection limits
+SMTP_NOOP_AFTER_IDLE_SECONDS = 30
+
+class _PooledConnection:
+    """An authenticated SMTP connection plus the bookkeeping the pool needs."""
+    
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.sent_count = 0
+        self.last_used = asyncio.get_running_loop().time()
+    
+    async def quit(self):
+        try:
+            if self.smtp.is_connected:
+                await self.smtp.quit()
+        except aiosmtplib.SMTPException:
+            self.smtp.close()
+
+class SMTPPool:
+    """Bounded pool of persistent SMTP connections, created lazily and recycled by message count."""
+    
+    def __init__(self, max_size: int, max_messages_per_connection: int):
+        self.max_size = max_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle: List[_PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+    
+    @staticmethod
+    async def _connect(conf: ConnectionConfig) -> _PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=conf.MAIL_SERVER,
+            port=conf.MAIL_PORT,
+            use_tls=conf.MAIL_SSL_TLS,
+            start_tls=conf.MAIL_STARTTLS,
+            validate_certs=conf.VALIDATE_CERTS,
+            timeout=conf.TIMEOUT
         )
-        
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        print(f"[EMAIL SUCCESS] Verification email sent to: {email}", file=sys.stderr, flush=True)
-    except Exception as e:
-        _log_email_error("Verification Email", email, e, "User Registration")
-        raise
+        await smtp.connect()
+        if conf.USE_CREDENTIALS:
+            await smtp.login(conf.MAIL_USERNAME, conf.MAIL_PASSWORD.get_secret_value())
+        return _PooledConnection(smtp)
+    
+    async def _checkout(self, conf: ConnectionConfig) -> _PooledConnection:
+        """Most recently used idle connection that is still alive (NOOP after an idle spell), else a new one."""
+        now = asyncio.get_running_loop().time()
+        while self._idle:
+            connection = self._idle.pop()
+            if not connection.smtp.is_connected:
+                continue
+            if now - connection.last_used < SMTP_NOOP_AFTER_IDLE_SECONDS:
+                return connection
+            try:
+                await connection.smtp.noop()
+                return connection
+            except aiosmtplib.SMTPException:
+                connection.smtp.close()
+        return await self._connect(conf)
+    
+    async def _release(self, connection: _PooledConnection):
+        """Return a connection to the pool, or retire it once it has hit the per-connection cap."""
+        connection.sent_count += 1
+        connection.last_used = asyncio.get_running_loop().time()
+        if connection.sent_count >= self.max_messages_per_connection:
+            await connection.quit()
+        else:
+            self._idle.append(connection)
+    
+    async def send(self, conf: ConnectionConfig, message: MessageSchema):
+        """Send one message on a pooled connection, reconnecting once if the server hung up."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_size)
+        sender = f"{conf.MAIL_FROM_NAME} <{conf.MAIL_FROM}>" if conf.MAIL_FROM_NAME else conf.MAIL_FROM
+        msg = await MailMsg(message)._message(sender)
+        if conf.SUPPRESS_SEND:
+            return
+        async with self._slots:
+            connection = await self._checkout(conf)
+            try:
+                try:
+                    await connection.smtp.send_message(msg)
+                except aiosmtplib.SMTPServerDisconnected:
+                    connection = await self._connect(conf)
+                    await connection.smtp.send_message(msg)
+            except Exception:
+                connection.smtp.close()
+                raise
+            await self._release(connection)
+    
+    async def close_idle(self, max_idle_seconds: float):
+        """QUIT connections that have sat unused for longer than max_idle_seconds."""
+        cutoff = asyncio.get_running_loop().time() - max_idle_seconds
+        stale = [c for c in self._idle if c.last_used < cutoff]
+        self._idle = [c for c in self._idle if c.last_used >= cutoff]
+        for connection in stale:
+            await connection.quit()
+    
+    async def close(self):
+        """QUIT every idle connection (on shutdown)."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.quit()
 
-async def send_password_reset_email(email: str, reset_token: str):
-    """Send password reset link via Google SMTP."""
+_smtp_pool = SMTPPool(settings.SMTP_POOL_SIZE, settings.SMTP_MAX_MESSAGES_PER_CONNECTION)
+
+class EmailNotConfigured(RuntimeError):
+    """SMTP settings are missing; no send can succeed."""
+
+class EmailQuotaExceeded(RuntimeError):
+    """The daily sending cap is used up; retrying won't help until it refills."""
+
+# Failures worth retrying: dropped/refused connections and timeouts (not quota, config or rejected recipients)
+TRANSIENT_EMAIL_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+# Provider sending limits. Bursts (e.g. a submission fanned out to many managers) wait for
+# per-minute capacity. The daily cap fails fast: waiting on it would stall the shared sender
+# worker, and every verification/reset email queued behind it, for hours.
+_minute_limiter = (
+    AsyncLimiter(settings.EMAIL_RATE_LIMIT_PER_MINUTE, 60) if settings.EMAIL_RATE_LIMIT_PER_MINUTE > 0 else None
+)
+_daily_limiter = (
+    AsyncLimiter(settings.EMAIL_DAILY_LIMIT, 24 * 60 * 60) if settings.EMAIL_DAILY_LIMIT > 0 else None
+)
+
+async def _send_rate_limited(conf: ConnectionConfig, message: MessageSchema):
+    """Send through the SMTP pool within the provider limits. Raises if the daily cap is used up."""
+    if _minute_limiter is not None:
+        await _minute_limiter.acquire()
+    if _daily_limiter is not None:
+        if not _daily_limiter.has_capacity():
+            logger.warning("Daily email limit (%s) reached; not sending '%s' to %s", settings.EMAIL_DAILY_LIMIT, message.subject, message.recipients)
+            raise EmailQuotaExceeded("Daily email limit reached")
+        # Capacity was just checked, so this doesn't wait
+        await _daily_limiter.acquire()
+    await _smtp_pool.send(conf, message)
+
+# Outbound mail batching: while the sender worker runs (started in the app lifespan), sends are
+# queued and delivered together over the pooled SMTP connections
+EMAIL_BATCH_MAX_SIZE = 20
+EMAIL_BATCH_WINDOW_SECONDS = 0.2
+EMAIL_DRAIN_TIMEOUT_SECONDS = 10  # Max time spent flushing queued mail on shutdown
+_email_queue: Optional[asyncio.Queue] = None
+
+async def _deliver(conf: ConnectionConfig, message: MessageSchema):
+    """Send a message through the batching worker, or directly when it isn't running. Raises on failure."""
+    if _email_queue is None:
+        await _send_rate_limited(conf, message)
+        return
+    
+    future = asyncio.get_running_loop().create_future()
+    await _email_queue.put((message, future))
+    await future
+
+async def _send_batch(batch: List[Tuple[MessageSchema, asyncio.Future]]):
+    """Deliver a batch concurrently over the SMTP pool, resolving each sender's future."""
+    conf = get_email_config()
+    
+    async def send_one(message: MessageSchema, future: asyncio.Future):
+        try:
+            if not conf:
+                raise EmailNotConfigured("Email service not configured")
+            await _send_rate_limited(conf, message)
+            if not future.done():
+                future.set_result(None)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+    
+    await asyncio.gather(*(send_one(message, future) for message, future in batch))
+
+async def email_sender_worker():
+    """Drain queued emails in batches (up to EMAIL_BATCH_MAX_SIZE or EMAIL_BATCH_WINDOW_SECONDS), reaping idle SMTP connections."""
+    global _email_queue
+    queue: asyncio.Queue = asyncio.Queue()
+    _email_queue = queue
+    loop = asyncio.get_running_loop()
+    batch: List[Tuple[MessageSchema, asyncio.Future]] = []
+    in_flight: List[Tuple[MessageSchema, asyncio.Future]] = []
     try:
-        conf = get_email_config()
-        if not conf:
-            print(f"[EMAIL WARNING] Email service not configured. Cannot send password reset email to: {email}", file=sys.stderr, flush=True)
-            print(f"Reset link (manual): {settings.FRONTEND_URL}/reset-password?token={reset_token}", file=sys.stderr, flush=True)
-            return
-        
-        reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
-        
-        message = MessageSchema(
-            subject="Reset your NovaIntel password",
-            recipients=[email],
-            body=f"""
-            <html>
-            <body>
-                <h2>Password Reset Request</h2>
-                <p>You requested to reset your password. Click the link below to set a new password:</p>
-                <p><a href="{reset_url}">Reset Password</a></p>
-                <p>Or copy this link: {reset_url}</p>
-                <p>This link will expire in 7 days.</p>
-                <p>If you didn't request this, please ignore this email.</p>
-            </body>
-            </html>
-            """,
-            subtype="html"
-        )
-        
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        print(f"[EMAIL SUCCESS] Password reset email sent to: {email}", file=sys.stderr, flush=True)
-    except Exception as e:
-        _log_email_error("Password Reset Email", email, e, "Password Reset Request")
-        raise
+        while True:
+            try:
+                batch = [await asyncio.wait_for(queue.get(), settings.SMTP_IDLE_TIMEOUT_SECONDS)]
+            except asyncio.TimeoutError:
+                # Quiet period - don't hold SMTP connections the server will drop anyway
+                await _smtp_pool.close_idle(settings.SMTP_IDLE_TIMEOUT_SECONDS)
+                continue
+            deadline = loop.time() + EMAIL_BATCH_WINDOW_SECONDS
+            while len(batch) < EMAIL_BATCH_MAX_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Hand the batch over before sending: if we're cancelled mid-send, these messages may
+            # already be in DATA and must not be sent again by the drain below
+            in_flight, batch = batch, []
+            await _send_batch(in_flight)
+            in_flight = []
+    finally:
+        # New sends go direct from here on; flush what's still queued (bounded), then fail the rest
+        _email_queue = None
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        batch = [(message, future) for message, future in batch if not future.done()]
+        if batch:
+            try:
+                await asyncio.wait_for(_send_batch(batch), EMAIL_DRAIN_TIMEOUT_SECONDS)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+        for _, future in batch + in_flight:
+            if not future.done():
+                future.set_exception(RuntimeError("Email sender stopped"))
+        await _smtp_pool.close()
+
+def _verification_message(email: str, verification_token: str) -> Optional[MessageSchema]:
+    """Verification email, or None (with the link logged for manual use) if email isn't configured."""
+    verification_url = f"{settings.FRONTEND_URL}/verify-email?token={verification_token}"
+    if not _EMAIL_CONFIGURED:
+        logger.warning("Email service not configured. Cannot send verification email to: %s\nVerification link (manual): %s", email, verification_url)
+        return None
+    
+    return MessageSchema(
+        subject="Verify your NovaIntel account",
+        recipients=[email],
+        body=_VERIFY_TEMPLATE.render(verification_url=verification_url),
+        subtype="html"
+    )
 
-async def send_proposal_submission_email(
+def _password_reset_message(email: str, reset_token: str) -> Optional[MessageSchema]:
+    """Password reset email, or None (with the link logged for manual use) if email isn't configured."""
+    reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
+    if not _EMAIL_CONFIGURED:
+        logger.warning("Email service not configured. Cannot send password reset email to: %s\nReset link (manual): %s", email, reset_url)
+        return None
+    
+    return MessageSchema(
+        subject="Reset your NovaIntel password",
+        recipients=[email],
+        body=_RESET_TEMPLATE.render(reset_url=reset_url),
+        subtype="html"
+    )
+
+def _proposal_submission_message(
     manager_email: str,
     manager_name: str,
     proposal_title: str,
@@ -135,141 +496,131 @@ async def send_proposal_submission_email(
     proposal_sections: list = None,
     template_type: str = None,
     submitted_at: str = None
-):
-    """Send email notification to admin/manager when a proposal is submitted for approval."""
-    conf = get_email_config()
-    if not conf:
-        print(f"⚠ Email not configured. Proposal submission notification for: {manager_email}")
-        print(f"   Proposal: {proposal_title} by {submitter_name}")
-        return
+) -> Optional[MessageSchema]:
+    """Proposal submission notification, or None if email isn't configured."""
+    if not _EMAIL_CONFIGURED:
+        logger.warning("Email not configured. Proposal submission notification for: %s (Proposal: %s by %s)", manager_email, proposal_title, submitter_name)
+        return None
     
-    login_url = f"{settings.FRONTEND_URL}/login"
-    admin_dashboard_url = f"{settings.FRONTEND_URL}/admin/proposals"
-    proposal_url = f"{settings.FRONTEND_URL}/admin/proposals" if proposal_id else admin_dashboard_url
+    # Format proposal sections preview (first 10 sections, 500 chars each)
+    sections = []
+    for idx, section in enumerate(islice(proposal_sections or (), 10)):
+        if isinstance(section, dict):
+            section_title = section.get('title', f'Section {idx + 1}')
+            section_content = section.get('content') or ''
+        else:
+            section_title, section_content = f'Section {idx + 1}', ''
+        sections.append({"title": section_title, "content_html": _preview_html(section_content)})
     
-    # Format proposal sections preview
-    sections_preview = ""
-    if proposal_sections and len(proposal_sections) > 0:
-        sections_preview = "<div style='margin: 20px 0;'>"
-        sections_preview += f"<h3 style='color: #1e40af; margin-bottom: 15px;'>Proposal Preview ({len(proposal_sections)} sections)</h3>"
-        
-        for idx, section in enumerate(proposal_sections[:10]):  # Show first 10 sections
-            section_title = section.get('title', f'Section {idx + 1}') if isinstance(section, dict) else f'Section {idx + 1}'
-            section_content = section.get('content', '') if isinstance(section, dict) else ''
-            
-            # Truncate content for email preview (first 500 chars)
-            content_preview = section_content[:500] if section_content else "No content available"
-            if len(section_content) > 500:
-                content_preview += "..."
-            
-            # Escape HTML and convert markdown-like formatting to HTML for email
-            import html
-            content_html = html.escape(content_preview)
-            # Convert markdown to HTML
-            # Handle bold **text**
-            import re
-            content_html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', content_html)
-            # Handle italic *text* (but not **text**)
-            content_html = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'<em>\1</em>', content_html)
-            # Handle line breaks
-            content_html = content_html.replace('\n\n', '</p><p style="margin: 8px 0;">')
-            content_html = content_html.replace('\n', '<br>')
-            
-            sections_preview += f"""
-            <div style='background-color: #ffffff; border: 1px solid #e5e7eb; border-radius: 6px; padding: 15px; margin-bottom: 15px;'>
-                <h4 style='color: #1e40af; margin: 0 0 10px 0; font-size: 16px; font-weight: 600;'>{section_title}</h4>
-                <div style='color: #374151; font-size: 14px; line-height: 1.6;'>
-                    <p style="margin: 8px 0;">{content_html}</p>
-                </div>
-            </div>
-            """
-        
-        if len(proposal_sections) > 10:
-            sections_preview += f"<p style='color: #6b7280; font-size: 14px; margin-top: 10px;'>... and {len(proposal_sections) - 10} more sections (view full proposal in dashboard)</p>"
-        
-        sections_preview += "</div>"
-    
-    # Format submitted date
-    submitted_date = submitted_at if submitted_at else "Just now"
-    
-    message_body = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <div style="max-width: 700px; margin: 0 auto; padding: 20px;">
-            <h2 style="color: #2563eb; border-bottom: 2px solid #2563eb; padding-bottom: 10px;">New Proposal Submitted for Review</h2>
-            
-            <p>Hello {manager_name},</p>
-            
-            <p>A new proposal has been submitted and requires your review:</p>
-            
-            <div style="background-color: #f3f4f6; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #2563eb;">
-                <h3 style="margin-top: 0; color: #1e40af;">Proposal Details</h3>
-                <p style="margin: 8px 0;"><strong>Proposal Title:</strong> {proposal_title}</p>
-                <p style="margin: 8px 0;"><strong>Proposal ID:</strong> #{proposal_id if proposal_id else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Template Type:</strong> {template_type.title() if template_type else 'Full'}</p>
-                <p style="margin: 8px 0;"><strong>Submitted At:</strong> {submitted_date}</p>
-                
-                <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
-                
-                <h3 style="color: #1e40af;">Project Information</h3>
-                <p style="margin: 8px 0;"><strong>Project:</strong> {project_name if project_name else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Client:</strong> {client_name if client_name else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Industry:</strong> {industry if industry else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Region:</strong> {region if region else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Project ID:</strong> #{project_id if project_id else 'N/A'}</p>
-                
-                <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
-                
-                <h3 style="color: #1e40af;">Submitter Information</h3>
-                <p style="margin: 8px 0;"><strong>Submitted By:</strong> {submitter_name}</p>
-                {f'<p style="margin: 8px 0;"><strong>Message from Submitter:</strong></p><p style="margin: 8px 0; padding: 10px; background-color: #ffffff; border-radius: 4px; font-style: italic;">{submitter_message}</p>' if submitter_message else ''}
-                
-                {f'<hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">{sections_preview}' if sections_preview else ''}
-            </div>
-            
-            <p style="font-size: 16px; font-weight: 500;">Please review the proposal and provide your feedback.</p>
-            
-            <div style="margin: 30px 0; text-align: center;">
-                <a href="{admin_dashboard_url}" 
-                   style="background-color: #2563eb; color: white; padding: 14px 28px; 
-                          text-decoration: none; border-radius: 6px; display: inline-block; 
-                          font-weight: bold; font-size: 16px;">
-                    Review Proposal Now
-                </a>
-            </div>
-            
-            <p style="color: #6b7280; font-size: 14px; margin-top: 30px;">
-                Or <a href="{login_url}" style="color: #2563eb; text-decoration: underline;">login to your account</a> to access the admin dashboard.
-            </p>
-            
-            <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
-            
-            <p style="color: #6b7280; font-size: 12px;">
-                This is an automated notification from NovaIntel. 
-                Please do not reply to this email.
-            </p>
-        </div>
-    </body>
-    </html>
-    """
+    message_body = _PROPOSAL_TEMPLATE.render(
+        manager_name=manager_name,
+        proposal_title=proposal_title,
+        proposal_id=proposal_id,
+        template_type=template_type.title() if template_type else 'Full',
+        submitted_date=submitted_at if submitted_at else "Just now",
+        project_name=project_name,
+        client_name=client_name,
+        industry=industry,
+        region=region,
+        project_id=project_id,
+        submitter_name=submitter_name,
+        submitter_message=submitter_message,
+        sections=sections,
+        total_sections=len(proposal_sections) if proposal_sections else 0
+    )
     
-    message = MessageSchema(
+    return MessageSchema(
         subject=f"New Proposal Submitted: {proposal_title}",
         recipients=[manager_email],
         body=message_body,
         subtype="html"
     )
+
+async def send_verification_email(email: str, verification_token: str):
+    """Send email verification link via Google SMTP."""
+    try:
+        message = _verification_message(email, verification_token)
+        if message is None:
+            return
+        await _deliver(get_email_config(), message)
+        logger.info("Verification email sent to: %s", email)
+    except Exception as e:
+        _log_email_error("Verification Email", email, e, "User Registration")
+        raise
+
+async def send_password_reset_email(email: str, reset_token: str):
+    """Send password reset link via Google SMTP."""
+    try:
+        message = _password_reset_message(email, reset_token)
+        if message is None:
+            return
+        await _deliver(get_email_config(), message)
+        logger.info("Password reset email sent to: %s", email)
+    except Exception as e:
+        _log_email_error("Password Reset Email", email, e, "Password Reset Request")
+        raise
+
+async def send_proposal_submission_email(manager_email: str, manager_name: str, proposal_title: str, submitter_name: str, **details):
+    """Send email notification to admin/manager when a proposal is submitted for approval."""
+    message = _proposal_submission_message(manager_email, manager_name, proposal_title, submitter_name, **details)
+    if message is None:
+        return
     
     try:
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        print(f"[EMAIL SUCCESS] Proposal submission email sent to: {manager_email} (Proposal: {proposal_title})", file=sys.stderr, flush=True)
+        await _deliver(get_email_config(), message)
+        logger.info("Proposal submission email sent to: %s (Proposal: %s)", manager_email, proposal_title)
     except Exception as e:
         _log_email_error(
             "Proposal Submission Email", 
             manager_email, 
             e, 
-            f"Proposal: {proposal_title}, Submitter: {submitter_name}, Proposal ID: {proposal_id}"
+            f"Proposal: {proposal_title}, Submitter: {submitter_name}, Proposal ID: {details.get('proposal_id')}"
         )
         raise
 
+# Fire-and-forget variants for request handlers: the message is queued for the sender worker and the
+# handler returns immediately; delivery failures are logged, not raised
+_pending_sends: set = set()
+
+def _enqueue(message: Optional[MessageSchema], email_type: str, recipient: str, context: str = ""):
+    """Queue a message for background delivery and log the outcome when it completes."""
+    if message is None:
+        return
+    
+    loop = asyncio.get_running_loop()
+    if _email_queue is not None:
+        future = loop.create_future()
+        _email_queue.put_nowait((message, future))
+    else:
+        # No sender worker (e.g. scripts) - deliver in a task we keep a reference to
+        future = loop.create_task(_deliver(get_email_config(), message))
+    _pending_sends.add(future)
+    
+    def on_done(done: asyncio.Future):
+        _pending_sends.discard(done)
+        if done.cancelled():
+            return
+        error = done.exception()
+        if error is not None:
+            _log_email_error(email_type, recipient, error, context)
+        else:
+            logger.info("%s sent to: %s", email_type, recipient)
+    
+    future.add_done_callback(on_done)
+
+def enqueue_verification_email(email: str, verification_token: str):
+    """Queue the email verification link without waiting for SMTP."""
+    _enqueue(_verification_message(email, verification_token), "Verification Email", email, "User Registration")
+
+def enqueue_password_reset_email(email: str, reset_token: str):
+    """Queue the password reset link without waiting for SMTP."""
+    _enqueue(_password_reset_message(email, reset_token), "Password Reset Email", email, "Password Reset Request")
+
+def enqueue_proposal_submission_email(manager_email: str, manager_name: str, proposal_title: str, submitter_name: str, **details):
+    """Queue a proposal submission notification without waiting for SMTP."""
+    _enqueue(
+        _proposal_submission_message(manager_email, manager_name, proposal_title, submitter_name, **details),
+        "Proposal Submission Email",
+        manager_email,
+        f"Proposal: {proposal_title}, Submitter: {submitter_name}, Proposal ID: {details.get('proposal_id')}"
+    )
@@ -1,47 +1,246 @@
 """
 Gemini LLM Service - Direct API integration with Google Gemini.
 """
-from typing import Optional, Dict, Any, List
+from concurrent.futures import Future
+from typing import AsyncIterator, Awaitable, Callable, Optional, Dict, Any, List
+import asyncio
 import json
-import re
-import requests
+import threading
+import httpx
+import orjson
 from utils.config import settings
 from utils.retry import retry, async_retry
 from utils.circuit_breaker import circuit_breaker, async_circuit_breaker
+from services.cache.llm_cache import llm_cache
+
+# Pooled keep-alive connections (HTTP/2 where available) so calls skip the TCP + TLS handshake
+GEMINI_TIMEOUT_SECONDS = 30
+GEMINI_CONNECTION_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+
+# Chat roles -> Gemini content roles ("system" goes to systemInstruction instead)
+_GEMINI_ROLES = {"user": "user", "assistant": "model"}
 
 class GeminiService:
     """Service for interacting with Google Gemini API directly with retry and circuit breaker."""
     
     def __init__(self):
         self.api_key = settings.GEMINI_API_KEY
+        self._available = bool(self.api_key)
         self.model = settings.GEMINI_MODEL
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self._client = httpx.Client(
+            http2=True,
+            timeout=GEMINI_TIMEOUT_SECONDS,
+            limits=GEMINI_CONNECTION_LIMITS,
+            headers={"Content-Type": "application/json"}
+        )
+        # The async client binds to the running event loop, so it is created on first async use
+        self._async_client: Optional[httpx.AsyncClient] = None
+        # In-flight generateContent calls by cache key (singleflight), per thread pool and event loop
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._inflight_async: Dict[str, asyncio.Future] = {}
         
     def is_available(self) -> bool:
         """Check if Gemini service is available."""
-        return bool(self.api_key)
+        return self._available
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                http2=True,
+                timeout=GEMINI_TIMEOUT_SECONDS,
+                limits=GEMINI_CONNECTION_LIMITS,
+                headers={"Content-Type": "application/json"}
+            )
+        return self._async_client
+    
+    async def aclose(self):
+        """Close pooled connections (on shutdown)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        await asyncio.to_thread(self._client.close)
+    
+    def _params(self) -> Dict[str, str]:
+        return {"key": self.api_key} if self.api_key else {}
+    
+    def _singleflight(self, key: str, call: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run call() once per key at a time; threads asking for the same key meanwhile get its result."""
+        with self._inflight_lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight[key] = Future()
+        if not leader:
+            return dict(inflight.result())
+        
+        try:
+            result = call()
+            inflight.set_result(result)
+            return result
+        except BaseException as e:
+            inflight.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
+    async def _singleflight_async(self, key: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Async singleflight: concurrent coroutines asking for the same key await one upstream call."""
+        inflight = self._inflight_async.get(key)
+        if inflight is not None:
+            return dict(await asyncio.shield(inflight))
+        
+        inflight = self._inflight_async[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await call()
+            inflight.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            inflight.cancel()
+            raise
+        except BaseException as e:
+            inflight.set_exception(e)
+            raise
+        finally:
+            del self._inflight_async[key]
     
-    @retry(max_attempts=3, backoff="exponential", base_delay=1.0, exceptions=(requests.RequestException,))
+    @retry(max_attempts=3, backoff="exponential", base_delay=1.0, exceptions=(httpx.HTTPError,))
     @circuit_breaker(failure_threshold=5, recovery_timeout=60.0, expected_exception=Exception)
     def _make_request(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Make HTTP request with retry and circuit breaker."""
-        headers = {
-            "Content-Type": "application/json"
+        response = self._client.post(url, content=orjson.dumps(payload), params=self._params())
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    @async_retry(max_attempts=3, backoff="exponential", base_delay=1.0, exceptions=(httpx.HTTPError,))
+    @async_circuit_breaker(failure_threshold=5, recovery_timeout=60.0, expected_exception=Exception)
+    async def _make_request_async(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Async HTTP request with retry and circuit breaker (doesn't block the event loop)."""
+        response = await self._get_async_client().post(url, content=orjson.dumps(payload), params=self._params())
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    def _generate_payload(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        response_mime_type: Optional[str],
+        response_schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Request body for a single-prompt generateContent call."""
+        contents = [{"parts": [{"text": prompt}]}]
+        
+        generation_config = {
+            "temperature": temperature,
         }
+        if max_tokens:
+            generation_config["maxOutputTokens"] = max_tokens
+        if response_mime_type:
+            generation_config["responseMimeType"] = response_mime_type
+        if response_schema:
+            generation_config["responseSchema"] = response_schema
         
-        if self.api_key:
-            url = f"{url}?key={self.api_key}"
+        payload = {
+            "contents": contents,
+            "generationConfig": generation_config
+        }
         
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        if system_instruction:
+            payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+        return payload
+    
+    def _cache_key(self, payload: Dict[str, Any], temperature: float) -> Optional[str]:
+        """Response cache key for a generateContent payload, or None if the output isn't cacheable."""
+        if not llm_cache.is_cacheable(temperature):
+            return None
+        # The whole conversation (a generate_content payload is a single user turn)
+        contents = payload["contents"]
+        prompt = contents[0]["parts"][0]["text"] if len(contents) == 1 else orjson.dumps(contents).decode()
+        return llm_cache.make_key(
+            self.model,
+            prompt,
+            system=payload.get("systemInstruction"),
+            config=payload["generationConfig"]
+        )
+    
+    @staticmethod
+    def _chat_payload(
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_mime_type: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Request body for a generateContent call from a role/content message history."""
+        # Convert messages to Gemini format (last system message wins; unknown roles are dropped)
+        contents = []
+        append = contents.append
+        system_instruction = None
+        
+        for msg in messages:
+            role = msg.get("role", "user")
+            if role == "system":
+                system_instruction = msg.get("content", "")
+                continue
+            gemini_role = _GEMINI_ROLES.get(role)
+            if gemini_role:
+                append({"parts": [{"text": msg.get("content", "")}], "role": gemini_role})
+        
+        # Ensure we have at least one content
+        if not contents:
+            contents.append({
+                "parts": [{"text": ""}],
+                "role": "user"
+            })
+        
+        generation_config = {
+            "temperature": temperature
+        }
+        if response_mime_type:
+            generation_config["responseMimeType"] = response_mime_type
+        if response_schema:
+            generation_config["responseSchema"] = response_schema
+        
+        payload = {
+            "contents": contents,
+            "generationConfig": generation_config
+        }
+        
+        # Add system instruction if provided
+        if system_instruction:
+            payload["systemInstruction"] = {
+                "parts": [{"text": system_instruction}]
+            }
+        return payload
+    
+    @staticmethod
+    def _extract_content(response_data: Dict[str, Any], empty_error: str) -> Dict[str, Any]:
+        """Pull the first candidate's text out of a generateContent response."""
+        if "candidates" in response_data and len(response_data["candidates"]) > 0:
+            candidate = response_data["candidates"][0]
+            if "content" in candidate and "parts" in candidate["content"]:
+                content = candidate["content"]["parts"][0].get("text", "")
+                return {
+                    "content": content,
+                    "error": None
+                }
+        
+        return {
+            "content": None,
+            "error": empty_error
+        }
     
     def generate_content(
         self,
         prompt: str,
         system_instruction: Optional[str] = None,
         temperature: float = 0.1,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        response_mime_type: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Generate content using Gemini API.
@@ -51,6 +250,8 @@ class GeminiService:
             system_instruction: System instruction (optional)
             temperature: Temperature for generation
             max_tokens: Maximum tokens (optional)
+            response_mime_type: e.g. "application/json" for JSON mode (optional)
+            response_schema: OpenAPI-style schema the JSON response must follow (optional)
         
         Returns:
             dict with 'content', 'error' keys
@@ -62,41 +263,81 @@ class GeminiService:
             }
         
         url = f"{self.base_url}/models/{self.model}:generateContent"
+        payload = self._generate_payload(prompt, system_instruction, temperature, max_tokens, response_mime_type, response_schema)
         
-        # Build request payload
-        contents = [{"parts": [{"text": prompt}]}]
-        
-        generation_config = {
-            "temperature": temperature,
-        }
-        if max_tokens:
-            generation_config["maxOutputTokens"] = max_tokens
-        
-        payload = {
-            "contents": contents,
-            "generationConfig": generation_config
-        }
-        
-        if system_instruction:
-            payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
-        
+        cache_key = self._cache_key(payload, temperature)
+        if cache_key:
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return {"content": cached, "error": None}
+            # Identical concurrent requests share one upstream call
+            return self._singleflight(cache_key, lambda: self._generate(url, payload, cache_key))
+        return self._generate(url, payload, cache_key)
+    
+    def _generate(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        cache_key: Optional[str],
+        empty_error: str = "No response from Gemini API"
+    ) -> Dict[str, Any]:
         try:
-            response_data = self._make_request(url, payload)
-            
-            if "candidates" in response_data and len(response_data["candidates"]) > 0:
-                candidate = response_data["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    content = candidate["content"]["parts"][0].get("text", "")
-                    return {
-                        "content": content,
-                        "error": None
-                    }
-            
+            result = self._extract_content(self._make_request(url, payload), empty_error)
+            if cache_key and result["content"]:
+                llm_cache.set(cache_key, result["content"])
+            return result
+        except httpx.HTTPError as e:
+            return {
+                "content": None,
+                "error": f"Request failed: {str(e)}"
+            }
+        except Exception as e:
             return {
                 "content": None,
-                "error": "No response from Gemini API"
+                "error": f"Unexpected error: {str(e)}"
             }
-        except requests.RequestException as e:
+    
+    async def generate_content_async(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None,
+        response_mime_type: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Async variant of generate_content() for use directly from request handlers."""
+        if not self.is_available():
+            return {
+                "content": None,
+                "error": "Gemini API key not configured"
+            }
+        
+        url = f"{self.base_url}/models/{self.model}:generateContent"
+        payload = self._generate_payload(prompt, system_instruction, temperature, max_tokens, response_mime_type, response_schema)
+        
+        cache_key = self._cache_key(payload, temperature)
+        if cache_key:
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return {"content": cached, "error": None}
+            # Identical concurrent requests share one upstream call
+            return await self._singleflight_async(cache_key, lambda: self._generate_async(url, payload, cache_key))
+        return await self._generate_async(url, payload, cache_key)
+    
+    async def _generate_async(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        cache_key: Optional[str],
+        empty_error: str = "No response from Gemini API"
+    ) -> Dict[str, Any]:
+        try:
+            result = self._extract_content(await self._make_request_async(url, payload), empty_error)
+            if cache_key and result["content"]:
+                llm_cache.set(cache_key, result["content"])
+            return result
+        except httpx.HTTPError as e:
             return {
                 "content": None,
                 "error": f"Request failed: {str(e)}"
@@ -110,7 +351,9 @@ class GeminiService:
     def chat(
         self,
         messages: List[Dict[str, str]],
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        response_mime_type: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Chat with Gemini using message history.
@@ -118,6 +361,8 @@ class GeminiService:
         Args:
             messages: List of messages with 'role' and 'content'
             temperature: Temperature for generation
+            response_mime_type: e.g. "application/json" for JSON mode
+            response_schema: Gemini response schema (constrained decoding)
         
         Returns:
             dict with 'content', 'error' keys
@@ -129,88 +374,129 @@ class GeminiService:
             }
         
         url = f"{self.base_url}/models/{self.model}:generateContent"
+        payload = self._chat_payload(messages, temperature, response_mime_type, response_schema)
         
-        # Convert messages to Gemini format
-        contents = []
-        system_instruction = None
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "system":
-                system_instruction = content
-            elif role == "user":
-                contents.append({
-                    "parts": [{"text": content}],
-                    "role": "user"
-                })
-            elif role == "assistant":
-                contents.append({
-                    "parts": [{"text": content}],
-                    "role": "model"
-                })
-        
-        payload = {
-            "contents": contents,
-            "generationConfig": {
-                "temperature": temperature
+        # Same exact-match cache and singleflight as generate_content(): agents re-send identical
+        # conversations (retries, re-reviews of an unchanged draft)
+        cache_key = self._cache_key(payload, temperature)
+        if cache_key:
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return {"content": cached, "error": None}
+            return self._singleflight(cache_key, lambda: self._generate(url, payload, cache_key, "No content in response"))
+        return self._generate(url, payload, cache_key, "No content in response")
+    
+    async def chat_async(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1,
+        response_mime_type: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Async variant of chat() for use directly from request handlers."""
+        if not self.is_available():
+            return {
+                "content": None,
+                "error": "Gemini API key not configured"
             }
-        }
         
-        # Add system instruction if provided
-        if system_instruction:
-            payload["systemInstruction"] = {
-                "parts": [{"text": system_instruction}]
-            }
+        url = f"{self.base_url}/models/{self.model}:generateContent"
+        payload = self._chat_payload(messages, temperature, response_mime_type, response_schema)
         
-        # Ensure we have at least one content
-        if not contents:
-            contents.append({
-                "parts": [{"text": ""}],
-                "role": "user"
-            })
-            payload["contents"] = contents
+        cache_key = self._cache_key(payload, temperature)
+        if cache_key:
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return {"content": cached, "error": None}
+            return await self._singleflight_async(
+                cache_key, lambda: self._generate_async(url, payload, cache_key, "No content in response")
+            )
+        return await self._generate_async(url, payload, cache_key, "No content in response")
+    
+    async def _stream(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """POST to streamGenerateContent (SSE) and yield each text chunk as it arrives."""
+        url = f"{self.base_url}/models/{self.model}:streamGenerateContent"
+        params = {**self._params(), "alt": "sse"}
+        async with self._get_async_client().stream("POST", url, content=orjson.dumps(payload), params=params) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = orjson.loads(line[5:])
+                for candidate in chunk.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+    
+    async def stream_content(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text chunk by chunk (first tokens arrive long before the full answer).
         
-        try:
-            response_data = self._make_request(url, payload)
-            
-            if "candidates" in response_data and len(response_data["candidates"]) > 0:
-                candidate = response_data["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    content = candidate["content"]["parts"][0].get("text", "")
-                    return {
-                        "content": content,
-                        "error": None
-                    }
-            
-            return {
-                "content": None,
-                "error": "No content in response"
-            }
-            
-        except requests.exceptions.RequestException as e:
-            return {
-                "content": None,
-                "error": f"API request failed: {str(e)}"
-            }
-        except Exception as e:
-            return {
-                "content": None,
-                "error": f"Error: {str(e)}"
-            }
+        Raises httpx.HTTPError on request failure; not retried, since output may already have been consumed.
+        """
+        if not self.is_available():
+            raise RuntimeError("Gemini API key not configured")
+        payload = self._generate_payload(prompt, system_instruction, temperature, max_tokens, None, None)
+        async for text in self._stream(payload):
+            yield text
+    
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1
+    ) -> AsyncIterator[str]:
+        """Streaming variant of chat(); same failure behaviour as stream_content()."""
+        if not self.is_available():
+            raise RuntimeError("Gemini API key not configured")
+        async for text in self._stream(self._chat_payload(messages, temperature)):
+            yield text
     
     def extract_json(self, text: str) -> Optional[Dict]:
-        """Extract JSON from text response."""
-        try:
-            # Try to find JSON in the response
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
+        """Extract the first JSON object embedded in a text response."""
+        if not text:
+            return None
+        start = text.find("{")
+        while start != -1:
+            end = self._balanced_object_end(text, start)
+            if end is None:
+                return None
+            try:
+                return json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                # Braces balanced but not JSON (e.g. prose "{like this}") - try the next object
+                start = text.find("{", start + 1)
+        return None
+    
+    @staticmethod
+    def _balanced_object_end(text: str, start: int) -> Optional[int]:
+        """Index of the '}' closing the '{' at start, skipping braces inside JSON strings (single pass)."""
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(text)):
+            char = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    return i
         return None
 
 # Global instance
 gemini_service = GeminiService()
-
@@ -2,25 +2,101 @@
 LLM Factory - Create LLM instances for different providers.
 Supports Gemini, OpenAI, and Claude with intelligent routing.
 """
-from typing import Optional, Any, Literal
+import threading
+from typing import Any, Dict, Literal, Optional, Tuple, Type
+import httpx
+from langchain_core.caches import InMemoryCache
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import Runnable
+from pydantic import BaseModel
 from utils.config import settings
 from utils.gemini_service import gemini_service
 from utils.model_router import model_router, TaskType
 from utils.langsmith_monitor import langsmith_monitor
+from services.cache.llm_cache import llm_cache, LLM_LOCAL_CACHE_SIZE
 import sys
 
+# Exact-match response cache for the LangChain chat models (GeminiService caches its own calls)
+_chat_model_cache = InMemoryCache(maxsize=LLM_LOCAL_CACHE_SIZE)
+
+def _response_cache(temperature: float) -> Optional[InMemoryCache]:
+    """Shared response cache for near-deterministic chat models, None (no caching) otherwise."""
+    return _chat_model_cache if llm_cache.is_cacheable(temperature) else None
+
+# One keep-alive HTTP/2 pool for every OpenAI-compatible chat model, instead of one per agent LLM
+LLM_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_http_clients_lock = threading.Lock()
+
+def _shared_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """The shared sync/async clients, created on first use."""
+    global _http_client, _http_async_client
+    with _http_clients_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(http2=True, timeout=LLM_HTTP_TIMEOUT, limits=LLM_HTTP_LIMITS)
+            _http_async_client = httpx.AsyncClient(http2=True, timeout=LLM_HTTP_TIMEOUT, limits=LLM_HTTP_LIMITS)
+    return _http_client, _http_async_client
+
+async def aclose_http_clients():
+    """Close the shared pools (on shutdown)."""
+    global _http_client, _http_async_client
+    with _http_clients_lock:
+        client, async_client = _http_client, _http_async_client
+        _http_client = _http_async_client = None
+    if async_client is not None:
+        await async_client.aclose()
+    if client is not None:
+        client.close()
+
+def gemini_response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Pydantic model -> Gemini responseSchema (OpenAPI subset: refs inlined, Optional as nullable)."""
+    schema = model.model_json_schema()
+    defs = schema.get("$defs", {})
+    
+    def convert(node: Dict[str, Any]) -> Dict[str, Any]:
+        if "$ref" in node:
+            return convert(defs[node["$ref"].rsplit("/", 1)[-1]])
+        if "anyOf" in node:
+            branches = [branch for branch in node["anyOf"] if branch.get("type") != "null"]
+            out = convert(branches[0]) if len(branches) == 1 else {"anyOf": [convert(b) for b in branches]}
+            if len(branches) < len(node["anyOf"]):
+                out["nullable"] = True
+            if "description" in node:
+                out["description"] = node["description"]
+            return out
+        out = {key: node[key] for key in ("type", "description", "enum", "format", "required") if key in node}
+        if "properties" in node:
+            out["properties"] = {name: convert(prop) for name, prop in node["properties"].items()}
+        if "items" in node:
+            out["items"] = convert(node["items"])
+        return out
+    
+    return convert(schema)
+
 # LangChain compatible wrapper for Gemini
 class GeminiLangChainWrapper(Runnable):
     """Wrapper to make Gemini service compatible with LangChain."""
     
-    def __init__(self, temperature: float = 0.1):
+    def __init__(self, temperature: float = 0.1, schema: Optional[Type[BaseModel]] = None):
         super().__init__()
         self.temperature = temperature
         self.service = gemini_service
+        # With a schema, Gemini decodes straight into that JSON shape and invoke() returns the model
+        self.schema = schema
+        self._response_schema = gemini_response_schema(schema) if schema else None
     
-    def invoke(self, input: Any, config: Optional[dict] = None) -> 'GeminiResponse':
-        """Invoke the LLM with a prompt."""
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs: Any) -> "GeminiLangChainWrapper":
+        """Same LLM, constrained to return `schema` (Gemini JSON mode with a responseSchema)."""
+        structured = GeminiLangChainWrapper(temperature=self.temperature, schema=schema)
+        structured.service = self.service
+        return structured
+    
+    def _request(self, input: Any) -> Tuple[str, tuple, Dict[str, Any]]:
+        """Translate a LangChain input into a GeminiService method name and its arguments."""
         prompt_input = input
         
         # Handle LangChain ChatPromptValue format
@@ -74,15 +150,15 @@ class GeminiLangChainWrapper(Runnable):
                             "role": "system",
                             "content": system_instruction
                         })
-                    result = self.service.chat(formatted_messages, temperature=self.temperature)
+                    return "chat", (formatted_messages,), {"temperature": self.temperature}
                 else:
                     # Fallback to generate_content
                     prompt_text = system_instruction or ""
-                    result = self.service.generate_content(prompt_text, temperature=self.temperature)
+                    return "generate_content", (prompt_text,), {"temperature": self.temperature}
             except Exception as e:
                 # If message parsing fails, try to convert to string
                 prompt_text = str(prompt_input)
-                result = self.service.generate_content(prompt_text, temperature=self.temperature)
+                return "generate_content", (prompt_text,), {"temperature": self.temperature}
         
         # Handle dict format
         elif isinstance(prompt_input, dict):
@@ -111,24 +187,22 @@ class GeminiLangChainWrapper(Runnable):
                             "content": content
                         })
                 
-                result = self.service.chat(formatted_messages, temperature=self.temperature)
+                return "chat", (formatted_messages,), {"temperature": self.temperature}
             else:
                 # Simple text prompt
                 prompt = str(prompt_input.get("input", prompt_input))
                 system_instruction = prompt_input.get("system", None)
-                result = self.service.generate_content(
-                    prompt,
-                    system_instruction=system_instruction,
-                    temperature=self.temperature
-                )
+                return "generate_content", (prompt,), {
+                    "system_instruction": system_instruction,
+                    "temperature": self.temperature
+                }
         else:
             # Direct string or other format
-            result = self.service.generate_content(
-                str(prompt_input),
-                temperature=self.temperature
-            )
-        
-        # Return the content as a string for LangChain compatibility
+            return "generate_content", (str(prompt_input),), {"temperature": self.temperature}
+    
+    @staticmethod
+    def _content(result: Dict[str, Any]) -> str:
+        """Return the content as a string for LangChain compatibility."""
         # LangChain output parsers (PydanticOutputParser) expect a string, not a custom object
         content = result.get("content", "")
         error = result.get("error")
@@ -140,6 +214,27 @@ class GeminiLangChainWrapper(Runnable):
         
         # Return as string directly - this is what LangChain output parsers expect
         return content
+    
+    def _structured_request(self, input: Any) -> Tuple[str, tuple, Dict[str, Any]]:
+        method, args, call_kwargs = self._request(input)
+        if self.schema:
+            call_kwargs["response_mime_type"] = "application/json"
+            call_kwargs["response_schema"] = self._response_schema
+        return method, args, call_kwargs
+    
+    def _output(self, result: Dict[str, Any]) -> Any:
+        content = self._content(result)
+        return self.schema.model_validate_json(content) if self.schema else content
+    
+    def invoke(self, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+        """Invoke the LLM with a prompt."""
+        method, args, call_kwargs = self._structured_request(input)
+        return self._output(getattr(self.service, method)(*args, **call_kwargs))
+    
+    async def ainvoke(self, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+        """Invoke the LLM on the shared async HTTP client instead of a worker thread."""
+        method, args, call_kwargs = self._structured_request(input)
+        return self._output(await getattr(self.service, f"{method}_async")(*args, **call_kwargs))
 
 class GeminiResponse:
     """Response wrapper for LangChain compatibility."""
@@ -156,6 +251,40 @@ class GeminiResponse:
     def __repr__(self):
         return f"GeminiResponse(content={self.content[:50]}..., error={self.error})"
 
+def with_prompt_caching(prompt: ChatPromptTemplate, llm) -> ChatPromptTemplate:
+    """
+    Mark a prompt's static leading system message as an Anthropic prompt-cache breakpoint.
+    
+    Claude then reuses the cached prefix (system prompt, few-shot examples, format instructions)
+    instead of re-reading it on every call. OpenAI, Gemini and a vLLM/SGLang gateway cache identical
+    prompt prefixes on their own, so other LLMs get the prompt unchanged; per-request fields belong
+    in the user message.
+    """
+    if type(llm).__name__ != "ChatAnthropic":
+        return prompt
+    
+    system, *rest = prompt.messages
+    text = system.format(**prompt.partial_variables).content
+    cached_system = SystemMessage(content=[{
+        "type": "text",
+        "text": text,
+        "cache_control": {"type": "ephemeral"}
+    }])
+    return ChatPromptTemplate.from_messages([cached_system, *rest]).partial(**prompt.partial_variables)
+
+def structured_llm(llm, schema: Type[BaseModel]):
+    """
+    Bind a Pydantic schema using the provider's native structured output; the result returns
+    a validated `schema` instance instead of text to parse.
+    
+    OpenAI: json_schema response format (function calling for models without it).
+    Claude: a forced tool call. Gemini: responseMimeType=application/json + responseSchema.
+    """
+    if type(llm).__name__ == "ChatOpenAI":
+        method = "function_calling" if llm.model_name.startswith("gpt-3.5") else "json_schema"
+        return llm.with_structured_output(schema, method=method)
+    return llm.with_structured_output(schema)
+
 def get_llm(
     provider: Optional[str] = None,
     temperature: float = 0.1,
@@ -167,7 +296,7 @@ def get_llm(
     Get LLM instance - Supports Gemini, OpenAI, and Claude with intelligent routing.
     
     Args:
-        provider: LLM provider ("gemini", "openai", "claude", or None for auto-routing)
+        provider: LLM provider ("gemini", "openai", "claude", "local", or None for auto-routing)
         temperature: Temperature for generation
         model: Model name (optional)
         task_type: Task type for intelligent routing
@@ -204,10 +333,14 @@ def get_llm(
     elif provider == "openai":
         try:
             from langchain_openai import ChatOpenAI
+            http_client, http_async_client = _shared_http_clients()
             llm = ChatOpenAI(
                 model=model_name,
                 temperature=temperature,
                 api_key=settings.OPENAI_API_KEY,
+                cache=_response_cache(temperature),
+                http_client=http_client,
+                http_async_client=http_async_client,
                 # LangSmith automatically tracks if enabled
             )
             # Tag for LangSmith
@@ -218,6 +351,28 @@ def get_llm(
             print("[WARNING] langchain-openai not installed. Install with: pip install langchain-openai", file=sys.stderr, flush=True)
             print("[FALLBACK] Using Gemini instead", file=sys.stderr, flush=True)
             return GeminiLangChainWrapper(temperature=temperature)
+    elif provider == "local":
+        try:
+            from langchain_openai import ChatOpenAI
+            http_client, http_async_client = _shared_http_clients()
+            # vLLM/SGLang speak the OpenAI API; their prefix cache reuses the KV states of the
+            # static system prompt that every request of an agent starts with
+            llm = ChatOpenAI(
+                model=model_name,
+                temperature=temperature,
+                base_url=settings.LOCAL_LLM_BASE_URL,
+                api_key=settings.LOCAL_LLM_API_KEY or "EMPTY",
+                cache=_response_cache(temperature),
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+            if langsmith_monitor.is_enabled():
+                llm.tags = ["local", model_name]
+            return llm
+        except ImportError:
+            print("[WARNING] langchain-openai not installed. Install with: pip install langchain-openai", file=sys.stderr, flush=True)
+            print("[FALLBACK] Using Gemini instead", file=sys.stderr, flush=True)
+            return GeminiLangChainWrapper(temperature=temperature)
     elif provider == "claude":
         try:
             from langchain_anthropic import ChatAnthropic
@@ -225,6 +380,7 @@ def get_llm(
                 model=model_name,
                 temperature=temperature,
                 api_key=settings.ANTHROPIC_API_KEY,
+                cache=_response_cache(temperature),
                 # LangSmith automatically tracks if enabled
             )
             # Tag for LangSmith
@@ -1,7 +1,9 @@
 """
 Model Router - Intelligently routes tasks to the best LLM model.
-Supports Gemini (fast, cost-effective), Claude (reasoning), and OpenAI (quality).
+Supports Gemini (fast, cost-effective), Claude (reasoning), and OpenAI (quality),
+or a self-hosted OpenAI-compatible gateway (vLLM/SGLang) that takes every task.
 """
+import importlib.util
 from typing import Optional, Dict, Any, Literal
 from enum import Enum
 from utils.config import settings
@@ -26,6 +28,7 @@ class ModelRouter:
         self.gemini_available = False
         self.openai_available = False
         self.claude_available = False
+        self.local_available = False
         self._initialize()
     
     def _initialize(self):
@@ -60,8 +63,14 @@ class ModelRouter:
             except Exception:
                 self.claude_available = False
         
+        # Check self-hosted gateway (OpenAI-compatible API, served through langchain-openai)
+        if settings.LOCAL_LLM_BASE_URL and settings.LOCAL_LLM_MODEL:
+            self.local_available = importlib.util.find_spec("langchain_openai") is not None
+        
         # Log availability
         available = []
+        if self.local_available:
+            available.append(f"Local ({settings.LOCAL_LLM_MODEL})")
         if self.gemini_available:
             available.append("Gemini")
         if self.openai_available:
@@ -87,8 +96,13 @@ class ModelRouter:
             prefer_provider: Preferred provider (if available)
         
         Returns:
-            Provider name: "gemini", "openai", or "claude"
+            Provider name: "local", "gemini", "openai", or "claude"
         """
+        # A configured self-hosted gateway serves everything: every agent's static system prompt
+        # stays resident in its prefix cache, so only the per-request user message is prefilled
+        if self.local_available:
+            return "local"
+        
         # Use preferred provider if available and suitable
         if prefer_provider == "gemini" and self.gemini_available:
             return "gemini"
@@ -176,6 +190,8 @@ class ModelRouter:
         elif provider == "claude":
             # Use Claude 3.5 Sonnet for best quality
             return "claude-3-5-sonnet-20241022"
+        elif provider == "local":
+            return settings.LOCAL_LLM_MODEL
         else:
             raise ValueError(f"Unknown provider: {provider}")
 
@@ -1,7 +1,18 @@
 """
 Utility functions for proposal processing.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Below this size str.split() beats the numpy byte scan (array setup overhead dominates)
+_FAST_WORD_COUNT_MIN_CHARS = 4096
+
+# Byte lookup table: True for bytes that are not whitespace (matches str.split() for ASCII)
+_WORD_BYTE_TABLE = np.array([not chr(i).isspace() for i in range(256)], dtype=bool) if np is not None else None
 
 
 def replace_company_placeholders(text: str, company_name: Optional[str] = None) -> str:
@@ -85,3 +96,42 @@ def replace_placeholders_in_proposal_draft(
     
     return result
 
+
+
+def count_words(text: str) -> int:
+    """
+    Count whitespace-separated words, equivalent to len(text.split()).
+    
+    Large ASCII texts are scanned as bytes with numpy (counting whitespace -> word
+    transitions in C) instead of materializing a list of substrings.
+    """
+    if not text:
+        return 0
+    
+    if _WORD_BYTE_TABLE is not None and len(text) >= _FAST_WORD_COUNT_MIN_CHARS and text.isascii():
+        is_word = _WORD_BYTE_TABLE[np.frombuffer(text.encode("ascii"), dtype=np.uint8)]
+        return int(is_word[0]) + int(np.count_nonzero(is_word[1:] & ~is_word[:-1]))
+    
+    return len(text.split())
+
+
+def calculate_section_counts(sections: Optional[List[Dict[str, Any]]]) -> Tuple[int, int]:
+    """
+    Calculate word and section counts for proposal sections.
+    
+    Args:
+        sections: List of section dicts with a 'content' field
+    
+    Returns:
+        Tuple of (word_count, section_count)
+    """
+    if not sections:
+        return 0, 0
+    
+    word_count = 0
+    for section in sections:
+        content = section.get('content', '') if isinstance(section, dict) else ''
+        if content:
+            word_count += count_words(content)
+    
+    return word_count, len(sections)
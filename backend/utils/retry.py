@@ -3,19 +3,34 @@ Retry mechanisms for resilient API calls.
 """
 from typing import Callable, Any, Optional, Type, Tuple
 from functools import wraps
+import random
 import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _retry_delay(backoff: str, attempt: int, base_delay: float, max_delay: float, jitter: bool) -> float:
+    """Delay before the next attempt; jitter spreads out retries from many callers hitting the same outage."""
+    if backoff == "exponential":
+        delay = min(base_delay * (2 ** (attempt - 1)), max_delay)
+    elif backoff == "linear":
+        delay = min(base_delay * attempt, max_delay)
+    else:  # fixed
+        delay = base_delay
+    if jitter:
+        delay *= random.uniform(0.5, 1.5)
+    return delay
+
+
 def retry(
     max_attempts: int = 3,
     backoff: str = "exponential",
     base_delay: float = 1.0,
     max_delay: float = 60.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable] = None
+    on_retry: Optional[Callable] = None,
+    jitter: bool = True
 ):
     """
     Retry decorator with exponential backoff.
@@ -27,6 +42,7 @@ def retry(
         max_delay: Maximum delay in seconds
         exceptions: Tuple of exceptions to catch
         on_retry: Optional callback function called on each retry
+        jitter: Scale each delay by a random factor in [0.5, 1.5) so clients don't retry in lockstep
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -45,13 +61,7 @@ def retry(
                         )
                         raise
                     
-                    # Calculate delay
-                    if backoff == "exponential":
-                        delay = min(base_delay * (2 ** (attempt - 1)), max_delay)
-                    elif backoff == "linear":
-                        delay = min(base_delay * attempt, max_delay)
-                    else:  # fixed
-                        delay = base_delay
+                    delay = _retry_delay(backoff, attempt, base_delay, max_delay, jitter)
                     
                     logger.warning(
                         f"Function {func.__name__} failed (attempt {attempt}/{max_attempts}): {e}. "
@@ -77,7 +87,8 @@ def async_retry(
     base_delay: float = 1.0,
     max_delay: float = 60.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable] = None
+    on_retry: Optional[Callable] = None,
+    jitter: bool = True
 ):
     """
     Async retry decorator with exponential backoff.
@@ -89,6 +100,7 @@ def async_retry(
         max_delay: Maximum delay in seconds
         exceptions: Tuple of exceptions to catch
         on_retry: Optional async callback function called on each retry
+        jitter: Scale each delay by a random factor in [0.5, 1.5) so clients don't retry in lockstep
     """
     import asyncio
     
@@ -109,13 +121,7 @@ def async_retry(
                         )
                         raise
                     
-                    # Calculate delay
-                    if backoff == "exponential":
-                        delay = min(base_delay * (2 ** (attempt - 1)), max_delay)
-                    elif backoff == "linear":
-                        delay = min(base_delay * attempt, max_delay)
-                    else:  # fixed
-                        delay = base_delay
+                    delay = _retry_delay(backoff, attempt, base_delay, max_delay, jitter)
                     
                     logger.warning(
                         f"Async function {func.__name__} failed (attempt {attempt}/{max_attempts}): {e}. "
@@ -4,7 +4,12 @@ Handles connections and broadcasts for proposals, projects, users, etc.
 """
 from typing import Dict, Set
 from fastapi import WebSocket
-import json
+import orjson
+
+
+def _encode_message(message: dict) -> str:
+    """Serialize a message once with orjson (also handles datetimes and int keys)."""
+    return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
 
 
 class GlobalWebSocketManager:
@@ -42,6 +47,11 @@ class GlobalWebSocketManager:
 
     async def send_to_user(self, user_id: int, message: dict):
         """Send message to a specific user"""
+        if user_id in self.active_connections:
+            await self._send_text_to_user(user_id, _encode_message(message))
+
+    async def _send_text_to_user(self, user_id: int, text: str):
+        """Send an already-serialized message to all of a user's connections"""
         if user_id in self.active_connections:
             disconnected = set()
             for connection in list(self.active_connections[user_id]):  # Use list to avoid modification during iteration
@@ -60,7 +70,7 @@ class GlobalWebSocketManager:
                     if state_name != "CONNECTED":
                         continue
                     
-                    await connection.send_json(message)
+                    await connection.send_text(text)
                 except Exception as e:
                     error_str = str(e).lower()
                     # Silently handle expected connection errors
@@ -82,9 +92,11 @@ class GlobalWebSocketManager:
             # Also include users subscribed to "all"
             user_ids = user_ids | self.subscriptions.get("all", set())
         
-        for user_id in user_ids:
+        # Serialize once for all recipients instead of once per connection
+        text = _encode_message(message)
+        for user_id in list(user_ids):
             if user_id != exclude_user_id:
-                await self.send_to_user(user_id, message)
+                await self._send_text_to_user(user_id, text)
 
     async def broadcast_to_role(self, message: dict, role: str, exclude_user_id: int = None):
         """Broadcast message to all users with a specific role"""
@@ -1,19 +1,19 @@
 """
 Multi-agent system for presales workflow.
 """
-from workflows.agents.rfp_analyzer import rfp_analyzer_agent
-from workflows.agents.challenge_extractor import challenge_extractor_agent
-from workflows.agents.discovery_question import discovery_question_agent
-from workflows.agents.value_proposition import value_proposition_agent
-from workflows.agents.case_study_matcher import case_study_matcher_agent
-from workflows.agents.proposal_builder import proposal_builder_agent
+from workflows.agents.rfp_analyzer import get_rfp_analyzer_agent
+from workflows.agents.challenge_extractor import get_challenge_extractor_agent
+from workflows.agents.discovery_question import get_discovery_question_agent
+from workflows.agents.value_proposition import get_value_proposition_agent
+from workflows.agents.case_study_matcher import get_case_study_matcher_agent
+from workflows.agents.proposal_builder import get_proposal_builder_agent
 
 __all__ = [
-    "rfp_analyzer_agent",
-    "challenge_extractor_agent",
-    "discovery_question_agent",
-    "value_proposition_agent",
-    "case_study_matcher_agent",
-    "proposal_builder_agent",
+    "get_rfp_analyzer_agent",
+    "get_challenge_extractor_agent",
+    "get_discovery_question_agent",
+    "get_value_proposition_agent",
+    "get_case_study_matcher_agent",
+    "get_proposal_builder_agent",
 ]
 
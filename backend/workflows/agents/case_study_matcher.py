@@ -1,6 +1,7 @@
 """
 Case Study Matcher Agent - Uses RAG and knowledge graph to find similar case studies.
 """
+import functools
 from typing import Dict, Any, List
 from sqlalchemy.orm import Session
 from db.database import get_db
@@ -182,6 +183,9 @@ class CaseStudyMatcherAgent:
                 "error": str(e)
             }
 
-# Global instance
-case_study_matcher_agent = CaseStudyMatcherAgent()
+# Global instance, created on first use so importing the module doesn't build an LLM client
+@functools.cache
+def get_case_study_matcher_agent() -> CaseStudyMatcherAgent:
+    """The process-wide CaseStudyMatcherAgent."""
+    return CaseStudyMatcherAgent()
 
@@ -1,21 +1,46 @@
 """
 Challenge Extractor Agent - Generates business/technical challenges from RFP.
 """
+import functools
 from typing import Dict, Any, List
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
 from utils.config import settings
-from utils.llm_factory import get_llm
+from utils.llm_factory import get_llm, structured_llm, with_prompt_caching
 from utils.model_router import TaskType
 from workflows.schemas.output_schemas import ChallengesOutput
 from workflows.prompts.prompt_templates import get_few_shot_challenge_extractor_prompt
 
+SYSTEM_PROMPT = get_few_shot_challenge_extractor_prompt()
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT + """
+
+For each challenge, provide:
+- Challenge description
+- Type (Business/Technical/Compliance/Operational)
+- Impact/Importance (High/Medium/Low)
+- Category (optional)"""),
+    ("user", """Based on the following RFP summary, identify the key challenges:
+
+RFP Summary:
+{rfp_summary}
+
+Business Objectives:
+{objectives}
+
+Provide challenges in the specified JSON format.""")
+])
+
 class ChallengeExtractorAgent:
     """Agent that extracts challenges from RFP analysis."""
     
     def __init__(self):
         self.llm = None
+        self.chain = None
         self._initialize()
+        if self.llm:
+            # Built once per agent; the provider's structured output returns a validated ChallengesOutput
+            self.chain = with_prompt_caching(PROMPT, self.llm) | structured_llm(self.llm, ChallengesOutput)
     
     def _initialize(self):
         """Initialize the LLM with intelligent routing."""
@@ -31,6 +56,27 @@ class ChallengeExtractorAgent:
         except Exception as e:
             print(f"Error initializing Challenge Extractor Agent: {e}")
     
+    @staticmethod
+    def _inputs(rfp_summary: str, business_objectives: List[str] = None) -> Dict[str, Any]:
+        """Chain inputs for one RFP."""
+        objectives_text = ""
+        if business_objectives:
+            objectives_text = "\n".join([f"- {obj}" for obj in business_objectives])
+        
+        return {
+            "rfp_summary": rfp_summary or "No summary available",
+            "objectives": objectives_text or "No objectives specified"
+        }
+    
+    @staticmethod
+    def _result(response: ChallengesOutput) -> Dict[str, Any]:
+        """Agent result from the structured LLM response."""
+        return {
+            # One model_dump() of the whole response instead of one per challenge
+            "challenges": response.model_dump()["challenges"],
+            "error": None
+        }
+    
     def extract_challenges(
         self,
         rfp_summary: str,
@@ -51,76 +97,79 @@ class ChallengeExtractorAgent:
                 "challenges": [],
                 "error": "LLM not initialized"
             }
+        if not (rfp_summary or "").strip() and not business_objectives:
+            # Nothing to extract from; skip the LLM round-trip
+            return {
+                "challenges": [],
+                "error": None
+            }
         
-        objectives_text = ""
-        if business_objectives:
-            objectives_text = "\n".join([f"- {obj}" for obj in business_objectives])
-        
-        # Set up structured output parser
-        output_parser = PydanticOutputParser(pydantic_object=ChallengesOutput)
-        
-        # Simple format instructions without JSON schema to avoid template parsing issues
-        # Use escaped curly braces to prevent LangChain from treating JSON field names as template variables
-        format_instructions_simple = """Return your response as a valid JSON object with a challenges array. Each challenge should have:
-- challenge: Description of the challenge
-- type: One of business, technical, operational, or compliance
-- impact: One of high, medium, or low
-- category: Optional category name
-
-Example structure: {{"challenges": [{{"challenge": "...", "type": "...", "impact": "...", "category": "..."}}]}}"""
+        try:
+            return self._result(self.chain.invoke(self._inputs(rfp_summary, business_objectives)))
+        except Exception as e:
+            return {
+                "challenges": [],
+                "error": str(e)
+            }
+    
+    def extract_challenges_batch(
+        self,
+        rfp_summaries: List[str],
+        business_objectives: List[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        extract_challenges() for several RFPs, dispatched concurrently through one chain.batch() call.
         
-        system_prompt = get_few_shot_challenge_extractor_prompt()
+        Args:
+            rfp_summaries: One summary per RFP
+            business_objectives: Optional objectives per RFP (same order)
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt + """
-
-For each challenge, provide:
-- Challenge description
-- Type (Business/Technical/Compliance/Operational)
-- Impact/Importance (High/Medium/Low)
-- Category (optional)
-"""),
-            ("user", """Based on the following RFP summary, identify the key challenges:
-
-RFP Summary:
-{rfp_summary}
-
-Business Objectives:
-{objectives}
-
-{format_instructions}
-
-Provide challenges in the specified JSON format.""")
-        ])
+        Returns:
+            One extract_challenges() result per RFP, in input order
+        """
+        if not self.llm:
+            return [{"challenges": [], "error": "LLM not initialized"} for _ in rfp_summaries]
         
-        try:
-            chain = prompt | self.llm | output_parser
-            response = chain.invoke({
-                "rfp_summary": rfp_summary or "No summary available",
-                "objectives": objectives_text or "No objectives specified",
-                "format_instructions": format_instructions_simple
-            })
-            
-            # Response is already parsed as Pydantic model
-            if isinstance(response, ChallengesOutput):
-                challenges = [challenge.model_dump() for challenge in response.challenges]
-            elif isinstance(response, dict):
-                challenges = response.get("challenges", [])
-            else:
-                # Fallback
-                challenges = []
-            
+        objectives = business_objectives or [None] * len(rfp_summaries)
+        responses = self.chain.batch(
+            [self._inputs(summary, objs) for summary, objs in zip(rfp_summaries, objectives)],
+            config={"max_concurrency": settings.LLM_BATCH_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        return [
+            {"challenges": [], "error": str(response)} if isinstance(response, Exception) else self._result(response)
+            for response in responses
+        ]
+    
+    async def aextract_challenges(
+        self,
+        rfp_summary: str,
+        business_objectives: List[str] = None
+    ) -> Dict[str, Any]:
+        """Async variant of extract_challenges() (awaits the LLM instead of blocking a thread)."""
+        if not self.llm:
+            return {
+                "challenges": [],
+                "error": "LLM not initialized"
+            }
+        if not (rfp_summary or "").strip() and not business_objectives:
+            # Nothing to extract from; skip the LLM round-trip
             return {
-                "challenges": challenges,
+                "challenges": [],
                 "error": None
             }
         
+        try:
+            return self._result(await self.chain.ainvoke(self._inputs(rfp_summary, business_objectives)))
         except Exception as e:
             return {
                 "challenges": [],
                 "error": str(e)
             }
 
-# Global instance
-challenge_extractor_agent = ChallengeExtractorAgent()
+# Global instance, created on first use so importing the module doesn't build an LLM client
+@functools.cache
+def get_challenge_extractor_agent() -> ChallengeExtractorAgent:
+    """The process-wide ChallengeExtractorAgent."""
+    return ChallengeExtractorAgent()
 
@@ -1,22 +1,66 @@
 """
 Discovery Question Agent - Generates categorized discovery questions.
 """
+import asyncio
+import functools
 from typing import Dict, Any, List
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
 from utils.config import settings
-from utils.llm_factory import get_llm
+from utils.llm_factory import get_llm, structured_llm, with_prompt_caching
 from utils.model_router import TaskType
 from workflows.schemas.output_schemas import DiscoveryQuestionsOutput
 from workflows.prompts.prompt_templates import get_few_shot_discovery_question_prompt
 
+# Question category -> DiscoveryQuestionsOutput field
+CATEGORY_FIELDS = {
+    "Business": "business_questions",
+    "Technology": "technical_questions",
+    "KPIs": "kpi_questions",
+    "Compliance": "compliance_questions",
+    "Other": "other_questions"
+}
+
+# Per-category {focus} line of the user prompt, rendered once
+CATEGORY_FOCUS = {
+    category: f"\nGenerate questions for the {category} category only ({field}); leave the other arrays empty.\n"
+    for category, field in CATEGORY_FIELDS.items()
+}
+
+# Generic questions returned when there are no challenges or the LLM call fails
+FALLBACK_QUESTIONS = {
+    "Business": ["What are your primary business objectives?"],
+    "Technology": ["What is your current technology stack?"],
+    "KPIs": ["What metrics do you track?"],
+    "Compliance": ["What compliance requirements must be met?"],
+    "Other": []
+}
+
+SYSTEM_PROMPT = get_few_shot_discovery_question_prompt()
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT + """
+
+Organize questions by category: Business, Technology, KPIs, Compliance, and Other.
+Generate 3-5 questions per category."""),
+    ("user", """Based on these challenges, generate discovery questions:
+
+Challenges:
+{challenges}
+{focus}
+Provide questions in the specified JSON format.""")
+])
+
 class DiscoveryQuestionAgent:
     """Agent that generates discovery questions."""
     
     def __init__(self):
         self.llm = None
-        self.categories = ["Business", "Technology", "KPIs", "Compliance"]
+        self.chain = None
+        self.categories = list(CATEGORY_FIELDS)
         self._initialize()
+        if self.llm:
+            # Built once per agent; the provider's structured output returns a validated DiscoveryQuestionsOutput
+            self.chain = with_prompt_caching(PROMPT, self.llm) | structured_llm(self.llm, DiscoveryQuestionsOutput)
     
     def _initialize(self):
         """Initialize the LLM with intelligent routing."""
@@ -32,6 +76,39 @@ class DiscoveryQuestionAgent:
         except Exception as e:
             print(f"Error initializing Discovery Question Agent: {e}")
     
+    @staticmethod
+    def _inputs(challenges: List[Dict[str, Any]], category: str = None) -> Dict[str, Any]:
+        """Chain inputs; with a category, only that category's questions are asked for."""
+        challenges_text = ""
+        if challenges:
+            challenges_text = "\n".join([
+                f"- {ch.get('description', '')} (Type: {ch.get('type', 'Unknown')})"
+                for ch in challenges
+            ])
+        
+        return {
+            "challenges": challenges_text or "No challenges identified",
+            "focus": CATEGORY_FOCUS[category] if category else ""
+        }
+    
+    @staticmethod
+    def _fallback_questions() -> Dict[str, List[str]]:
+        """Fresh copy of FALLBACK_QUESTIONS (callers may extend the lists)."""
+        return {category: list(questions) for category, questions in FALLBACK_QUESTIONS.items()}
+    
+    @classmethod
+    def _no_challenges(cls) -> Dict[str, Any]:
+        """Result without an LLM call: with nothing to ground them in, the generic questions are the answer."""
+        return {
+            "discovery_questions": cls._fallback_questions(),
+            "error": None
+        }
+    
+    @staticmethod
+    def _questions(response: DiscoveryQuestionsOutput) -> Dict[str, List[str]]:
+        """Questions by category from the structured LLM response."""
+        return {category: getattr(response, field) for category, field in CATEGORY_FIELDS.items()}
+    
     def generate_questions(
         self,
         challenges: List[Dict[str, Any]]
@@ -50,91 +127,90 @@ class DiscoveryQuestionAgent:
                 "discovery_questions": {},
                 "error": "LLM not initialized"
             }
+        if not challenges:
+            return self._no_challenges()
         
-        challenges_text = ""
-        if challenges:
-            challenges_text = "\n".join([
-                f"- {ch.get('description', '')} (Type: {ch.get('type', 'Unknown')})"
-                for ch in challenges
-            ])
-        
-        # Set up structured output parser
-        output_parser = PydanticOutputParser(pydantic_object=DiscoveryQuestionsOutput)
+        try:
+            response = self.chain.invoke(self._inputs(challenges))
+            return {
+                "discovery_questions": self._questions(response),
+                "error": None
+            }
+        except Exception as e:
+            return {
+                "discovery_questions": self._fallback_questions(),
+                "error": str(e)
+            }
+    
+    def generate_questions_batch(
+        self,
+        challenges_list: List[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        generate_questions() for several projects, dispatched concurrently through one chain.batch() call.
         
-        # Simple format instructions without JSON schema to avoid template parsing issues
-        # Use escaped curly braces to prevent LangChain from treating JSON field names as template variables
-        format_instructions_simple = """Return your response as a valid JSON object with question arrays:
-- business_questions: Array of business-related questions
-- technical_questions: Array of technical questions
-- kpi_questions: Array of KPI and metrics questions
-- compliance_questions: Array of compliance questions
-- other_questions: Array of other questions
-
-Example: {{"business_questions": ["..."], "technical_questions": ["..."], ...}}"""
+        Args:
+            challenges_list: One challenges list per project
         
-        system_prompt = get_few_shot_discovery_question_prompt()
+        Returns:
+            One generate_questions() result per project, in input order
+        """
+        if not self.llm:
+            return [{"discovery_questions": {}, "error": "LLM not initialized"} for _ in challenges_list]
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt + """
-
-Organize questions by category: Business, Technology, KPIs, Compliance, and Other.
-Generate 3-5 questions per category.
-"""),
-            ("user", """Based on these challenges, generate discovery questions:
-
-Challenges:
-{challenges}
-
-{format_instructions}
-
-Provide questions in the specified JSON format.""")
-        ])
+        responses = self.chain.batch(
+            [self._inputs(challenges) for challenges in challenges_list],
+            config={"max_concurrency": settings.LLM_BATCH_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        return [
+            {"discovery_questions": self._fallback_questions(), "error": str(response)} if isinstance(response, Exception)
+            else {"discovery_questions": self._questions(response), "error": None}
+            for response in responses
+        ]
+    
+    async def agenerate_questions(
+        self,
+        challenges: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_questions(): one concurrent LLM call per category, merged.
         
-        try:
-            chain = prompt | self.llm | output_parser
-            response = chain.invoke({
-                "challenges": challenges_text or "No challenges identified",
-                "format_instructions": format_instructions_simple
-            })
-            
-            # Response is already parsed as Pydantic model
-            if isinstance(response, DiscoveryQuestionsOutput):
-                questions = {
-                    "Business": response.business_questions,
-                    "Technology": response.technical_questions,
-                    "KPIs": response.kpi_questions,
-                    "Compliance": response.compliance_questions,
-                    "Other": response.other_questions
-                }
-            elif isinstance(response, dict):
-                questions = {
-                    "Business": response.get("business_questions", []),
-                    "Technology": response.get("technical_questions", []),
-                    "KPIs": response.get("kpi_questions", []),
-                    "Compliance": response.get("compliance_questions", []),
-                    "Other": response.get("other_questions", [])
-                }
-            else:
-                # Fallback
-                questions = {
-                    "Business": ["What are your primary business objectives?"],
-                    "Technology": ["What is your current technology stack?"],
-                    "KPIs": ["What metrics do you track?"],
-                    "Compliance": ["What compliance requirements must be met?"],
-                    "Other": []
-                }
-            
+        A failed category comes back empty; only if every category fails is an error returned.
+        """
+        if not self.llm:
             return {
-                "discovery_questions": questions,
-                "error": None
+                "discovery_questions": {},
+                "error": "LLM not initialized"
             }
+        if not challenges:
+            return self._no_challenges()
         
-        except Exception as e:
+        chain = self.chain
+        responses = await asyncio.gather(
+            *[chain.ainvoke(self._inputs(challenges, category)) for category in self.categories],
+            return_exceptions=True
+        )
+        
+        errors = [response for response in responses if isinstance(response, Exception)]
+        if len(errors) == len(responses):
             return {
-                "discovery_questions": {},
-                "error": str(e)
+                "discovery_questions": self._fallback_questions(),
+                "error": str(errors[0])
             }
+        
+        questions = {
+            category: [] if isinstance(response, Exception) else self._questions(response)[category]
+            for category, response in zip(self.categories, responses)
+        }
+        return {
+            "discovery_questions": questions,
+            "error": None
+        }
 
-# Global instance
-discovery_question_agent = DiscoveryQuestionAgent()
+# Global instance, created on first use so importing the module doesn't build an LLM client
+@functools.cache
+def get_discovery_question_agent() -> DiscoveryQuestionAgent:
+    """The process-wide DiscoveryQuestionAgent."""
+    return DiscoveryQuestionAgent()
 
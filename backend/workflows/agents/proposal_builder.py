@@ -1,22 +1,62 @@
 """
 Proposal Builder Agent - Drafts complete proposal sections.
 """
-from typing import Dict, Any, List
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
 from utils.config import settings
-from utils.llm_factory import get_llm
+from utils.gemini_service import gemini_service
+from utils.llm_factory import GeminiLangChainWrapper, get_llm, structured_llm, with_prompt_caching
 from utils.model_router import TaskType
 from workflows.schemas.output_schemas import ProposalDraftOutput
 from workflows.prompts.prompt_templates import get_few_shot_proposal_builder_prompt
-from workflows.agents.proposal_refiner import proposal_refiner_agent
+from workflows.agents.proposal_refiner import get_proposal_refiner_agent
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = get_few_shot_proposal_builder_prompt()
+
+# Default text for sections the LLM left empty, built once from the 13-section schema
+SECTION_PLACEHOLDERS = {
+    field: f"{field.replace('_', ' ').title()} section - to be completed based on RFP requirements"
+    for field in ProposalDraftOutput.model_fields
+}
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT + """
+
+Create a comprehensive proposal draft following the 13-section structure.
+Each section must start with a business impact statement and connect features to measurable KPIs.
+Use quantitative improvements and business language throughout."""),
+    ("user", """Create a proposal draft based on:
+
+RFP Summary:
+{rfp_summary}
+
+Client Challenges:
+{challenges}
+
+Value Propositions:
+{value_propositions}
+
+Relevant Case Studies:
+{case_studies}
+
+Provide proposal in the specified JSON format.""")
+])
 
 class ProposalBuilderAgent:
     """Agent that builds proposal drafts."""
     
     def __init__(self):
         self.llm = None
+        self.chain = None
         self._initialize()
+        if self.llm:
+            # Built once per agent; the provider's structured output returns a validated ProposalDraftOutput
+            self.chain = with_prompt_caching(PROMPT, self.llm) | structured_llm(self.llm, ProposalDraftOutput)
     
     def _initialize(self):
         """Initialize the LLM with intelligent routing."""
@@ -28,43 +68,26 @@ class ProposalBuilderAgent:
                 task_type=TaskType.HIGH_QUALITY,  # High-quality output
                 prefer_provider=settings.LLM_PROVIDER if settings.LLM_PROVIDER in ["openai", "claude"] else None
             )
-            if self.llm:
-                print(f"✓ Proposal Builder Agent initialized with intelligent routing")
+            # Checked once here instead of on every build_proposal() call; only the Gemini wrapper needs the key
+            if isinstance(self.llm, GeminiLangChainWrapper) and not gemini_service.is_available():
+                logger.warning("Proposal Builder Agent: Gemini API key not configured")
+                self.llm = None
+            elif self.llm:
+                logger.info("Proposal Builder Agent initialized with intelligent routing")
             else:
-                print(f"⚠ Proposal Builder Agent: LLM not available")
+                logger.warning("Proposal Builder Agent: LLM not available")
         except Exception as e:
-            print(f"⚠ Error initializing Proposal Builder Agent: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error initializing Proposal Builder Agent: %s", e)
             self.llm = None
     
-    def build_proposal(
-        self,
+    @staticmethod
+    def _texts(
         rfp_summary: str,
         challenges: List[Dict[str, Any]],
         value_propositions: List[str],
-        case_studies: List[Dict[str, Any]] = None,
-        use_refinement: bool = True,
-        max_refinement_iterations: int = 2
-    ) -> Dict[str, Any]:
-        """
-        Build proposal draft with all sections.
-        
-        Args:
-            rfp_summary: RFP summary
-            challenges: List of challenges
-            value_propositions: List of value propositions
-            case_studies: List of matched case studies
-        
-        Returns:
-            dict with proposal_draft sections
-        """
-        if not self.llm:
-            return {
-                "proposal_draft": None,
-                "error": "LLM not initialized"
-            }
-        
+        case_studies: List[Dict[str, Any]] = None
+    ) -> Tuple[str, str, str, str]:
+        """Prompt texts: (rfp_summary, challenges, value propositions, case studies)."""
         # Format challenges - handle both dict and string formats
         challenges_text = ""
         if challenges:
@@ -107,208 +130,321 @@ class ProposalBuilderAgent:
         if not value_props_text or value_props_text == "None":
             value_props_text = "Our solution will address the key requirements outlined in the RFP"
         
-        # Set up structured output parser
-        output_parser = PydanticOutputParser(pydantic_object=ProposalDraftOutput)
+        return rfp_summary, challenges_text, value_props_text, case_studies_text
+    
+    @staticmethod
+    def _inputs(rfp_summary: str, challenges_text: str, value_props_text: str, case_studies_text: str) -> Dict[str, Any]:
+        """Chain inputs for one proposal."""
+        return {
+            "rfp_summary": rfp_summary or "No summary available",
+            "challenges": challenges_text or "No challenges identified",
+            "value_propositions": value_props_text,
+            "case_studies": case_studies_text or "No case studies available"
+        }
+    
+    @staticmethod
+    def _has_content(rfp_summary: str, challenges: List[Dict[str, Any]], value_propositions: List[str]) -> bool:
+        """False when there is nothing project-specific to draft from."""
+        return bool((rfp_summary or "").strip() or challenges or value_propositions)
+    
+    @staticmethod
+    def _placeholder_result() -> Dict[str, Any]:
+        """Placeholder draft returned instead of asking the LLM for a proposal with no inputs."""
+        return {
+            "proposal_draft": dict(SECTION_PLACEHOLDERS),
+            "refinement_results": None,
+            "error": None
+        }
+    
+    @staticmethod
+    def _draft(response: ProposalDraftOutput) -> Dict[str, Any]:
+        """13-section proposal draft from the structured LLM response."""
+        # Flat model of strings: a shallow dict() copy is enough, no model_dump() schema walk
+        proposal_draft = dict(response)
         
-        # Simple format instructions without JSON schema to avoid template parsing issues
-        # Use escaped curly braces to prevent LangChain from treating JSON field names as template variables
-        format_instructions_simple = """Return your response as a valid JSON object with these string fields:
-- executive_summary: Executive Summary (1️⃣)
-- understanding_client_needs: Understanding of Client Needs (2️⃣)
-- proposed_solution: Proposed Solution (3️⃣)
-- solution_architecture: Solution Architecture & Technology Stack (4️⃣)
-- business_value_use_cases: Business Value & Use Cases (5️⃣)
-- benefits_roi: Benefits & ROI Justification (6️⃣)
-- implementation_roadmap: Implementation Roadmap & Timeline (7️⃣)
-- change_management_training: Change Management & Training Strategy (8️⃣)
-- security_compliance: Security, Compliance & Data Governance (9️⃣)
-- case_studies_credentials: Case Studies & Delivery Credentials (🔟)
-- commercial_model: Commercial Model & Licensing Options (1️⃣1️⃣)
-- risks_assumptions: Risks, Assumptions & Mitigation (1️⃣2️⃣)
-- next_steps_cta: Next Steps & Call-to-Action (1️⃣3️⃣)
-
-Each section should:
-- Start with a short business impact statement
-- Connect features to measurable business KPIs
-- Include quantitative improvements where possible
-- Use business language that executives understand
-
-Example: {{"executive_summary": "...", "understanding_client_needs": "...", ...}}"""
+        # Ensure all required fields have content (13-section structure)
+        for field, placeholder in SECTION_PLACEHOLDERS.items():
+            if not proposal_draft.get(field):
+                proposal_draft[field] = placeholder
         
-        system_prompt = get_few_shot_proposal_builder_prompt()
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt + """
-
-Create a comprehensive proposal draft following the 13-section structure.
-Each section must start with a business impact statement and connect features to measurable KPIs.
-Use quantitative improvements and business language throughout.
-"""),
-            ("user", """Create a proposal draft based on:
-
-RFP Summary:
-{rfp_summary}
-
-Client Challenges:
-{challenges}
-
-Value Propositions:
-{value_propositions}
-
-Relevant Case Studies:
-{case_studies}
-
-{format_instructions}
-
-Provide proposal in the specified JSON format.""")
-        ])
+        logger.debug("[Proposal Builder] Proposal draft validated with %d sections", len(proposal_draft))
         
+        return proposal_draft
+    
+    @staticmethod
+    def _review_score(review_results: Dict[str, Any], stage: str) -> float:
+        """Overall score of a review, logged under the given stage name."""
+        score = review_results.get("overall_score", 70.0)
+        logger.debug("[Proposal Builder] %s quality score: %.1f/100", stage, score)
+        return score
+    
+    @staticmethod
+    def _next_step(review_results: Dict[str, Any], best_score: float) -> Optional[float]:
+        """New best score after a re-review, or None to stop (good enough or not improving)."""
+        refined_score = ProposalBuilderAgent._review_score(review_results, "Refined")
+        if refined_score >= 85.0 or refined_score <= best_score:
+            return None
+        return refined_score
+    
+    @staticmethod
+    def _refinement_summary(
+        initial_score: float,
+        review_results: Optional[Dict[str, Any]] = None,
+        iterations: int = 0
+    ) -> Dict[str, Any]:
+        """Refinement results; without review_results the initial draft was kept as acceptable."""
+        if review_results is None:
+            return {
+                "initial_score": initial_score,
+                "final_score": initial_score,
+                "iterations": 0,
+                "message": "Quality score already acceptable"
+            }
+        return {
+            "initial_score": initial_score,
+            "final_score": review_results.get("overall_score", 70.0),
+            "iterations": iterations
+        }
+    
+    def _refine(
+        self,
+        proposal_draft: Dict[str, Any],
+        rfp_summary: str,
+        challenges: List[Dict[str, Any]],
+        max_refinement_iterations: int
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Review -> refine loop; returns the (possibly refined) draft and the refinement results."""
+        logger.debug("[Proposal Builder] Starting refinement (max %d iterations)", max_refinement_iterations)
+        refiner = get_proposal_refiner_agent()
+        review_kwargs = {"rfp_summary": rfp_summary or "No summary available", "challenges": challenges or []}
         try:
-            # Check if Gemini service is available
-            from utils.gemini_service import gemini_service
-            if not gemini_service.is_available():
-                return {
-                    "proposal_draft": None,
-                    "error": "Gemini API key not configured"
-                }
+            review_results = refiner.review_proposal(proposal_draft=proposal_draft, **review_kwargs)
+            initial_score = self._review_score(review_results, "Initial")
             
-            chain = prompt | self.llm | output_parser
-            response = chain.invoke({
-                "rfp_summary": rfp_summary or "No summary available",
-                "challenges": challenges_text or "No challenges identified",
-                "value_propositions": value_props_text,
-                "case_studies": case_studies_text or "No case studies available",
-                "format_instructions": format_instructions_simple
-            })
+            # Refine if score is below threshold
+            if initial_score >= 85.0 or max_refinement_iterations <= 0:
+                return proposal_draft, self._refinement_summary(initial_score)
             
-            # Check for errors in response
-            if hasattr(response, 'error') and response.error:
-                return {
-                    "proposal_draft": None,
-                    "error": response.error
-                }
+            best_score = initial_score
+            iterations = 0
+            for iteration in range(max_refinement_iterations):
+                logger.debug("[Proposal Builder] Refinement iteration %d/%d", iteration + 1, max_refinement_iterations)
+                refined_draft = refiner.refine_proposal(
+                    proposal_draft=proposal_draft,
+                    review_results=review_results,
+                    rfp_summary=review_kwargs["rfp_summary"],
+                    max_iterations=1
+                )
+                # Unchanged draft (refinement skipped or failed): a re-review would repeat the last one
+                if refined_draft == proposal_draft:
+                    break
+                proposal_draft = refined_draft
+                iterations += 1
+                
+                review_results = refiner.review_proposal(proposal_draft=proposal_draft, **review_kwargs)
+                best_score = self._next_step(review_results, best_score)
+                if best_score is None:
+                    break
             
-            # Response is already parsed as Pydantic model
-            if isinstance(response, ProposalDraftOutput):
-                proposal_draft = response.model_dump()
-                print(f"  [Proposal Builder] ✓ Parsed Pydantic model successfully")
-            elif isinstance(response, dict):
-                proposal_draft = response
-                print(f"  [Proposal Builder] ✓ Parsed dict response successfully")
-            else:
-                # Fallback - create a basic proposal structure with 13 sections
-                print(f"  [Proposal Builder] ⚠ Unexpected response type: {type(response)}, creating fallback proposal")
-                content = str(response)
-                proposal_draft = {
-                    "executive_summary": content[:500] if content and len(content) > 10 else "Executive summary based on RFP requirements",
-                    "understanding_client_needs": challenges_text or "Understanding of client needs and requirements",
-                    "proposed_solution": "Comprehensive solution approach tailored to RFP requirements",
-                    "solution_architecture": "Solution architecture and technology stack details",
-                    "business_value_use_cases": value_props_text or "Business value and use cases",
-                    "benefits_roi": "Benefits and ROI justification",
-                    "implementation_roadmap": "Implementation roadmap and timeline",
-                    "change_management_training": "Change management and training strategy",
-                    "security_compliance": "Security, compliance and data governance",
-                    "case_studies_credentials": case_studies_text or "Case studies and delivery credentials",
-                    "commercial_model": "Commercial model and licensing options",
-                    "risks_assumptions": "Risks, assumptions and mitigation",
-                    "next_steps_cta": "Next steps and call-to-action"
-                }
+            return proposal_draft, self._refinement_summary(initial_score, review_results, iterations)
+        except Exception as e:
+            logger.warning("[Proposal Builder] Refinement failed: %s", e)
+            return proposal_draft, {"error": str(e)}
+    
+    async def _arefine(
+        self,
+        proposal_draft: Dict[str, Any],
+        rfp_summary: str,
+        challenges: List[Dict[str, Any]],
+        max_refinement_iterations: int
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Async variant of _refine()."""
+        logger.debug("[Proposal Builder] Starting refinement (max %d iterations)", max_refinement_iterations)
+        refiner = get_proposal_refiner_agent()
+        review_kwargs = {"rfp_summary": rfp_summary or "No summary available", "challenges": challenges or []}
+        try:
+            review_results = await refiner.areview_proposal(proposal_draft=proposal_draft, **review_kwargs)
+            initial_score = self._review_score(review_results, "Initial")
             
-            # Validate proposal_draft has content
-            if not proposal_draft or not isinstance(proposal_draft, dict):
-                print(f"  [Proposal Builder] ⚠ Invalid proposal_draft, creating minimal proposal")
-                proposal_draft = {
-                    "executive_summary": f"Executive summary for the project based on the RFP document",
-                    "understanding_client_needs": challenges_text or "Client needs and requirements",
-                    "proposed_solution": "Proposed solution addressing the RFP requirements",
-                    "solution_architecture": "Solution architecture and technology stack",
-                    "business_value_use_cases": value_props_text or "Business value and use cases",
-                    "benefits_roi": "Benefits and ROI justification",
-                    "implementation_roadmap": "Implementation roadmap and timeline",
-                    "change_management_training": "Change management and training strategy",
-                    "security_compliance": "Security, compliance and data governance",
-                    "case_studies_credentials": case_studies_text or "Case studies and delivery credentials",
-                    "commercial_model": "Commercial model and licensing options",
-                    "risks_assumptions": "Risks, assumptions and mitigation",
-                    "next_steps_cta": "Next steps and call-to-action"
-                }
+            # Refine if score is below threshold
+            if initial_score >= 85.0 or max_refinement_iterations <= 0:
+                return proposal_draft, self._refinement_summary(initial_score)
             
-            # Ensure all required fields exist (13-section structure)
-            required_fields = [
-                "executive_summary", "understanding_client_needs", "proposed_solution",
-                "solution_architecture", "business_value_use_cases", "benefits_roi",
-                "implementation_roadmap", "change_management_training", "security_compliance",
-                "case_studies_credentials", "commercial_model", "risks_assumptions", "next_steps_cta"
-            ]
-            for field in required_fields:
-                if field not in proposal_draft or not proposal_draft[field]:
-                    # Create a meaningful default based on field name
-                    field_display = field.replace('_', ' ').title()
-                    proposal_draft[field] = f"{field_display} section - to be completed based on RFP requirements"
+            best_score = initial_score
+            iterations = 0
+            for iteration in range(max_refinement_iterations):
+                logger.debug("[Proposal Builder] Refinement iteration %d/%d", iteration + 1, max_refinement_iterations)
+                refined_draft = await refiner.arefine_proposal(
+                    proposal_draft=proposal_draft,
+                    review_results=review_results,
+                    rfp_summary=review_kwargs["rfp_summary"],
+                    max_iterations=1
+                )
+                # Unchanged draft (refinement skipped or failed): a re-review would repeat the last one
+                if refined_draft == proposal_draft:
+                    break
+                proposal_draft = refined_draft
+                iterations += 1
+                
+                review_results = await refiner.areview_proposal(proposal_draft=proposal_draft, **review_kwargs)
+                best_score = self._next_step(review_results, best_score)
+                if best_score is None:
+                    break
             
-            print(f"  [Proposal Builder] ✓ Proposal draft validated with {len(proposal_draft)} sections")
+            return proposal_draft, self._refinement_summary(initial_score, review_results, iterations)
+        except Exception as e:
+            logger.warning("[Proposal Builder] Refinement failed: %s", e)
+            return proposal_draft, {"error": str(e)}
+    
+    def build_proposal(
+        self,
+        rfp_summary: str,
+        challenges: List[Dict[str, Any]],
+        value_propositions: List[str],
+        case_studies: List[Dict[str, Any]] = None,
+        use_refinement: bool = True,
+        max_refinement_iterations: int = 2
+    ) -> Dict[str, Any]:
+        """
+        Build proposal draft with all sections.
+        
+        Args:
+            rfp_summary: RFP summary
+            challenges: List of challenges
+            value_propositions: List of value propositions
+            case_studies: List of matched case studies
+        
+        Returns:
+            dict with proposal_draft sections
+        """
+        if not self.llm:
+            return {
+                "proposal_draft": None,
+                "error": "LLM not initialized"
+            }
+        if not self._has_content(rfp_summary, challenges, value_propositions):
+            return self._placeholder_result()
+        
+        texts = self._texts(rfp_summary, challenges, value_propositions, case_studies)
+        rfp_summary = texts[0]
+        
+        try:
+            response = self.chain.invoke(self._inputs(*texts))
+            
+            proposal_draft = self._draft(response)
             
             # Apply refinement if enabled
             refinement_results = None
             if use_refinement and proposal_draft:
-                print(f"  [Proposal Builder] Starting refinement (max {max_refinement_iterations} iterations)...")
-                try:
-                    # Review proposal
-                    review_results = proposal_refiner_agent.review_proposal(
-                        proposal_draft=proposal_draft,
-                        rfp_summary=rfp_summary or "No summary available",
-                        challenges=challenges or []
+                proposal_draft, refinement_results = self._refine(
+                    proposal_draft, rfp_summary, challenges, max_refinement_iterations
+                )
+            
+            return {
+                "proposal_draft": proposal_draft,
+                "refinement_results": refinement_results,
+                "error": None
+            }
+        
+        except Exception as e:
+            logger.exception("Proposal Builder error: %s", e)
+            return {
+                "proposal_draft": None,
+                "error": f"Proposal generation failed: {str(e)}"
+            }
+    
+    def build_proposal_batch(
+        self,
+        proposals: List[Dict[str, Any]],
+        use_refinement: bool = True,
+        max_refinement_iterations: int = 2
+    ) -> List[Dict[str, Any]]:
+        """
+        build_proposal() for several projects: drafts go through one chain.batch() call and the
+        review/refine loops then run concurrently, both capped at LLM_BATCH_MAX_CONCURRENCY.
+        
+        Args:
+            proposals: One dict of build_proposal() inputs (rfp_summary, challenges,
+                value_propositions, case_studies) per project
+        
+        Returns:
+            One build_proposal() result per project, in input order
+        """
+        if not self.llm:
+            return [{"proposal_draft": None, "error": "LLM not initialized"} for _ in proposals]
+        
+        texts_list = [
+            self._texts(
+                proposal.get("rfp_summary"),
+                proposal.get("challenges"),
+                proposal.get("value_propositions"),
+                proposal.get("case_studies")
+            )
+            for proposal in proposals
+        ]
+        responses = self.chain.batch(
+            [self._inputs(*texts) for texts in texts_list],
+            config={"max_concurrency": settings.LLM_BATCH_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        
+        def finish(proposal: Dict[str, Any], texts: Tuple[str, str, str, str], response: Any) -> Dict[str, Any]:
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                
+                proposal_draft = self._draft(response)
+                refinement_results = None
+                if use_refinement and proposal_draft:
+                    proposal_draft, refinement_results = self._refine(
+                        proposal_draft, texts[0], proposal.get("challenges"), max_refinement_iterations
                     )
-                    
-                    initial_score = review_results.get("overall_score", 70.0)
-                    print(f"  [Proposal Builder] Initial quality score: {initial_score:.1f}/100")
-                    
-                    # Refine if score is below threshold
-                    if initial_score < 85.0 and max_refinement_iterations > 0:
-                        refined_draft = proposal_draft
-                        for iteration in range(max_refinement_iterations):
-                            print(f"  [Proposal Builder] Refinement iteration {iteration + 1}/{max_refinement_iterations}...")
-                            
-                            refined_draft = proposal_refiner_agent.refine_proposal(
-                                proposal_draft=refined_draft,
-                                review_results=review_results,
-                                rfp_summary=rfp_summary or "No summary available",
-                                max_iterations=1
-                            )
-                            
-                            # Review refined draft
-                            review_results = proposal_refiner_agent.review_proposal(
-                                proposal_draft=refined_draft,
-                                rfp_summary=rfp_summary or "No summary available",
-                                challenges=challenges or []
-                            )
-                            
-                            refined_score = review_results.get("overall_score", 70.0)
-                            print(f"  [Proposal Builder] Refined quality score: {refined_score:.1f}/100")
-                            
-                            # Stop if score is good enough or not improving
-                            if refined_score >= 85.0 or refined_score <= initial_score:
-                                break
-                            
-                            initial_score = refined_score
-                        
-                        proposal_draft = refined_draft
-                        refinement_results = {
-                            "initial_score": review_results.get("overall_score", 70.0),
-                            "final_score": review_results.get("overall_score", 70.0),
-                            "iterations": iteration + 1 if 'iteration' in locals() else 0
-                        }
-                    else:
-                        refinement_results = {
-                            "initial_score": initial_score,
-                            "final_score": initial_score,
-                            "iterations": 0,
-                            "message": "Quality score already acceptable"
-                        }
-                except Exception as e:
-                    print(f"  [WARNING] Refinement failed: {e}")
-                    refinement_results = {"error": str(e)}
+                return {
+                    "proposal_draft": proposal_draft,
+                    "refinement_results": refinement_results,
+                    "error": None
+                }
+            except Exception as e:
+                logger.error("Proposal Builder error: %s", e)
+                return {
+                    "proposal_draft": None,
+                    "error": f"Proposal generation failed: {str(e)}"
+                }
+        
+        with ThreadPoolExecutor(max_workers=settings.LLM_BATCH_MAX_CONCURRENCY) as executor:
+            return list(executor.map(finish, proposals, texts_list, responses))
+    
+    async def abuild_proposal(
+        self,
+        rfp_summary: str,
+        challenges: List[Dict[str, Any]],
+        value_propositions: List[str],
+        case_studies: List[Dict[str, Any]] = None,
+        use_refinement: bool = True,
+        max_refinement_iterations: int = 2
+    ) -> Dict[str, Any]:
+        """Async variant of build_proposal() (draft, review and refine calls are awaited)."""
+        if not self.llm:
+            return {
+                "proposal_draft": None,
+                "error": "LLM not initialized"
+            }
+        if not self._has_content(rfp_summary, challenges, value_propositions):
+            return self._placeholder_result()
+        
+        texts = self._texts(rfp_summary, challenges, value_propositions, case_studies)
+        rfp_summary = texts[0]
+        
+        try:
+            response = await self.chain.ainvoke(self._inputs(*texts))
+            
+            proposal_draft = self._draft(response)
+            
+            refinement_results = None
+            if use_refinement and proposal_draft:
+                proposal_draft, refinement_results = await self._arefine(
+                    proposal_draft, rfp_summary, challenges, max_refinement_iterations
+                )
             
             return {
                 "proposal_draft": proposal_draft,
@@ -317,14 +453,15 @@ Provide proposal in the specified JSON format.""")
             }
         
         except Exception as e:
-            import traceback
-            print(f"⚠ Proposal Builder error: {e}")
-            traceback.print_exc()
+            logger.exception("Proposal Builder error: %s", e)
             return {
                 "proposal_draft": None,
                 "error": f"Proposal generation failed: {str(e)}"
             }
 
-# Global instance
-proposal_builder_agent = ProposalBuilderAgent()
+# Global instance, created on first use so importing the module doesn't build an LLM client
+@functools.cache
+def get_proposal_builder_agent() -> ProposalBuilderAgent:
+    """The process-wide ProposalBuilderAgent."""
+    return ProposalBuilderAgent()
 
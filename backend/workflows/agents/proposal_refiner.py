@@ -2,10 +2,10 @@
 Proposal Refiner Agent - Reviews and refines proposals for quality.
 Implements multi-pass generation: draft → review → refine workflow.
 """
+import functools
 from typing import Dict, Any, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from utils.llm_factory import get_llm
+from utils.llm_factory import get_llm, structured_llm, with_prompt_caching
 from utils.model_router import TaskType
 from workflows.schemas.output_schemas import ProposalDraftOutput
 from pydantic import BaseModel, Field
@@ -22,13 +22,70 @@ class ProposalQualityScore(BaseModel):
     suggestions: List[str] = Field(default_factory=list, description="Improvement suggestions")
 
 
+REVIEW_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert proposal reviewer. Evaluate the proposal quality on:
+1. Clarity: Is the language clear and understandable?
+2. Completeness: Are all key sections present and thorough?
+3. Relevance: Does it address the client's challenges?
+4. Professionalism: Is the tone professional and polished?
+
+Provide specific scores (0-100) for each dimension and identify weak sections."""),
+    ("user", """Review the following proposal draft:
+
+RFP Summary:
+{rfp_summary}
+
+Client Challenges:
+{challenges}
+
+Proposal Draft:
+{proposal_draft}
+
+Provide quality scores and improvement suggestions.""")
+])
+
+REFINE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert proposal writer. Refine the proposal based on review feedback.
+Focus on improving weak sections while maintaining the overall structure.
+Make the language clearer, more professional, and more relevant to client needs."""),
+    ("user", """Refine the following proposal based on review feedback:
+
+Original Proposal:
+{proposal_draft}
+
+RFP Summary:
+{rfp_summary}
+
+Review Feedback:
+Overall Score: {overall_score}/100
+Weak Sections: {weak_sections}
+Suggestions:
+{suggestions}
+
+Provide the refined proposal. Focus on improving weak sections.""")
+])
+
+
 class ProposalRefinerAgent:
     """Agent that refines proposals for quality."""
     
     def __init__(self):
         self.review_llm = None
         self.refine_llm = None
+        self.review_chain = None
+        self.refine_chain = None
         self._initialize()
+        # Built once per agent; the provider's structured output returns validated models
+        if self.review_llm:
+            self.review_chain = (
+                with_prompt_caching(REVIEW_PROMPT, self.review_llm)
+                | structured_llm(self.review_llm, ProposalQualityScore)
+            )
+        if self.refine_llm:
+            self.refine_chain = (
+                with_prompt_caching(REFINE_PROMPT, self.refine_llm)
+                | structured_llm(self.refine_llm, ProposalDraftOutput)
+            )
     
     def _initialize(self):
         """Initialize the LLMs for review and refinement."""
@@ -51,6 +108,31 @@ class ProposalRefinerAgent:
             self.review_llm = None
             self.refine_llm = None
     
+    def _review_inputs(
+        self,
+        proposal_draft: Dict[str, Any],
+        rfp_summary: str,
+        challenges: Optional[List[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        challenges_text = ""
+        if challenges:
+            challenges_text = "\n".join([f"- {ch.get('challenge', ch.get('description', ''))}" for ch in challenges])
+        
+        return {
+            "rfp_summary": rfp_summary or "No summary available",
+            "challenges": challenges_text or "No challenges specified",
+            "proposal_draft": self._format_proposal_for_review(proposal_draft)
+        }
+    
+    @staticmethod
+    def _review_failed(error: str) -> Dict[str, Any]:
+        return {
+            "overall_score": 70.0,
+            "weak_sections": [],
+            "suggestions": [],
+            "error": error
+        }
+    
     def review_proposal(
         self,
         proposal_draft: Dict[str, Any],
@@ -69,73 +151,65 @@ class ProposalRefinerAgent:
             dict with quality scores, weak sections, and suggestions
         """
         if not self.review_llm:
-            return {
-                "overall_score": 70.0,
-                "weak_sections": [],
-                "suggestions": [],
-                "error": "Review LLM not initialized"
-            }
-        
-        # Set up structured output parser
-        output_parser = PydanticOutputParser(pydantic_object=ProposalQualityScore)
-        format_instructions = output_parser.get_format_instructions()
-        
-        challenges_text = ""
-        if challenges:
-            challenges_text = "\n".join([f"- {ch.get('challenge', ch.get('description', ''))}" for ch in challenges])
+            return self._review_failed("Review LLM not initialized")
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert proposal reviewer. Evaluate the proposal quality on:
-1. Clarity: Is the language clear and understandable?
-2. Completeness: Are all key sections present and thorough?
-3. Relevance: Does it address the client's challenges?
-4. Professionalism: Is the tone professional and polished?
-
-Provide specific scores (0-100) for each dimension and identify weak sections.
-
-{format_instructions}"""),
-            ("user", """Review the following proposal draft:
-
-RFP Summary:
-{rfp_summary}
-
-Client Challenges:
-{challenges}
-
-Proposal Draft:
-{proposal_draft}
-
-Provide quality scores and improvement suggestions in the specified JSON format.""")
-        ])
+        try:
+            response = self.review_chain.invoke(self._review_inputs(proposal_draft, rfp_summary, challenges))
+            return dict(response)
+        except Exception as e:
+            print(f"[WARNING] Proposal review failed: {e}")
+            return self._review_failed(str(e))
+    
+    async def areview_proposal(
+        self,
+        proposal_draft: Dict[str, Any],
+        rfp_summary: str,
+        challenges: List[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Async variant of review_proposal()."""
+        if not self.review_llm:
+            return self._review_failed("Review LLM not initialized")
         
         try:
-            chain = prompt | self.review_llm | output_parser
-            response = chain.invoke({
-                "rfp_summary": rfp_summary or "No summary available",
-                "challenges": challenges_text or "No challenges specified",
-                "proposal_draft": self._format_proposal_for_review(proposal_draft),
-                "format_instructions": format_instructions
-            })
-            
-            if isinstance(response, ProposalQualityScore):
-                return response.model_dump()
-            elif isinstance(response, dict):
-                return response
-            else:
-                return {
-                    "overall_score": 70.0,
-                    "weak_sections": [],
-                    "suggestions": ["Proposal needs review"],
-                    "error": "Failed to parse review response"
-                }
+            response = await self.review_chain.ainvoke(self._review_inputs(proposal_draft, rfp_summary, challenges))
+            return dict(response)
         except Exception as e:
             print(f"[WARNING] Proposal review failed: {e}")
-            return {
-                "overall_score": 70.0,
-                "weak_sections": [],
-                "suggestions": [],
-                "error": str(e)
-            }
+            return self._review_failed(str(e))
+    
+    def _needs_refinement(self, review_results: Dict[str, Any]) -> bool:
+        """False when there is no refine LLM, the score is already acceptable or there is no feedback."""
+        if not self.refine_llm:
+            return False
+        
+        # If score is high enough, return as-is
+        overall_score = review_results.get("overall_score", 70.0)
+        if overall_score >= 85.0:
+            print(f"[Proposal Refiner] Quality score {overall_score:.1f} is acceptable, skipping refinement")
+            return False
+        
+        return bool(review_results.get("weak_sections") or review_results.get("suggestions"))
+    
+    def _refine_inputs(
+        self,
+        proposal_draft: Dict[str, Any],
+        review_results: Dict[str, Any],
+        rfp_summary: str
+    ) -> Dict[str, Any]:
+        # Refine weak sections
+        weak_sections = review_results.get("weak_sections", [])
+        suggestions = review_results.get("suggestions", [])
+        
+        suggestions_text = "\n".join([f"- {s}" for s in suggestions])
+        weak_sections_text = ", ".join(weak_sections) if weak_sections else "None"
+        
+        return {
+            "proposal_draft": self._format_proposal_for_review(proposal_draft),
+            "rfp_summary": rfp_summary or "No summary available",
+            "overall_score": review_results.get("overall_score", 70.0),
+            "weak_sections": weak_sections_text,
+            "suggestions": suggestions_text
+        }
     
     def refine_proposal(
         self,
@@ -156,69 +230,30 @@ Provide quality scores and improvement suggestions in the specified JSON format.
         Returns:
             Refined proposal draft
         """
-        if not self.refine_llm:
+        if not self._needs_refinement(review_results):
             return proposal_draft
         
-        # If score is high enough, return as-is
-        overall_score = review_results.get("overall_score", 70.0)
-        if overall_score >= 85.0:
-            print(f"[Proposal Refiner] Quality score {overall_score:.1f} is acceptable, skipping refinement")
+        try:
+            response = self.refine_chain.invoke(self._refine_inputs(proposal_draft, review_results, rfp_summary))
+            return dict(response)
+        except Exception as e:
+            print(f"[WARNING] Proposal refinement failed: {e}")
             return proposal_draft
-        
-        # Refine weak sections
-        weak_sections = review_results.get("weak_sections", [])
-        suggestions = review_results.get("suggestions", [])
-        
-        if not weak_sections and not suggestions:
+    
+    async def arefine_proposal(
+        self,
+        proposal_draft: Dict[str, Any],
+        review_results: Dict[str, Any],
+        rfp_summary: str,
+        max_iterations: int = 2
+    ) -> Dict[str, Any]:
+        """Async variant of refine_proposal()."""
+        if not self._needs_refinement(review_results):
             return proposal_draft
         
-        # Set up structured output parser
-        output_parser = PydanticOutputParser(pydantic_object=ProposalDraftOutput)
-        format_instructions = output_parser.get_format_instructions()
-        
-        suggestions_text = "\n".join([f"- {s}" for s in suggestions])
-        weak_sections_text = ", ".join(weak_sections) if weak_sections else "None"
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert proposal writer. Refine the proposal based on review feedback.
-Focus on improving weak sections while maintaining the overall structure.
-Make the language clearer, more professional, and more relevant to client needs.
-
-{format_instructions}"""),
-            ("user", """Refine the following proposal based on review feedback:
-
-Original Proposal:
-{proposal_draft}
-
-RFP Summary:
-{rfp_summary}
-
-Review Feedback:
-Overall Score: {overall_score}/100
-Weak Sections: {weak_sections}
-Suggestions:
-{suggestions}
-
-Provide the refined proposal in the specified JSON format. Focus on improving weak sections.""")
-        ])
-        
         try:
-            chain = prompt | self.refine_llm | output_parser
-            response = chain.invoke({
-                "proposal_draft": self._format_proposal_for_review(proposal_draft),
-                "rfp_summary": rfp_summary or "No summary available",
-                "overall_score": overall_score,
-                "weak_sections": weak_sections_text,
-                "suggestions": suggestions_text,
-                "format_instructions": format_instructions
-            })
-            
-            if isinstance(response, ProposalDraftOutput):
-                return response.model_dump()
-            elif isinstance(response, dict):
-                return response
-            else:
-                return proposal_draft  # Return original on error
+            response = await self.refine_chain.ainvoke(self._refine_inputs(proposal_draft, review_results, rfp_summary))
+            return dict(response)
         except Exception as e:
             print(f"[WARNING] Proposal refinement failed: {e}")
             return proposal_draft
@@ -233,6 +268,9 @@ Provide the refined proposal in the specified JSON format. Focus on improving we
         return "\n\n".join(sections)
 
 
-# Global instance
-proposal_refiner_agent = ProposalRefinerAgent()
+# Global instance, created on first use so importing the module doesn't build an LLM client
+@functools.cache
+def get_proposal_refiner_agent() -> ProposalRefinerAgent:
+    """The process-wide ProposalRefinerAgent."""
+    return ProposalRefinerAgent()
 
@@ -1,22 +1,109 @@
 """
 RFP Analyzer Agent - Extracts summary, business context, objectives, and scope.
 """
-from typing import Dict, Any
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from cachetools import TTLCache
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
 from utils.config import settings
-from utils.llm_factory import get_llm
+from utils.llm_factory import get_llm, structured_llm, with_prompt_caching
 from utils.model_router import TaskType
 from rag.retriever import retriever
-from workflows.schemas.output_schemas import RFPAnalysisOutput
-from workflows.prompts.prompt_templates import get_few_shot_rfp_analyzer_prompt
+from workflows.schemas.output_schemas import RFPAnalysisOutput, RFPFullAnalysisOutput
+from workflows.prompts.prompt_templates import (
+    get_few_shot_rfp_analyzer_prompt,
+    get_few_shot_challenge_extractor_prompt,
+    get_few_shot_discovery_question_prompt
+)
+from workflows.agents.discovery_question import CATEGORY_FIELDS
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = get_few_shot_rfp_analyzer_prompt()
+
+PROJECT_CONTEXT_QUERY = "What is this project about? What are the main objectives?"
+# The overview query is constant, so its (reranked) result is effectively per-project; kept briefly
+# so repeated analyses skip retrieval while new uploads still show up soon
+PROJECT_CONTEXT_TTL = 300
+_project_context_cache: TTLCache = TTLCache(maxsize=1024, ttl=PROJECT_CONTEXT_TTL)
+_project_context_lock = threading.Lock()
+
+# RFP text sent to the LLM (~2.5k tokens); longer documents are cut at a natural break
+RFP_TEXT_MAX_CHARS = 10000
+
+
+def truncate_rfp_text(text: str, limit: int = RFP_TEXT_MAX_CHARS) -> str:
+    """Cut text to at most `limit` characters at the last paragraph, line, sentence or word break."""
+    if len(text) <= limit:
+        return text
+    head = text[:limit]
+    for separator in ("\n\n", "\n", ". ", " "):
+        cut = head.rfind(separator)
+        # Only back off a little; a single huge paragraph still falls through to a word break
+        if cut >= limit * 0.8:
+            return head[:cut + 1] if separator == ". " else head[:cut]
+    return head
+
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT),
+    ("user", """Analyze the following RFP document:
+
+RFP Document:
+{rfp_text}
+
+{context_section}
+
+Provide your analysis in the specified JSON format.""")
+])
+
+# Fused variant: the challenge extractor and discovery question steps answered in the same call
+FULL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT + """
+
+After the analysis, complete two more steps in the same response.
+
+Step 2 - Challenges:
+""" + get_few_shot_challenge_extractor_prompt() + """
+
+For each challenge, provide:
+- Challenge description
+- Type (Business/Technical/Compliance/Operational)
+- Impact/Importance (High/Medium/Low)
+- Category (optional)
+
+Step 3 - Discovery questions:
+""" + get_few_shot_discovery_question_prompt() + """
+
+Base the questions on the challenges from step 2.
+Organize questions by category: Business, Technology, KPIs, Compliance, and Other.
+Generate 3-5 questions per category."""),
+    ("user", """Analyze the following RFP document:
+
+RFP Document:
+{rfp_text}
+
+{context_section}
+
+Provide the analysis, challenges and discovery questions in the specified JSON format.""")
+])
 
 class RFPAnalyzerAgent:
     """Agent that analyzes RFP documents."""
     
     def __init__(self):
         self.llm = None
+        self.chain = None
+        self.full_chain = None
         self._initialize()
+        if self.llm:
+            # Built once per agent; the provider's structured output returns a validated RFPAnalysisOutput
+            self.chain = with_prompt_caching(PROMPT, self.llm) | structured_llm(self.llm, RFPAnalysisOutput)
+            self.full_chain = with_prompt_caching(FULL_PROMPT, self.llm) | structured_llm(self.llm, RFPFullAnalysisOutput)
     
     def _initialize(self):
         """Initialize the LLM with intelligent routing."""
@@ -28,9 +115,79 @@ class RFPAnalyzerAgent:
                 task_type=TaskType.ANALYSIS,
                 prefer_provider=settings.LLM_PROVIDER if settings.LLM_PROVIDER in ["claude", "openai"] else None
             )
-            print(f"✓ RFP Analyzer Agent initialized with intelligent routing")
+            logger.info("RFP Analyzer Agent initialized with intelligent routing")
+        except Exception as e:
+            logger.error("Error initializing RFP Analyzer Agent: %s", e)
+    
+    @staticmethod
+    def _retrieve_context(project_id: int) -> str:
+        """Project overview chunks from RAG, or None."""
+        with _project_context_lock:
+            cached = _project_context_cache.get(project_id)
+        if cached is not None:
+            return cached
+        try:
+            nodes = retriever.retrieve(
+                query=PROJECT_CONTEXT_QUERY,
+                project_id=project_id,
+                top_k=3
+            )
+            if nodes:
+                context = "\n\n".join([
+                    node.node.get_content() for node in nodes
+                ])
+                with _project_context_lock:
+                    _project_context_cache[project_id] = context
+                return context
         except Exception as e:
-            print(f"Error initializing RFP Analyzer Agent: {e}")
+            logger.warning("Error retrieving context: %s", e)
+        return None
+    
+    @staticmethod
+    def _inputs(rfp_text: str, retrieved_context: str = None) -> Dict[str, Any]:
+        """Chain inputs for one RFP."""
+        context_section = ""
+        if retrieved_context:
+            context_section = f"\nAdditional Context:\n{retrieved_context}"
+        
+        return {
+            "rfp_text": truncate_rfp_text(rfp_text),
+            "context_section": context_section
+        }
+    
+    @staticmethod
+    def _result(response: RFPAnalysisOutput) -> Dict[str, Any]:
+        """Agent result from the structured LLM response."""
+        final_result = {**dict(response), "error": None}
+        
+        logger.debug("[RFP Analyzer] Final result - Summary: %d chars, Objectives: %d",
+                     len(final_result['rfp_summary']), len(final_result['business_objectives']))
+        
+        return final_result
+    
+    @staticmethod
+    def _error_result(error: str) -> Dict[str, Any]:
+        return {
+            "rfp_summary": None,
+            "context_overview": None,
+            "business_objectives": [],
+            "project_scope": None,
+            "error": error
+        }
+    
+    @staticmethod
+    def _full_result(response: RFPFullAnalysisOutput) -> Dict[str, Any]:
+        """analyze_full() result: the analysis fields plus challenges and questions by category."""
+        data = response.model_dump()
+        result = {field: data[field] for field in RFPAnalysisOutput.model_fields}
+        result["challenges"] = data["challenges"]
+        result["discovery_questions"] = {category: data[field] for category, field in CATEGORY_FIELDS.items()}
+        result["error"] = None
+        
+        logger.debug("[RFP Analyzer] Fused result - Summary: %d chars, Challenges: %d",
+                     len(result['rfp_summary']), len(result['challenges']))
+        
+        return result
     
     def analyze(
         self,
@@ -50,122 +207,115 @@ class RFPAnalyzerAgent:
             dict with rfp_summary, context_overview, business_objectives, project_scope
         """
         if not self.llm:
-            return {
-                "rfp_summary": None,
-                "context_overview": None,
-                "business_objectives": [],
-                "project_scope": None,
-                "error": "LLM not initialized"
-            }
+            return self._error_result("LLM not initialized")
         
         # Retrieve additional context if needed
         if not retrieved_context and project_id:
-            try:
-                nodes = retriever.retrieve(
-                    query="What is this project about? What are the main objectives?",
-                    project_id=project_id,
-                    top_k=3
-                )
-                if nodes:
-                    retrieved_context = "\n\n".join([
-                        node.node.get_content() for node in nodes
-                    ])
-            except Exception as e:
-                print(f"Error retrieving context: {e}")
+            retrieved_context = self._retrieve_context(project_id)
         
-        # Set up structured output parser
-        output_parser = PydanticOutputParser(pydantic_object=RFPAnalysisOutput)
+        try:
+            logger.debug("[RFP Analyzer] Invoking LLM with %d chars of RFP text", len(rfp_text))
+            return self._result(self.chain.invoke(self._inputs(rfp_text, retrieved_context)))
+        except Exception as e:
+            logger.exception("[RFP Analyzer] LLM call failed: %s", e)
+            return self._error_result(str(e))
+    
+    def analyze_full(
+        self,
+        rfp_text: str,
+        retrieved_context: str = None,
+        project_id: int = None
+    ) -> Dict[str, Any]:
+        """
+        analyze(), challenge extraction and discovery questions in one LLM call
+        (used by the workflow when WORKFLOW_FUSED_ANALYSIS is enabled).
         
-        # Create a simple format instruction without JSON schema examples to avoid template parsing issues
-        # The PydanticOutputParser will handle the actual parsing, we just need to tell the LLM the structure
-        # Use escaped curly braces to prevent LangChain from treating JSON field names as template variables
-        format_instructions_simple = """Return your response as a valid JSON object with the following structure:
-- rfp_summary: A 2-3 paragraph executive summary
-- context_overview: Business context and background information
-- business_objectives: An array of business objectives (strings)
-- project_scope: Description of the project scope
-
-Example format: {{"rfp_summary": "...", "context_overview": "...", "business_objectives": [...], "project_scope": "..."}}
-
-Ensure the JSON is valid and properly formatted."""
+        Returns:
+            analyze() result plus challenges (extract_challenges() format) and
+            discovery_questions (generate_questions() format)
+        """
+        if not self.llm:
+            return {**self._error_result("LLM not initialized"), "challenges": [], "discovery_questions": {}}
         
-        system_prompt = get_few_shot_rfp_analyzer_prompt()
+        if not retrieved_context and project_id:
+            retrieved_context = self._retrieve_context(project_id)
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("user", """Analyze the following RFP document:
-
-RFP Document:
-{rfp_text}
-
-{context_section}
-
-{format_instructions}
-
-Provide your analysis in the specified JSON format.""")
-        ])
+        try:
+            logger.debug("[RFP Analyzer] Invoking fused LLM call with %d chars of RFP text", len(rfp_text))
+            return self._full_result(self.full_chain.invoke(self._inputs(rfp_text, retrieved_context)))
+        except Exception as e:
+            logger.exception("[RFP Analyzer] LLM call failed: %s", e)
+            return {**self._error_result(str(e)), "challenges": [], "discovery_questions": {}}
+    
+    def analyze_batch(
+        self,
+        rfp_texts: List[str],
+        retrieved_contexts: List[Optional[str]] = None,
+        project_ids: List[Optional[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        analyze() for several RFPs, dispatched concurrently through one chain.batch() call.
         
-        context_section = ""
-        if retrieved_context:
-            context_section = f"\nAdditional Context:\n{retrieved_context}"
+        Args:
+            rfp_texts: One RFP document text per project
+            retrieved_contexts: Optional retrieved context per RFP (same order)
+            project_ids: Optional project ID per RFP, for RAG retrieval when no context is given
         
-        try:
-            print(f"    [RFP Analyzer] Invoking LLM with {len(rfp_text)} chars of RFP text...")
-            
-            # Create chain with structured output
-            chain = prompt | self.llm | output_parser
-            
-            response = chain.invoke({
-                "rfp_text": rfp_text[:10000],  # Limit text length
-                "context_section": context_section,
-                "format_instructions": format_instructions_simple
-            })
-            
-            print(f"    [RFP Analyzer] LLM response received: {type(response)}")
-            
-            # Response is already parsed as Pydantic model
-            if isinstance(response, RFPAnalysisOutput):
-                result = response.model_dump()
-                print(f"    [RFP Analyzer] ✓ Successfully parsed structured response")
-            else:
-                # Fallback: convert dict to model
-                if isinstance(response, dict):
-                    result = RFPAnalysisOutput(**response).model_dump()
-                else:
-                    # Last resort fallback
-                    content = str(response)
-                    result = {
-                        "rfp_summary": content[:500] if content else "",
-                        "context_overview": "Extracted from RFP",
-                        "business_objectives": [],
-                        "project_scope": content[500:1500] if len(content) > 500 else content
-                    }
-            
-            final_result = {
-                "rfp_summary": result.get("rfp_summary", ""),
-                "context_overview": result.get("context_overview", ""),
-                "business_objectives": result.get("business_objectives", []),
-                "project_scope": result.get("project_scope", ""),
-                "error": None
-            }
-            
-            print(f"    [RFP Analyzer] Final result - Summary: {len(str(final_result.get('rfp_summary'))) if final_result.get('rfp_summary') else 0} chars, "
-                  f"Objectives: {len(final_result.get('business_objectives', []))}")
-            
-            return final_result
+        Returns:
+            One analyze() result per RFP, in input order
+        """
+        if not self.llm:
+            return [self._error_result("LLM not initialized") for _ in rfp_texts]
+        
+        contexts = list(retrieved_contexts or [None] * len(rfp_texts))
+        # Missing contexts are retrieved concurrently rather than one project after another
+        missing = [i for i, project_id in enumerate(project_ids or []) if not contexts[i] and project_id]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), settings.LLM_BATCH_MAX_CONCURRENCY)) as executor:
+                for i, context in zip(missing, executor.map(self._retrieve_context, [project_ids[i] for i in missing])):
+                    contexts[i] = context
+        
+        logger.debug("[RFP Analyzer] Invoking LLM for a batch of %d RFPs", len(rfp_texts))
+        responses = self.chain.batch(
+            [self._inputs(rfp_text, context) for rfp_text, context in zip(rfp_texts, contexts)],
+            config={"max_concurrency": settings.LLM_BATCH_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        
+        results = []
+        for response in responses:
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                results.append(self._result(response))
+            except Exception as e:
+                logger.error("[RFP Analyzer] LLM call failed: %s", e)
+                results.append(self._error_result(str(e)))
+        return results
+    
+    async def aanalyze(
+        self,
+        rfp_text: str,
+        retrieved_context: str = None,
+        project_id: int = None
+    ) -> Dict[str, Any]:
+        """Async variant of analyze(); RAG retrieval runs in a worker thread."""
+        if not self.llm:
+            return self._error_result("LLM not initialized")
+        
+        if not retrieved_context and project_id:
+            retrieved_context = await asyncio.to_thread(self._retrieve_context, project_id)
         
+        try:
+            logger.debug("[RFP Analyzer] Invoking LLM with %d chars of RFP text", len(rfp_text))
+            return self._result(await self.chain.ainvoke(self._inputs(rfp_text, retrieved_context)))
         except Exception as e:
-            print(f"    [RFP Analyzer] ❌ Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "rfp_summary": None,
-                "context_overview": None,
-                "business_objectives": [],
-                "project_scope": None,
-                "error": str(e)
-            }
-
-# Global instance
-rfp_analyzer_agent = RFPAnalyzerAgent()
+            logger.exception("[RFP Analyzer] LLM call failed: %s", e)
+            return self._error_result(str(e))
+
+# Global instance, created on first use so importing the module doesn't build an LLM client
+@functools.cache
+def get_rfp_analyzer_agent() -> RFPAnalyzerAgent:
+    """The process-wide RFPAnalyzerAgent."""
+    return RFPAnalyzerAgent()
 
@@ -1,6 +1,7 @@
 """
 Value Proposition Agent - Creates value propositions mapped to challenges.
 """
+import functools
 from typing import Dict, Any, List
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
@@ -124,6 +125,9 @@ Provide value propositions in the specified JSON format.""")
                 "error": str(e)
             }
 
-# Global instance
-value_proposition_agent = ValuePropositionAgent()
+# Global instance, created on first use so importing the module doesn't build an LLM client
+@functools.cache
+def get_value_proposition_agent() -> ValuePropositionAgent:
+    """The process-wide ValuePropositionAgent."""
+    return ValuePropositionAgent()
 
@@ -1,18 +1,36 @@
 """
 LangGraph workflow for multi-agent presales pipeline.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List
 from langgraph.graph import StateGraph, END
+from utils.config import settings
 from workflows.state import WorkflowState, create_initial_state
 from workflows.agents import (
-    rfp_analyzer_agent,
-    challenge_extractor_agent,
-    discovery_question_agent,
-    value_proposition_agent,
-    case_study_matcher_agent,
-    proposal_builder_agent
+    get_rfp_analyzer_agent,
+    get_challenge_extractor_agent,
+    get_discovery_question_agent,
+    get_value_proposition_agent,
+    get_case_study_matcher_agent,
+    get_proposal_builder_agent
 )
 
+# Placeholder 13-section draft so the workflow can complete when the proposal builder returns none
+MINIMAL_PROPOSAL_DRAFT = {
+    "executive_summary": "Executive summary based on RFP requirements",
+    "understanding_client_needs": "Understanding of client needs",
+    "proposed_solution": "Proposed solution",
+    "solution_architecture": "Solution architecture and technology stack",
+    "business_value_use_cases": "Business value and use cases",
+    "benefits_roi": "Benefits and ROI justification",
+    "implementation_roadmap": "Implementation roadmap and timeline",
+    "change_management_training": "Change management and training strategy",
+    "security_compliance": "Security, compliance and data governance",
+    "case_studies_credentials": "Case studies and delivery credentials",
+    "commercial_model": "Commercial model and licensing options",
+    "risks_assumptions": "Risks, assumptions and mitigation",
+    "next_steps_cta": "Next steps and call-to-action"
+}
+
 def rfp_analyzer_node(state: WorkflowState) -> Dict[str, Any]:
     """RFP Analyzer Agent node."""
     print(f"  [RFP Analyzer] Starting...")
@@ -27,8 +45,14 @@ def rfp_analyzer_node(state: WorkflowState) -> Dict[str, Any]:
         
         print(f"  [RFP Analyzer] RFP text length: {len(rfp_text) if rfp_text else 0}")
         
+        # Fused mode answers the challenge extractor and discovery question steps in the same call
+        selected_tasks = state.get("selected_tasks", {})
+        fused = settings.WORKFLOW_FUSED_ANALYSIS and selected_tasks.get("challenges", True)
+        
         # Run analyzer
-        result = rfp_analyzer_agent.analyze(
+        agent = get_rfp_analyzer_agent()
+        analyze = agent.analyze_full if fused else agent.analyze
+        result = analyze(
             rfp_text=rfp_text,
             retrieved_context=state.get("retrieved_context"),
             project_id=state["project_id"]
@@ -52,6 +76,9 @@ def rfp_analyzer_node(state: WorkflowState) -> Dict[str, Any]:
                     "output": "RFP analyzed successfully"
                 }]
             })
+            if fused:
+                updates["challenges"] = result.get("challenges", [])
+                updates["discovery_questions"] = result.get("discovery_questions", {}) if selected_tasks.get("questions", True) else {}
     except Exception as e:
         print(f"  [RFP Analyzer] ❌ Exception: {str(e)}")
         import traceback
@@ -81,7 +108,7 @@ def challenge_extractor_node(state: WorkflowState) -> Dict[str, Any]:
         business_objectives = state.get("business_objectives", [])
         print(f"  [Challenge Extractor] RFP Summary: {len(rfp_summary) if rfp_summary else 0} chars, Objectives: {len(business_objectives) if business_objectives else 0}")
         
-        result = challenge_extractor_agent.extract_challenges(
+        result = get_challenge_extractor_agent().extract_challenges(
             rfp_summary=rfp_summary,
             business_objectives=business_objectives
         )
@@ -130,7 +157,7 @@ def discovery_question_node(state: WorkflowState) -> Dict[str, Any]:
         challenges = state.get("challenges", [])
         print(f"  [Discovery Question] Challenges available: {len(challenges) if challenges else 0}")
         
-        result = discovery_question_agent.generate_questions(
+        result = get_discovery_question_agent().generate_questions(
             challenges=challenges
         )
         
@@ -139,6 +166,8 @@ def discovery_question_node(state: WorkflowState) -> Dict[str, Any]:
         if result.get("error"):
             print(f"  [Discovery Question] ❌ Error: {result['error']}")
             updates["errors"] = [f"Discovery Question: {result['error']}"]
+            # Keep the agent's generic fallback questions so the step still yields content
+            updates["discovery_questions"] = result.get("discovery_questions", {})
         else:
             questions = result.get("discovery_questions", {})
             questions_count = sum(len(q) for q in questions.values()) if questions else 0
@@ -174,7 +203,7 @@ def value_proposition_node(state: WorkflowState) -> Dict[str, Any]:
         rfp_summary = state.get("rfp_summary", "")
         print(f"  [Value Proposition] Challenges: {len(challenges) if challenges else 0}, RFP Summary: {len(rfp_summary) if rfp_summary else 0} chars")
         
-        result = value_proposition_agent.generate_value_propositions(
+        result = get_value_proposition_agent().generate_value_propositions(
             challenges=challenges,
             rfp_summary=rfp_summary
         )
@@ -227,7 +256,7 @@ def case_study_matcher_node(state: WorkflowState) -> Dict[str, Any]:
         from db.database import SessionLocal
         db = SessionLocal()
         try:
-            result = case_study_matcher_agent.match_case_studies(
+            result = get_case_study_matcher_agent().match_case_studies(
                 challenges=challenges,
                 db=db,
                 top_k=3
@@ -287,7 +316,7 @@ def proposal_builder_node(state: WorkflowState) -> Dict[str, Any]:
               f"Value Props: {len(value_propositions) if value_propositions else 0}, "
               f"Case Studies: {len(case_studies) if case_studies else 0}")
         
-        result = proposal_builder_agent.build_proposal(
+        result = get_proposal_builder_agent().build_proposal(
             rfp_summary=rfp_summary,
             challenges=challenges,
             value_propositions=value_propositions,
@@ -324,21 +353,7 @@ def proposal_builder_node(state: WorkflowState) -> Dict[str, Any]:
                 print(f"  [Proposal Builder] ⚠ No proposal_draft in result, creating minimal draft")
                 # Create a minimal proposal_draft if none was returned (13-section structure)
                 updates.update({
-                    "proposal_draft": {
-                        "executive_summary": "Executive summary based on RFP requirements",
-                        "understanding_client_needs": "Understanding of client needs",
-                        "proposed_solution": "Proposed solution",
-                        "solution_architecture": "Solution architecture and technology stack",
-                        "business_value_use_cases": "Business value and use cases",
-                        "benefits_roi": "Benefits and ROI justification",
-                        "implementation_roadmap": "Implementation roadmap and timeline",
-                        "change_management_training": "Change management and training strategy",
-                        "security_compliance": "Security, compliance and data governance",
-                        "case_studies_credentials": "Case studies and delivery credentials",
-                        "commercial_model": "Commercial model and licensing options",
-                        "risks_assumptions": "Risks, assumptions and mitigation",
-                        "next_steps_cta": "Next steps and call-to-action"
-                    },
+                    "proposal_draft": dict(MINIMAL_PROPOSAL_DRAFT),
                     "execution_log": [{
                         "step": "proposal_builder",
                         "status": "success",
@@ -356,21 +371,7 @@ def proposal_builder_node(state: WorkflowState) -> Dict[str, Any]:
             "error": str(e)
         }]
         # Even on exception, create a minimal proposal_draft so the workflow can complete (13-section structure)
-        updates["proposal_draft"] = {
-            "executive_summary": "Executive summary based on RFP requirements",
-            "understanding_client_needs": "Understanding of client needs",
-            "proposed_solution": "Proposed solution",
-            "solution_architecture": "Solution architecture and technology stack",
-            "business_value_use_cases": "Business value and use cases",
-            "benefits_roi": "Benefits and ROI justification",
-            "implementation_roadmap": "Implementation roadmap and timeline",
-            "change_management_training": "Change management and training strategy",
-            "security_compliance": "Security, compliance and data governance",
-            "case_studies_credentials": "Case studies and delivery credentials",
-            "commercial_model": "Commercial model and licensing options",
-            "risks_assumptions": "Risks, assumptions and mitigation",
-            "next_steps_cta": "Next steps and call-to-action"
-        }
+        updates["proposal_draft"] = dict(MINIMAL_PROPOSAL_DRAFT)
     
     return updates
 
@@ -381,8 +382,39 @@ def should_run_challenges(state: WorkflowState) -> str:
         return "challenge_extractor"
     return "proposal_builder"  # Skip to proposal if challenges not selected
 
+def should_run_challenge_consumers(state: WorkflowState) -> List[str]:
+    """Conditional edge (fused analysis): fan out to the nodes that use the challenges."""
+    selected_tasks = state.get("selected_tasks", {})
+    if selected_tasks.get("challenges", True):
+        return ["value_proposition", "case_study_matcher"]
+    return ["proposal_builder"]
+
+def create_fused_workflow_graph() -> StateGraph:
+    """Workflow without the challenge extractor and discovery question nodes (rfp_analyzer fills both)."""
+    workflow = StateGraph(WorkflowState)
+    
+    workflow.add_node("rfp_analyzer", rfp_analyzer_node)
+    workflow.add_node("value_proposition", value_proposition_node)
+    workflow.add_node("case_study_matcher", case_study_matcher_node)
+    workflow.add_node("proposal_builder", proposal_builder_node)
+    
+    workflow.set_entry_point("rfp_analyzer")
+    workflow.add_conditional_edges(
+        "rfp_analyzer",
+        should_run_challenge_consumers,
+        ["value_proposition", "case_study_matcher", "proposal_builder"]
+    )
+    workflow.add_edge("value_proposition", "proposal_builder")
+    workflow.add_edge("case_study_matcher", "proposal_builder")
+    workflow.add_edge("proposal_builder", END)
+    
+    return workflow.compile()
+
 def create_workflow_graph() -> StateGraph:
     """Create the LangGraph workflow."""
+    if settings.WORKFLOW_FUSED_ANALYSIS:
+        return create_fused_workflow_graph()
+    
     workflow = StateGraph(WorkflowState)
     
     # Add nodes
@@ -36,6 +36,11 @@ class DiscoveryQuestionsOutput(BaseModel):
     other_questions: List[str] = Field(default_factory=list, description="Other categories")
 
 
+class RFPFullAnalysisOutput(DiscoveryQuestionsOutput, ChallengesOutput, RFPAnalysisOutput):
+    """Structured output of the fused RFP Analyzer call (analysis, challenges and discovery questions)."""
+    # Bases are listed in reverse: fields come out analysis -> challenges -> questions, the order they're generated in
+
+
 class ValuePropositionsOutput(BaseModel):
     """Structured output from Value Proposition Agent."""
     value_propositions: List[str] = Field(description="List of value propositions")